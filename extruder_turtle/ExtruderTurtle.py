@@ -1,35 +1,37 @@
 import os
 import math
 import copy
-import rhinoscriptsyntax as rs
+try:
+	import rhinoscriptsyntax as rs
+except ImportError:
+	# moves, G-code and history work without Rhino, only surfaces and boxes need it
+	rs = None
+import geometry_backend as gb
+import gcode_writer as gw
+import move_history as mh
+import frame_turtle as ft
+import polyline_tools as pt
+import profiling as pf
+import rhino_calls as rc
 __location__ = os.path.dirname(__file__)
 
+# the turtle attributes save_state and restore_state save and restore
+STATE_FIELDS = ("x", "y", "z", "forward_vec", "left_vec", "up_vec", "pen", "layer", "speed", "extrude_rate",
+	"extrude_width", "layer_height", "nozzle_size", "mix_factor", "current_color", "current_extruder", "write_gcode")
 
-class ExtruderTurtle:
+
+class ExtruderTurtle(ft.FrameTurtle):
 
 	def __init__(self):
-		self.x = 0
-		self.y = 0
-		self.z = 0
-		self.forward_vec = [1, 0, 0]
-		self.left_vec = [0, 1, 0]
-		self.up_vec = [0, 0, 1]
-		self.use_degrees = True
-		self.pen = True
+		ft.FrameTurtle.__init__(self)
 		self.mix_factor = 0.9
 		self.layer = 1
 
 		# GCODE writing and history tracking
 		self.write_gcode = False
 		self.track_history = True
-		self.prev_points = [(self.x,self.y,self.z)]
-		self.line_segs = []
-		self.travel_line_segs = []
-		self.extrusion_history = []
-		self.speed_history = []
-		self.travel_speed_history = []
+		self.history = mh.MoveHistory(self.x,self.y,self.z)
 		self.current_color = 0, 0, 0
-		self.color_history = []
 		self.tube_color = 0, 0, 0, 0, 0, 0 # r,g,b,tube_dist,volume,mass
 		self.tube_color_history = [] 
 		self.ellapsed_time = 0 # ellapsed time in seconds
@@ -42,6 +44,8 @@ class ExtruderTurtle:
 		self.out_file = False;
 		self.initseq_file = False;
 		self.finalseq_file = False;
+		self.sink = gw.NullGcodeSink() # everything written to gcode goes through the sink
+		self.output_format = "gcode" # "gcode" (plain text), "gzip" or "binary", see gw.open_sink
 
 		# printer and material settings
 		self.nozzle_size = 0;
@@ -128,8 +132,10 @@ class ExtruderTurtle:
 					z=0,
 					filename=False,
 					printer=False,
-					extruder=0):
+					extruder=0,
+					output_format="gcode"):
 		self.set_extruder(extruder)
+		self.output_format = output_format
 		if (filename):
 			self.out_filename = filename
 			self.write_gcode = True
@@ -143,7 +149,7 @@ class ExtruderTurtle:
 		else:
 			print("Warning can't write file. No printer selected or filename given.")
 			
-		if self.track_history: self.prev_points = [(x,y,z)]
+		if self.track_history: self.history.jump_to(x,y,z)
 
 	# set printer parameters
 	def set_printer(self,printer):
@@ -302,7 +308,8 @@ class ExtruderTurtle:
 	# GCODE and file-related functions
 	###################################################################
 
-	def createFile(self, filename, path = False):
+	def createFile(self, filename, path = False, output_format="gcode"):
+		self.output_format = output_format
 		if (path==False):
 			path = "/Users/Leah/Desktop/_research/_GH_Rhino_code/"
 			self.out_filename = path + filename
@@ -354,34 +361,35 @@ class ExtruderTurtle:
 
 	def write_header_comments(self, parameters=True):
 		if self.write_gcode:
-			self.out_file = open(self.out_filename, 'w+')
+			self.sink = gw.open_sink(self.out_filename, self.output_format)
+			self.out_file = self.sink
 
 			# write printer information to top of file
-			self.out_file.write("; *************************************************\n")
-			self.out_file.write("; *************************************************\n")
-			self.out_file.write("; ******* File generated by Extruder Turtle *******\n")
-			self.out_file.write("; ******* written by Leah Buechley and  ***********\n")
-			self.out_file.write("; ******* and Franklin Pezutti-Dyer ***************\n")
-			self.out_file.write("; **** Hand and Machine Lab, UNM, 2021-present ****\n")
-			self.out_file.write("; *************************************************\n")
-			self.out_file.write("; *************************************************\n")
+			self.sink.write("; *************************************************\n")
+			self.sink.write("; *************************************************\n")
+			self.sink.write("; ******* File generated by Extruder Turtle *******\n")
+			self.sink.write("; ******* written by Leah Buechley and  ***********\n")
+			self.sink.write("; ******* and Franklin Pezutti-Dyer ***************\n")
+			self.sink.write("; **** Hand and Machine Lab, UNM, 2021-present ****\n")
+			self.sink.write("; *************************************************\n")
+			self.sink.write("; *************************************************\n")
 			if (parameters):
-				self.out_file.write("; ********** Default printer parameters ***********\n")
-				self.out_file.write("; Printer: " + self.printer + "\n")
-				self.out_file.write("; Nozzle size: " + str(self.nozzle) + "\n")
-				self.out_file.write("; Extrude width: " + str(self.extrude_width) + "\n")
-				self.out_file.write("; Layer height: " + str(self.layer_height) + "\n")
-				self.out_file.write("; Extrude rate: " + str(self.extrude_rate) + "\n")
-				self.out_file.write("; Speed: " + str(self.speed) + "\n")
-				self.out_file.write("; Mix Factor: " + str(self.mix_factor) + "\n")
+				self.sink.write("; ********** Default printer parameters ***********\n")
+				self.sink.write("; Printer: " + self.printer + "\n")
+				self.sink.write("; Nozzle size: " + str(self.nozzle) + "\n")
+				self.sink.write("; Extrude width: " + str(self.extrude_width) + "\n")
+				self.sink.write("; Layer height: " + str(self.layer_height) + "\n")
+				self.sink.write("; Extrude rate: " + str(self.extrude_rate) + "\n")
+				self.sink.write("; Speed: " + str(self.speed) + "\n")
+				self.sink.write("; Mix Factor: " + str(self.mix_factor) + "\n")
 
 			# write printer initialization sequence 
 			self.initseq_file = open(self.initseq_filename, 'r')
 			self.do(self.initseq_file.read().format(**locals()))
 			self.initseq_file.close()
 			self.set_speed(self.speed)
-			self.out_file.write("; ********** End printer initialization ***********\n")
-			self.out_file.write("; *************************************************\n\n")
+			self.sink.write("; ********** End printer initialization ***********\n")
+			self.sink.write("; *************************************************\n\n")
 
 	def name(self, filename):
 		self.out_filename = filename
@@ -395,30 +403,98 @@ class ExtruderTurtle:
 
 	def write_gcode_comment(self, comment):
 		if (self.out_file):
-			self.out_file.write("; " + comment + "\n")
+			self.sink.write("; " + comment + "\n")
 
 	def write_print_parameters_to_file(self):
 		if (self.out_file):
 			print("writing parameters to file")
-			self.out_file.write("; ***************** Print parameters **************\n")
-			self.out_file.write("; Nozzle size: " + str(self.nozzle) + "\n")
-			self.out_file.write("; Extrude width: " + str(self.extrude_width) + "\n")
-			self.out_file.write("; Layer height: " + str(self.layer_height) + "\n")
-			self.out_file.write("; Extrude rate: " + str(self.extrude_rate) + "\n")
-			self.out_file.write("; Speed: " + str(self.speed) + "\n")
-			self.out_file.write("; Mix Factor: " + str(self.mix_factor) + "\n")
-			self.out_file.write("; *************************************************\n\n")
+			self.sink.write("; ***************** Print parameters **************\n")
+			self.sink.write("; Nozzle size: " + str(self.nozzle) + "\n")
+			self.sink.write("; Extrude width: " + str(self.extrude_width) + "\n")
+			self.sink.write("; Layer height: " + str(self.layer_height) + "\n")
+			self.sink.write("; Extrude rate: " + str(self.extrude_rate) + "\n")
+			self.sink.write("; Speed: " + str(self.speed) + "\n")
+			self.sink.write("; Mix Factor: " + str(self.mix_factor) + "\n")
+			self.sink.write("; *************************************************\n\n")
 
 	def finish(self):
 		if self.write_gcode:
 			self.finalseq_file = open(self.finalseq_filename, 'r')
 			self.do(self.finalseq_file.read())
 			self.finalseq_file.close()
-			self.out_file.close()
+			self.sink.close()
 
 	def do(self, cmd):
 		if self.write_gcode:
-			self.out_file.write(cmd + "\n")
+			self.sink.write(cmd + "\n")
+
+	# queue a move with the sink, values must match gw.MOVE_FORMATS[code]
+	def do_move(self, code, values):
+		if self.write_gcode:
+			self.sink.move(code, values)
+
+	# write gcode through a different sink, e.g. gw.MemoryGcodeSink()
+	def set_sink(self, sink):
+		self.sink = sink
+		self.out_file = sink
+		self.write_gcode = True
+
+	def get_sink(self):
+		return self.sink
+
+	# the turtle's position, heading and print settings as plain data, for restore_state
+	def save_state(self):
+		return dict([(name, copy.copy(getattr(self, name))) for name in STATE_FIELDS])
+
+	def restore_state(self, state):
+		for name in state:
+			setattr(self, name, copy.copy(state[name]))
+
+	# keep a copy of everything written from here on, and of the moves added to the history
+	# stop_recording(recording) returns it as a block of plain data, that replay writes again
+	def start_recording(self):
+		sink = gw.RecordingSink(self.sink)
+		if (self.out_file is self.sink):
+			self.out_file = sink
+		self.sink = sink
+		return (sink, self.save_state(), len(self.history))
+
+	# block is {"start": state, "end": state, "items": what was written, "rows": history rows}
+	def stop_recording(self, recording):
+		sink, state, row = recording
+		if (self.sink is sink):
+			if (self.out_file is sink):
+				self.out_file = sink.sink
+			self.sink = sink.sink
+		return {"start": state, "end": self.save_state(), "items": sink.items, "rows": self.history.rows(row)}
+
+	# write a recorded block again, add its moves to the history and leave the turtle where it ended
+	def replay(self, block):
+		gw.replay(block["items"], self.sink)
+		if (self.track_history):
+			self.history.extend(block["rows"])
+		self.restore_state(block["end"])
+
+	# replace runs of moves along circular arcs with G2/G3 moves (within tolerance mm)
+	# wraps the current sink, so call it after the printer and file are set up
+	# t.get_sink().report() prints the compression achieved
+	def set_arc_fitting(self, tolerance=0.01):
+		self.set_sink(gw.ArcFittingSink(self.sink, tolerance))
+
+	# merge runs of nearly straight moves into longer moves (within tolerance mm of the path)
+	# wraps the current sink like set_arc_fitting, to use both call this one first
+	def set_decimation(self, tolerance=0.05):
+		self.set_sink(gw.DecimatingSink(self.sink, tolerance))
+
+	# time the slicer's stages per layer and count the G-code written, while in a with block
+	# with t.profile() as p: ..., then p.report() or p.save_trace(filename), see profiling.py
+	def profile(self):
+		return pf.Profiler(self)
+
+	# count the rhinoscriptsyntax calls made while in a with block, by function, caller and layer
+	# with t.count_rhino_calls() as log: ..., then log.report(), see rhino_calls.py
+	def count_rhino_calls(self):
+		return rc.RhinoCallLog(self)
 
 	###################################################################
 	# Print and printer parameters
@@ -429,7 +505,7 @@ class ExtruderTurtle:
 		print("extrude rate set to: " +str(extrude_rate))
 		if (comment and self.out_file!=False):
 			self.write_gcode_comment("Changed extrude rate to: " +str(extrude_rate))
-			self.out_file.write("; *************************************************\n\n")
+			self.sink.write("; *************************************************\n\n")
 
 	def get_extrude_rate(self):
 		return self.extrude_rate
@@ -439,7 +515,7 @@ class ExtruderTurtle:
 		print("extrude width set to: " +str(extrude_width))
 		if (comment and self.out_file!=False):
 			self.write_gcode_comment("Changed extrude width to: " +str(extrude_width))
-			self.out_file.write("; *************************************************\n\n")
+			self.sink.write("; *************************************************\n\n")
 
 	def get_extrude_width(self):
 		return self.extrude_width
@@ -476,8 +552,8 @@ class ExtruderTurtle:
 		self.extrude_rate = nozzle_size
 		print("nozzle size set to: " +str(nozzle_size))
 		if (comment and self.out_file!=False):
-			self.out_file.write("; Set nozzle size to: " +str(nozzle_size))
-			self.out_file.write("; *************************************************\n\n")
+			self.sink.write("; Set nozzle size to: " +str(nozzle_size))
+			self.sink.write("; *************************************************\n\n")
 		#print("extrude width set to: " +str(self.extrude_width))
 		#print("extrude rate set to: " +str(self.extrude_rate))
 		#print("layer height set to: " +str(self.layer_height))
@@ -485,8 +561,8 @@ class ExtruderTurtle:
 	def set_nozzle(self, nozzle_size, comment=True):
 		self.set_nozzle_size(nozzle_size)
 		if (comment and self.out_file!=False):
-			self.out_file.write("Set nozzle size to: " +str(nozzle_size))
-			self.out_file.write("; *************************************************\n\n")
+			self.sink.write("Set nozzle size to: " +str(nozzle_size))
+			self.sink.write("; *************************************************\n\n")
 
 	def get_nozzle_size(self):
 		return self.nozzle
@@ -501,11 +577,11 @@ class ExtruderTurtle:
 
 		self.mix_factor = mix_factor
 		print("mix factor set to: " +str(round(self.mix_factor,4)))
-		self.out_file.write("; *************************************************\n")
-		self.out_file.write("M163 S0 P" +str(round(mix_factor,4)) + " ; Set Mix Factor small auger extruder\n")
-		self.out_file.write("M163 S1 P" +str(round(1.0-mix_factor,4)) + " ; Set Mix Factor large plunger extruder\n")
-		self.out_file.write("M164 S0 ; Finalize mix\n")
-		self.out_file.write("; *************************************************\n\n")
+		self.sink.write("; *************************************************\n")
+		self.sink.write("M163 S0 P" +str(round(mix_factor,4)) + " ; Set Mix Factor small auger extruder\n")
+		self.sink.write("M163 S1 P" +str(round(1.0-mix_factor,4)) + " ; Set Mix Factor large plunger extruder\n")
+		self.sink.write("M164 S0 ; Finalize mix\n")
+		self.sink.write("; *************************************************\n\n")
 
 	def get_mix_factor(self):
 		return round(self.mix_factor,4)
@@ -514,7 +590,7 @@ class ExtruderTurtle:
 		if (self.out_file==False):
 			print("Can't set material. No gcode file.")
 			return
-		self.out_file.write("; *************************************************\n")
+		self.sink.write("; *************************************************\n")
 		if (material=="metal" or material=="Metal"):
 			self.write_gcode_comment("Material set to metal")
 			self.set_nozzle_size(.6, comment=False)
@@ -541,7 +617,7 @@ class ExtruderTurtle:
 		print("layer height set to: " +str(round(layer_height,4)))
 		if (comment and self.out_file!=False):
 			self.write_gcode_comment("Layer height set to: " +str(round(layer_height,4)))
-			self.out_file.write("; *************************************************\n")
+			self.sink.write("; *************************************************\n")
 
 	def get_layer_height(self):
 		return self.layer_height
@@ -595,10 +671,10 @@ class ExtruderTurtle:
 		self.do(self.M104s.format(s=temp))
 
 	def draw_print_bed(self):
-		point1 = rs.AddPoint(-self.x_size/2, -self.y_size/2,0)
-		point2 = rs.AddPoint(-self.x_size/2, self.y_size/2,0)
-		point3 = rs.AddPoint(self.x_size/2, self.y_size/2,0)
-		point4 = rs.AddPoint(self.x_size/2, -self.y_size/2,0)
+		point1 = gb.AddPoint(-self.x_size/2, -self.y_size/2,0)
+		point2 = gb.AddPoint(-self.x_size/2, self.y_size/2,0)
+		point3 = gb.AddPoint(self.x_size/2, self.y_size/2,0)
+		point4 = gb.AddPoint(self.x_size/2, -self.y_size/2,0)
 		points = (point1, point2, point3, point4)
 		return rs.AddSrfPt(points)
 
@@ -613,75 +689,9 @@ class ExtruderTurtle:
 
 	###################################################################
 	# Turtle functions
+	# (pen, yaw/pitch/roll, headings and positions come from FrameTurtle)
 	###################################################################
 
-	def penup(self):
-		self.pen = False
-
-	def pen_up(self):
-		self.pen = False
-	
-	def pendown(self):
-		self.pen = True
-
-	def pen_down(self):
-		self.pen = True
-
-	def yaw(self, angle):
-		theta = self.convert_angle(angle)
-		new_forward = [math.cos(theta)*self.forward_vec[i] + math.sin(theta)*self.left_vec[i] for i in range(3)]
-		new_left = [math.cos(theta)*self.left_vec[i] - math.sin(theta)*self.forward_vec[i] for i in range(3)]
-		self.forward_vec = new_forward
-		self.left_vec = new_left
-
-	def pitch(self, angle):
-		theta = self.convert_angle(angle)
-		new_forward = [math.cos(theta)*self.forward_vec[i] + math.sin(theta)*self.up_vec[i] for i in range(3)]
-		new_up = [math.cos(theta)*self.up_vec[i] - math.sin(theta)*self.forward_vec[i] for i in range(3)]
-		self.forward_vec = new_forward
-		self.up_vec = new_up
-
-	def roll(self, angle):
-		theta = self.convert_angle(angle)
-		new_left = [math.cos(theta)*self.left_vec[i] + math.sin(theta)*self.up_vec[i] for i in range(3)]
-		new_up = [math.cos(theta)*self.up_vec[i] - math.sin(theta)*self.left_vec[i] for i in range(3)]
-		self.left_vec = new_left
-		self.up_vec = new_up
-
-	def left(self, angle):
-		self.yaw(angle)
-
-	def right(self, angle):
-		self.yaw(-angle)
-
-	def pitch_up(self, angle):
-		self.pitch(angle)
-
-	def pitch_down(self, angle):
-		self.pitch(-angle)
-
-	def roll_left(self, angle):
-		self.roll(-angle)
-
-	def roll_right(self, angle):
-		self.roll(angle)
-
-	def set_heading(self, yaw, pitch=0, roll=0):
-		self.forward_vec = [1, 0, 0]
-		self.left_vec = [0, 1, 0]
-		self.up_vec = [0, 0, 1]
-		self.yaw(yaw)
-		self.pitch(pitch)
-		self.roll(roll)
-
-	def set_angle(self, yaw, pitch=0, roll=0):
-		self.forward_vec = [1, 0, 0]
-		self.left_vec = [0, 1, 0]
-		self.up_vec = [0, 0, 1]
-		self.yaw(yaw)
-		self.pitch(pitch)
-		self.roll(roll)
-
 	def change_heading(self, yaw=0, pitch=0, roll=0):
 		self.set_heading(self.yaw + yaw, self.pitch + pitch, self.roll + roll)
 
@@ -714,31 +724,65 @@ class ExtruderTurtle:
 	def get_tube_color(self):
 		return self.tube_color[0],self.tube_color[1],self.tube_color[2]
 
-	def convert_angle(self, angle):
-		if self.use_degrees: return math.radians(angle)
-		return angle
-
 	def record_move(self, dx, dy, dz, de=0,r=0,g=0,b=0):
-	# generates the line that is used for turtle visualization
+	# records the move that is used for turtle visualization and path analysis
 		if self.track_history:
-			prev_point = self.prev_points[-1]
-			next_point = (prev_point[0]+dx, prev_point[1]+dy, prev_point[2]+dz) 
-			self.prev_points.append(next_point)
-			if self.pen: 
-				self.line_segs.append([self.prev_points[-2], self.prev_points[-1]])
-				self.extrusion_history.append(de)
-				self.speed_history.append(self.get_speed())
-				self.color_history.append(self.current_color)
-			else:
-				self.travel_line_segs.append([self.prev_points[-2], self.prev_points[-1]])
-				self.travel_speed_history.append(self.get_speed())
+			self.history.append(dx, dy, dz, de, self.speed, self.current_color, self.pen, self.current_extruder)
+
+	def get_history(self):
+		return self.history
+
+	# list versions of the move history, kept for older scripts
+	# these copy the history, use get_history() in new code
+	@property
+	def prev_points(self):
+		return list(self.history.points())
+
+	@property
+	def line_segs(self):
+		return [list(seg) for seg in self.history.print_segments()]
+
+	@property
+	def travel_line_segs(self):
+		return [list(seg) for seg in self.history.travel_segments()]
+
+	@property
+	def extrusion_history(self):
+		return self.history.print_extrusion()
+
+	@property
+	def speed_history(self):
+		return self.history.print_speeds()
+
+	@property
+	def travel_speed_history(self):
+		return self.history.travel_speeds()
+
+	@property
+	def color_history(self):
+		return self.history.print_colors()
+
+	@color_history.setter
+	def color_history(self, colors):
+		self.history.set_print_colors(colors)
 
 
 	def forward(self, distance):
-		extrusion = float(abs(distance) * self.extrude_rate)
 		dx = float(distance * self.forward_vec[0])
 		dy = float(distance * self.forward_vec[1])
 		dz = float(distance * self.forward_vec[2])
+		self.step(dx, dy, dz, abs(distance))
+
+	def forward_lift(self, distance, height):
+		dx = float(distance * self.forward_vec[0] + height * self.up_vec[0])
+		dy = float(distance * self.forward_vec[1] + height * self.up_vec[1])
+		dz = float(distance * self.forward_vec[2] + height * self.up_vec[2])
+		self.step(dx, dy, dz, math.sqrt(distance**2+height**2), True)
+
+	# move by dx, dy, dz and write it, extruding length * extrude_rate if the pen is down
+	# forward_lift travels (lifting=True) always write Z
+	def step(self, dx, dy, dz, length, lifting=False):
+		extrusion = float(length * self.extrude_rate)
 		self.x += dx
 		self.y += dy
 		self.z += dz
@@ -753,44 +797,17 @@ class ExtruderTurtle:
 		if self.pen:
 			if (dz_w==0.0):
 				# is there is no change in Z, don't write Z to file
-				self.do(self.G1xye.format(x=dx_w, y=dy_w, e=e_w))
+				self.do_move(gw.G1XYE, (dx_w, dy_w, e_w))
 			else:
-				self.do(self.G1xyze.format(x=dx_w, y=dy_w, z=dz_w, e=e_w))
+				self.do_move(gw.G1XYZE, (dx_w, dy_w, dz_w, e_w))
 		else:
 			# if (self.write_gcode==True):
 			# 	self.write_gcode_comment("travel")
-			if (dz_w==0.0):
+			if (dz_w==0.0 and not(lifting)):
 				# if there is no change in Z, don't write Z to file
-				self.do(self.G0xy.format(x=dx_w, y=dy_w))
+				self.do_move(gw.G0XY, (dx_w, dy_w))
 			else:
-				self.do(self.G0xyz.format(x=dx_w, y=dy_w, z=dz_w))
-
-	def forward_lift(self, distance, height):
-		extrusion = math.sqrt(distance**2+height**2) * self.extrude_rate
-		dx = float(distance * self.forward_vec[0] + height * self.up_vec[0])
-		dy = float(distance * self.forward_vec[1] + height * self.up_vec[1])
-		dz = float(distance * self.forward_vec[2] + height * self.up_vec[2])
-		self.x += float(dx)
-		self.y += float(dy)
-		self.z += float(dz)
-		dx_w = round(dx,4) 
-		dy_w = round(dy,4) 
-		dz_w = round(dz,4) 
-		e_w = round(extrusion,4) 
-		if (dx_w==0.0 and dy_w==0.0 and dz_w==0.0):
-			# if this is an erroneous command, don't write it to file
-			return
-		self.record_move(dx, dy, dz, de=extrusion)
-		if self.pen:
-			if (dz_w==0.0):
-				# is there is no change in Z, don't write Z to file
-				self.do(self.G1xye.format(x=dx_w, y=dy_w, e=e_w))
-			else:
-				self.do(self.G1xyze.format(x=dx_w, y=dy_w, z=dz_w, e=e_w))
-		else:
-			# if (self.write_gcode==True):
-			# 	self.write_gcode_comment("travel")
-			self.do(self.G0xyz.format(x=dx_w, y=dy_w, z=dz_w))
+				self.do_move(gw.G0XYZ, (dx_w, dy_w, dz_w))
 
 	def forward_lift_gcode_only(self, distance, height):
 		extrusion = math.sqrt(distance**2+height**2) * self.extrude_rate
@@ -805,13 +822,7 @@ class ExtruderTurtle:
 			# if this is an erroneous command, don't write it to file
 			return
 
-		self.do(self.G0xyz.format(x=dx_w, y=dy_w, z=dz_w))
-
-	def backward(self, distance):
-		self.forward(-float(distance))
-
-	def back(self, distance):
-		self.forward(-float(distance))
+		self.do_move(gw.G0XYZ, (dx_w, dy_w, dz_w))
 
 	def lift(self, height):
 		# write layer number comment 
@@ -828,11 +839,7 @@ class ExtruderTurtle:
 		# if (self.pen==False):
 		# 	if (self.write_gcode==True):
 		# 		self.write_gcode_comment("travel")
-		self.do(self.G1z.format(z=dz_w)) # note normal layer changes shouldn't count as travels
-
-	# set position from a rhinoscript point
-	def set_position_point(self,point):
-		self.set_position(point.X, point.Y, point.Z)
+		self.do_move(gw.G1Z, (dz_w,)) # note normal layer changes shouldn't count as travels
 
 	# set position from optional x, y, and z values
 	def set_position(self, x=False, y=False, z=False, point=False):
@@ -851,18 +858,7 @@ class ExtruderTurtle:
 		self.z = float(z)
 		distance = math.sqrt(dx*dx+dy*dy+dz*dz)
 		extrusion = abs(distance) * self.extrude_rate
-
-		#!!!! NOTE should keep track of all angles, right now only yaw
-		if (distance!=0):
-			yaw = math.degrees(math.acos(dx/distance))
-			self.left(-self.get_yaw()) # return to 0 heading
-		else:
-			yaw = 0.0
-
-		if (dy>0):
-			self.left(float(yaw))
-		else:
-			self.left(-float(yaw))
+		self.head_along(dx, dy, distance)
 
 		dx_w = round(dx,4) 
 		dy_w = round(dy,4) 
@@ -875,47 +871,96 @@ class ExtruderTurtle:
 		if self.pen:
 			if (dz_w==0.0):
 				# is there is no change in Z, don't write Z to file
-				self.do(self.G1xye.format(x=dx_w, y=dy_w, e=e_w))
+				self.do_move(gw.G1XYE, (dx_w, dy_w, e_w))
 			else:
-				self.do(self.G1xyze.format(x=dx_w, y=dy_w, z=dz_w, e=e_w))
+				self.do_move(gw.G1XYZE, (dx_w, dy_w, dz_w, e_w))
 		else:
 			# if (self.write_gcode==True):
 			# 	self.write_gcode_comment("travel")
 			if (dz_w==0.0):
 				# is there is no change in Z, don't write Z to file
-				self.do(self.G0xy.format(x=dx_w, y=dy_w))
+				self.do_move(gw.G0XY, (dx_w, dy_w))
 			else:
 				#print(dz_w)
-				self.do(self.G0xyz.format(x=dx_w, y=dy_w, z=dz_w))
+				self.do_move(gw.G0XYZ, (dx_w, dy_w, dz_w))
 		if (dz_w>=self.layer_height):
 			self.write_gcode_comment("LAYER:" +str(self.layer))
 			self.layer+=1
 
+	# follow a list of points in one pass, same output as calling set_position on each one
+	# points are rhinoscript points or (x, y, z) tuples
+	# pen_mask (optional) gives the pen state for each point (True = down)
+	# speeds (optional) gives the feedrate for each point, a G1 F line is written when it changes
+	# with follow_z=False the turtle stays at its current height
+	def follow_path(self, points, pen_mask=None, speeds=None, follow_z=True):
+		history = None
+		if self.track_history:
+			history = self.history
+		write = self.write_gcode
+		do_move = self.do_move
+		extrude_rate = self.extrude_rate
+		x0 = self.x
+		y0 = self.y
+		z0 = self.z
+		last_move = False
+		for i in range(len(points)):
+			point = points[i]
+			if isinstance(point, (tuple, list)):
+				x, y, z = point
+			else:
+				x = point.X
+				y = point.Y
+				z = point.Z
+			if not(follow_z): z = z0
+			if (pen_mask is not None): self.pen = bool(pen_mask[i])
+			if (speeds is not None and speeds[i]!=self.speed): self.set_speed(speeds[i])
+			dx = x-x0
+			dy = y-y0
+			dz = z-z0
+			x0 = float(x)
+			y0 = float(y)
+			z0 = float(z)
+			distance = math.sqrt(dx*dx+dy*dy+dz*dz)
+			extrusion = abs(distance) * extrude_rate
+			if (distance!=0):
+				last_move = (dx, dy, distance)
+			if (history is not None):
+				history.append(dx, dy, dz, extrusion, self.speed, self.current_color, self.pen, self.current_extruder)
+			dx_w = round(dx,4) 
+			dy_w = round(dy,4) 
+			dz_w = round(dz,4) 
+			if (dx_w==0 and dy_w==0 and dz_w==0):
+				# if this is an erroneous command, don't write it to file
+				continue
+			if write:
+				if self.pen:
+					if (dz_w==0.0):
+						do_move(gw.G1XYE, (dx_w, dy_w, round(extrusion,4)))
+					else:
+						do_move(gw.G1XYZE, (dx_w, dy_w, dz_w, round(extrusion,4)))
+				elif (dz_w==0.0):
+					do_move(gw.G0XY, (dx_w, dy_w))
+				else:
+					do_move(gw.G0XYZ, (dx_w, dy_w, dz_w))
+			if (dz_w>=self.layer_height):
+				self.write_gcode_comment("LAYER:" +str(self.layer))
+				self.layer+=1
+		self.x = x0
+		self.y = y0
+		self.z = z0
+		# only the last move that went somewhere sets the heading
+		if last_move:
+			self.head_along(last_move[0], last_move[1], last_move[2])
+
 	def set_state(self, t2):
 		self.x = t2.getX()
 		self.y = t2.getY()
 		self.z = t2.getZ()
 		self.set_heading(t2.get_yaw(),t2.get_pitch(),t2.get_roll())
 
-	def get_pen(self):
-		return self.pen
-
-	# get position as a rhinoscript point
-	def get_position(self):
-		return rs.CreatePoint(self.x, self.y, self.z)
-
-		# get position as a rhinoscript point
+	# get absolute position as a rhinoscript point
 	def get_absolute_position(self):
-		return rs.CreatePoint(self.x+self.starting_x, self.y+self.starting_y, self.z)
-
-	def getX(self):
-		return self.x
-
-	def getY(self):
-		return self.y
-	
-	def getZ(self):
-		return self.z
+		return gb.CreatePoint(self.x+self.starting_x, self.y+self.starting_y, self.z)
 
 	def get_absoluteX(self):
 		return (self.x + self.starting_x);
@@ -927,83 +972,90 @@ class ExtruderTurtle:
 		return (self.z + self.starting_z);
 
 
-	def get_vector(self):
-		x, y, z = self.forward_vec
-		return rs.CreatePoint(x,y,z)
-
-	def get_heading(self):
-		return self.get_yaw()
-
-	def get_yaw(self):
-		x, y, z = self.forward_vec
-		net_yaw = math.atan2(y, x)
-		if self.use_degrees: return math.degrees(net_yaw)
-		return net_yaw
-	
-	def get_pitch(self):
-		x, y, z = self.forward_vec
-		r = math.sqrt(x**2+y**2)
-		net_pitch = math.atan2(z, r)
-		if self.use_degrees: return math.degrees(net_pitch)
-		return self.net_pitch
-   
-	def get_roll(self):
-		net_yaw = self.get_yaw()
-		net_pitch = self.get_pitch()
-		if self.use_degrees:
-			net_yaw = math.radians(net_yaw)
-			net_pitch = math.radians(net_pitch)
-		left_vech = [-math.sin(net_yaw), math.cos(net_yaw), 0]
-		up_vech = [-math.sin(net_pitch)*math.cos(net_yaw), -math.sin(net_pitch)*math.sin(net_yaw), math.cos(net_pitch)]
-		y = sum([self.left_vec[i]*up_vech[i] for i in range(3)])
-		x = sum([self.left_vec[i]*left_vech[i] for i in range(3)])
-		net_roll = math.atan2(y, x)
-		if self.use_degrees: return math.degrees(net_roll)
-		return self.net_roll
-
 	def draw_turtle(self):
 		new_forward = [math.cos(math.radians(90))*self.forward_vec[i] + math.sin(math.radians(90))*self.left_vec[i] for i in range(3)]
 		dx = 2 * new_forward[0]
 		dy = 2 * new_forward[1]
 		dz = 2 * new_forward[2]
-		point1 = rs.AddPoint(self.getX()+dx, self.getY()+dy, self.getZ()+dz)
+		point1 = gb.AddPoint(self.getX()+dx, self.getY()+dy, self.getZ()+dz)
 		new_forward = [math.cos(math.radians(-90))*self.forward_vec[i] + math.sin(math.radians(-90))*self.left_vec[i] for i in range(3)]
 		dx = 2 * new_forward[0]
 		dy = 2 * new_forward[1]
 		dz = 2 * new_forward[2]
-		point2 = rs.AddPoint(self.getX()+dx, self.getY()+dy, self.getZ()+dz)
+		point2 = gb.AddPoint(self.getX()+dx, self.getY()+dy, self.getZ()+dz)
 		dx = 5 * self.forward_vec[0]
 		dy = 5 * self.forward_vec[1]
 		dz = 5 * self.forward_vec[2]
-		point3 = rs.AddPoint(self.getX()+dx, self.getY()+dy, self.getZ()+dz)
+		point3 = gb.AddPoint(self.getX()+dx, self.getY()+dy, self.getZ()+dz)
 		points = (point1, point2, point3)
 		surface = rs.AddSrfPt(points)
 		return surface
 
+	# geometry for the printed path is only made when one of these is called
+	# get_polylines and get_preview make one object per pen-down run,
+	# iter_lines and iter_points make lines and points one chunk at a time
+
+	# one polyline for each contiguous pen-down run
+	# with a tolerance, points closer than that to the simplified run are dropped
+	def get_polylines(self, tolerance=0):
+		polylines = []
+		for run in self.history.print_runs():
+			if (tolerance>0):
+				run = pt.simplify(run, tolerance)
+			polylines.append(gb.AddPolyline(run))
+		return polylines
+
+	# lightweight preview of the path, decimated to tolerance (in mm)
+	def get_preview(self, tolerance=0.5):
+		return self.get_polylines(tolerance)
+
+	# yields lists of at most chunk_size lines, one line per pen-down move
+	def iter_lines(self, chunk_size=1000):
+		h = self.history
+		for rows in pt.chunks(h.print_rows, chunk_size):
+			lines = []
+			for row in rows:
+				if (not(h.is_zero(row))):
+					start, end = h.segment(row)
+					lines.append(gb.AddLine(start, end))
+			if lines:
+				yield lines
+
+	# yields lists of start points of the pen-down moves
+	def iter_points(self, chunk_size=1000):
+		h = self.history
+		for rows in pt.chunks(h.print_rows, chunk_size):
+			points = []
+			for row in rows:
+				if (not(h.is_zero(row))):
+					points.append(gb.CreatePoint(h.x[row-1],h.y[row-1],h.z[row-1]))
+			if points:
+				yield points
+
 	def get_lines(self):
 		lines = []
-		for l in self.line_segs:
-			if (l[0] != l[1]):
-				lines.append(rs.AddLine(l[0], l[1]))
+		for chunk in self.iter_lines():
+			lines.extend(chunk)
 		return lines
 
 	def get_dual_lines(self):
+		h = self.history
 		lines0 = []
 		lines1 = []
-		for l,c in zip(self.line_segs, self.color_history):
-			if (c==(100,100,100)):
-				if (l[0] != l[1]):
-					lines0.append(rs.AddLine(l[0], l[1]))
+		for row in h.print_rows:
+			if (h.is_zero(row)):
+				continue
+			start, end = h.segment(row)
+			if (h.color(row)==(100,100,100)):
+				lines0.append(gb.AddLine(start, end))
 			else:
-				if (l[0] != l[1]):
-					lines1.append(rs.AddLine(l[0], l[1]))
+				lines1.append(gb.AddLine(start, end))
 		return lines0, lines1
 
 	def get_points(self):
 		points = []
-		for l in self.line_segs:
-			if (l[0] != l[1]):
-				points.append(rs.CreatePoint(l[0][0],l[0][1],l[0][2]))
+		for chunk in self.iter_points():
+			points.extend(chunk)
 		return points
 
 
@@ -1061,29 +1113,29 @@ class ExtruderTurtle:
 			self.record_move(dx,0,0) # record position change for turtle
 			x = x + self.starting_x
 
-		self.out_file.write("; ************** Tool change sequence begin **********\n")
-		self.out_file.write("; First, a forward lift to move away from part: \n")
+		self.sink.write("; ************** Tool change sequence begin **********\n")
+		self.sink.write("; First, a forward lift to move away from part: \n")
 		self.forward_lift_gcode_only(3,2)
 
-		self.out_file.write("T" + str(self.current_extruder) + " ; swap extruder\n")
+		self.sink.write("T" + str(self.current_extruder) + " ; swap extruder\n")
 		# move up in Z. Then:
 		# using abosolute positioning, move next tool to position of current tool
-		self.out_file.write("G0 Z3 ; move up in Z\n")
-		self.out_file.write("G0 F6000 ; set speed to fast for tool swap\n")
-		self.out_file.write("G90 ; absolute positioning\n")
-		self.out_file.write("G0 X" + str(x) + 
+		self.sink.write("G0 Z3 ; move up in Z\n")
+		self.sink.write("G0 F6000 ; set speed to fast for tool swap\n")
+		self.sink.write("G90 ; absolute positioning\n")
+		self.sink.write("G0 X" + str(x) + 
 							  " Y" +str(y) + 
 							  " Z" +str(round(self.get_absoluteZ(),4)+3.0)+
 							  " F6000 ; move to correct position\n")
-		self.out_file.write("G91 ; relative positioning\n")
-		self.out_file.write("G0 Z-3 ; move down in Z\n")
+		self.sink.write("G91 ; relative positioning\n")
+		self.sink.write("G0 Z-3 ; move down in Z\n")
 		
 		# if (self.current_extruder==1):
 		# 	# print("extra extrusion")
 		# 	self.out_file.write("G1 E20 ; extrude a little\n")
 
-		self.out_file.write("G0 F1000 ; reset speed\n")
-		self.out_file.write("; ************** Tool change sequence end ************\n")
+		self.sink.write("G0 F1000 ; reset speed\n")
+		self.sink.write("; ************** Tool change sequence end ************\n")
 
 		# # for lutum printer, need to do a manual adjustment
 		# if (self.printer=="lutum"):
@@ -1123,6 +1175,7 @@ class ExtruderTurtle:
 			t1.out_filename = self.out_filename
 			t1.write_gcode = True
 			t1.out_file = self.out_file
+			t1.sink = self.sink
 		else:
 			print("Warning! Creating subturtle. No gcode file is associated with the primary turtle!")
 
@@ -1136,8 +1189,8 @@ class ExtruderTurtle:
 		t.current_turtle = n
 
 		if (self.out_file):
-			self.out_file.write("; ************** Tool change sequence ***************\n")
-			self.out_file.write("T" + str(n) + "\n")
+			self.sink.write("; ************** Tool change sequence ***************\n")
+			self.sink.write("T" + str(n) + "\n")
 
 		# move turtle to the position of previous turtle
 		self.write_gcode = False #turn off gcode writing
@@ -1154,16 +1207,16 @@ class ExtruderTurtle:
 
 		# move up in Z. Then:
 		# using abosolute positioning, move next tool to position of current tool
-		self.out_file.write("G0 Z3 ; move up in Z\n")
-		self.out_file.write("G90 ; absolute positioning\n")
-		self.out_file.write("G0 X" + str(round(t.get_absoluteX(),4)) + 
+		self.sink.write("G0 Z3 ; move up in Z\n")
+		self.sink.write("G90 ; absolute positioning\n")
+		self.sink.write("G0 X" + str(round(t.get_absoluteX(),4)) + 
 							  " Y" +str(round(t.get_absoluteY(),4)) + 
 							  " Z" +str(round(t.get_absoluteZ(),4)+3.0)+
 							  " F5000; move to correct position\n")
-		self.out_file.write("G91 ; relative positioning\n")
-		self.out_file.write("G0 Z-3 ; move down in Z\n")
-		self.out_file.write("G0 F1000 ; reset speed\n")
-		self.out_file.write("; ************** Tool change sequence end ***********\n")
+		self.sink.write("G91 ; relative positioning\n")
+		self.sink.write("G0 Z-3 ; move down in Z\n")
+		self.sink.write("G0 F1000 ; reset speed\n")
+		self.sink.write("; ************** Tool change sequence end ***********\n")
 		
 		if (n==1):
 			self.extrude(10)
@@ -1172,22 +1225,22 @@ class ExtruderTurtle:
 		if (self.printer=="lutum"):
 			# move 100mm above print bed, wait 10 seconds, and prime new nozzle
 			# allows for manual tool head change
-			self.out_file.write("G1 F3000 \n") #set speed to 3000
-			self.out_file.write("G1 Z100 ; lift nozzle up 100mm \n")
+			self.sink.write("G1 F3000 \n") #set speed to 3000
+			self.sink.write("G1 Z100 ; lift nozzle up 100mm \n")
 			self.pause(10000)
 			if (prime):
-				self.out_file.write("G1 E50 ; prime new nozzle. \n")
+				self.sink.write("G1 E50 ; prime new nozzle. \n")
 		
 			# move between one nozzle and another if in double_nozzle mode
 			if (mode=="double_nozzle"):
 				distance_btwn_nozzles = 44.8 #in mm
 				# adjust position for distance between extruders
 				if (n==0):
-					self.out_file.write("G1 X" +str(distance_btwn_nozzles)  + " Y0.0 ; adjusting for distance between T1 and T0 \n")
+					self.sink.write("G1 X" +str(distance_btwn_nozzles)  + " Y0.0 ; adjusting for distance between T1 and T0 \n")
 				elif (n==1):
-					self.out_file.write("G1 X-" +str(distance_btwn_nozzles) + " Y0.0  ; adjusting for distance between T0 and T1 \n")
+					self.sink.write("G1 X-" +str(distance_btwn_nozzles) + " Y0.0  ; adjusting for distance between T0 and T1 \n")
 			
-			self.out_file.write("G1 Z-100 ; move nozzle back down \n")
+			self.sink.write("G1 Z-100 ; move nozzle back down \n")
 		
 			self.set_speed(self.get_speed()) #set speed to appropriate speed
 
@@ -1196,24 +1249,14 @@ class ExtruderTurtle:
 	# Path and analysis functions
 	###################################################################
 
-	def length_of_path(self):
-		total_distance = 0
-		total_time = 0
-		i=0
-		for l in self.line_segs:
-			if (l[0] != l[1]):
-				segment_distance = rs.Distance(l[0],l[1])
-				total_distance = total_distance + segment_distance
-				total_time = total_time + segment_distance/self.speed_history[i]
-			i+=1
-		i=0
-		for l in self.travel_line_segs:
-			if (l[0] != l[1]):
-				segment_distance = rs.Distance(l[0],l[1])
-				total_distance = total_distance + segment_distance
-				total_time = total_time + segment_distance/self.travel_speed_history[i]
-			i+=1
+	# running totals kept by the move history, see move_history.PathStats
+	def get_path_stats(self):
+		return self.history.stats
 
+	def length_of_path(self):
+		stats = self.history.stats
+		total_distance = stats.total_distance()
+		total_time = stats.total_time()
 		total_time = total_time+self.ellapsed_time/60
 		#print("total distance of path in mm: " +str(round(total_distance,2)))
 		return total_distance, total_time
@@ -1276,9 +1319,9 @@ class ExtruderTurtle:
 		return get_lines(self)
 
 	def get_last_line(self):
-		i = len(self.line_segs)
-		print(self.line_segs[i-1])
-		return rs.AddLine(self.line_segs[i-1][0],self.line_segs[i-1][1])
+		start, end = self.history.segment(self.history.print_rows[-1])
+		print([start, end])
+		return gb.AddLine(start, end)
 
 	def get_solids(self,resolution=10):
 		solids = []
@@ -1286,22 +1329,23 @@ class ExtruderTurtle:
 		box_height = self.layer_height+self.layer_height/4
 		skip = int(resolution) # the higher the number the lower the resolution. Will help render
 		colors = []
-		#print("line segments: " +str(len(self.line_segs)))
-		for l in range(0,len(self.line_segs)-skip,skip):
-			l0 = self.line_segs[l]
-			l1 = self.line_segs[l+skip]
-			color = self.color_history[l]
-			if (l0 != l1 and l1):
+		h = self.history
+		rows = h.print_rows
+		for l in range(0,len(rows)-skip,skip):
+			l0 = h.segment(rows[l])
+			l1 = h.segment(rows[l+skip])
+			color = h.color(rows[l])
+			if (l0 != l1):
 				#points for first side of rect
-				point0 = rs.CreatePoint(l0[0])
-				point1 = rs.CreatePoint(l0[0][0],l0[0][1],l0[0][2]+box_height)
-				point2 = rs.CreatePoint(l1[0][0],l1[0][1],l1[0][2]+box_height)
-				point3 = rs.CreatePoint(l1[0])
+				point0 = gb.CreatePoint(l0[0])
+				point1 = gb.CreatePoint(l0[0][0],l0[0][1],l0[0][2]+box_height)
+				point2 = gb.CreatePoint(l1[0][0],l1[0][1],l1[0][2]+box_height)
+				point3 = gb.CreatePoint(l1[0])
 				lines = []
-				lines.append(rs.AddLine(point0,point1))
-				lines.append(rs.AddLine(point1,point2))
-				lines.append(rs.AddLine(point2,point3))
-				lines.append(rs.AddLine(point3,point0))
+				lines.append(gb.AddLine(point0,point1))
+				lines.append(gb.AddLine(point1,point2))
+				lines.append(gb.AddLine(point2,point3))
+				lines.append(gb.AddLine(point3,point0))
 				surface = rs.AddPlanarSrf(lines)
 				if (surface):
 					n = rs.SurfaceNormal(surface,[0,0])
@@ -1315,12 +1359,14 @@ class ExtruderTurtle:
 		return solids, colors
 
 	def get_colors(self):
-		return self.color_history
+		return self.history.print_colors()
 
 	def diffuse_colors(self, diffusion=50.0, look_ahead=1000):
+		h = self.history
+		color_history = h.print_colors()
 		color_history_new = []
 		total_distance = 0
-		current_color = self.color_history[0]
+		current_color = color_history[0]
 		r = float(current_color[0])
 		g = float(current_color[1])
 		b = float(current_color[2])
@@ -1329,14 +1375,14 @@ class ExtruderTurtle:
 		g_diff = 0.0
 		b_diff = 0.0
 		i = 1
-		for l in self.line_segs:
-			if (l[0] != l[1]):
-				total_distance = total_distance + rs.Distance(l[0],l[1])
-				if (i<len(self.color_history)):
-					if (i+look_ahead>=len(self.color_history)):
-						next_color = self.color_history[i]
+		for row in h.print_rows:
+			if (not(h.is_zero(row))):
+				total_distance = total_distance + h.length(row)
+				if (i<len(color_history)):
+					if (i+look_ahead>=len(color_history)):
+						next_color = color_history[i]
 					else:
-						next_color = self.color_history[i+look_ahead] # look past current location for next color to account for backward color diffusion
+						next_color = color_history[i+look_ahead] # look past current location for next color to account for backward color diffusion
 
 
 			if (total_distance >= 50):
@@ -1381,7 +1427,7 @@ class ExtruderTurtle:
 			color_history_new.append((int(r),int(g),int(b)))
 			i+=1
 
-		self.color_history = color_history_new
+		h.set_print_colors(color_history_new)
 
 		return color_history_new
 
@@ -1397,30 +1443,30 @@ class ExtruderTurtle:
 		
 		# rectangle next to tube for background for information
 		tube_distance = self.tube_color_history[len(self.tube_color_history)-1][3]
-		p0 = rs.CreatePoint(startingX,0,startingZ)
-		p1 = rs.CreatePoint(startingX+100,0,startingZ)
-		p2 = rs.CreatePoint(startingX+100,0,startingZ+tube_distance)
-		p3 = rs.CreatePoint(startingX,0,startingZ+tube_distance)
-		rectangle = rs.AddPolyline([p0,p1,p2,p3,p0])
+		p0 = gb.CreatePoint(startingX,0,startingZ)
+		p1 = gb.CreatePoint(startingX+100,0,startingZ)
+		p2 = gb.CreatePoint(startingX+100,0,startingZ+tube_distance)
+		p3 = gb.CreatePoint(startingX,0,startingZ+tube_distance)
+		rectangle = gb.AddPolyline([p0,p1,p2,p3,p0])
 		#surface = rs.AddPlanarSrf(rectangle)
 		#tube_shapes=surface
 		#colors.append((200,200,200))
 
 		# tube
-		p0 = rs.CreatePoint(startingX,0,startingZ)
-		p1 = rs.CreatePoint(startingX+50,0,startingZ)
-		p2 = rs.CreatePoint(startingX+50,0,startingZ+250)
-		p3 = rs.CreatePoint(startingX,0,startingZ+250)
-		rectangle = rs.AddPolyline([p0,p1,p2,p3,p0])
+		p0 = gb.CreatePoint(startingX,0,startingZ)
+		p1 = gb.CreatePoint(startingX+50,0,startingZ)
+		p2 = gb.CreatePoint(startingX+50,0,startingZ+250)
+		p3 = gb.CreatePoint(startingX,0,startingZ+250)
+		rectangle = gb.AddPolyline([p0,p1,p2,p3,p0])
 		surface = rs.AddPlanarSrf(rectangle)
 		colors.append((255,255,255))
 		tube_shapes = surface
 		# nozzle
-		p0 = rs.CreatePoint(startingX+20,0,startingZ)
-		p1 = rs.CreatePoint(startingX+30,0,startingZ)
-		p2 = rs.CreatePoint(startingX+30,0,startingZ-10)
-		p3 = rs.CreatePoint(startingX+20,0,startingZ-10)
-		rectangle = rs.AddPolyline([p0,p1,p2,p3,p0])
+		p0 = gb.CreatePoint(startingX+20,0,startingZ)
+		p1 = gb.CreatePoint(startingX+30,0,startingZ)
+		p2 = gb.CreatePoint(startingX+30,0,startingZ-10)
+		p3 = gb.CreatePoint(startingX+20,0,startingZ-10)
+		rectangle = gb.AddPolyline([p0,p1,p2,p3,p0])
 		surface = rs.AddPlanarSrf(rectangle)
 		tube_shapes = tube_shapes + surface
 		colors.append((255,255,255))
@@ -1436,23 +1482,23 @@ class ExtruderTurtle:
 			tube_distance = self.tube_color_history[i][3]
 			volume = self.tube_color_history[i][4]
 			m = self.tube_color_history[i][5] #mass
-			p0 = rs.CreatePoint(startingX,0,startingZ+tube_distance0)
-			p1 = rs.CreatePoint(startingX+50,0,startingZ+tube_distance0)
-			p2 = rs.CreatePoint(startingX+50,0,startingZ+tube_distance)
-			p3 = rs.CreatePoint(startingX,0,startingZ+tube_distance)
+			p0 = gb.CreatePoint(startingX,0,startingZ+tube_distance0)
+			p1 = gb.CreatePoint(startingX+50,0,startingZ+tube_distance0)
+			p2 = gb.CreatePoint(startingX+50,0,startingZ+tube_distance)
+			p3 = gb.CreatePoint(startingX,0,startingZ+tube_distance)
 			if (tube_distance>0.0):
 				z_diff = tube_distance-tube_distance0
 				z_text = startingZ+tube_distance0+z_diff/2
-				rectangle = rs.AddPolyline([p0,p1,p2,p3,p0])
+				rectangle = gb.AddPolyline([p0,p1,p2,p3,p0])
 				surface = rs.AddPlanarSrf(rectangle)
 				tube_shapes = tube_shapes + surface
 				color = r0,g0,b0
 				colors.append(color)
 				if (tube_distance >0.0):
-					tp = rs.CreatePoint(startingX+25,0,z_text)
+					tp = gb.CreatePoint(startingX+25,0,z_text)
 					text.append((str(int(tube_distance-tube_distance0))+ " , " + str(int(tube_distance)) +" mm",tp))
 
-					tp = rs.CreatePoint(startingX+60,0,z_text)
+					tp = gb.CreatePoint(startingX+60,0,z_text)
 					text.append((str(int(m-m0))+" g ",tp))
 				tube_distance0 = tube_distance
 			r0 = r
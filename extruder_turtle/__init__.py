@@ -5,4 +5,5 @@ __title__ = 'extruder-turtle'
 __version__ = '0.1'
 __location__ = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
 
-from .ExtruderTurtle import ExtruderTurtle
\ No newline at end of file
+from .ExtruderTurtle import ExtruderTurtle
+from .frame_turtle import FrameTurtle
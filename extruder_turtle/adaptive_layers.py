@@ -0,0 +1,101 @@
+import math
+
+# variable layer heights, planned once for the whole shape
+# the distance between two layers is measured along the surface, so where the wall leans
+# out (or in) by an angle a from vertical, a layer dz tall is dz/cos(a) apart on the wall
+# each layer gets dz = layer_height*cos(a), which keeps that distance at layer_height
+# the lean comes either from the face normals of a mesh, or from how fast the cross sections
+# grow and move between closely spaced sections (for shapes that aren't meshes)
+# both are turned into a profile: the tallest layer allowed in each thin band of z,
+# layer_heights then walks up the profile and returns every slicing plane at once
+# no Rhino calls, slicer_utilities gathers the mesh or the sections
+
+# faces flatter than this (|normal z|) are tops and bottoms, they don't limit the layer height
+FLAT = 0.999
+# bands of the profile are layer_height/BANDS tall
+BANDS = 4
+
+
+# the band of the profile that z falls in
+def band(profile, z):
+	zmin, step, allowed = profile
+	k = int(math.floor((z-zmin)/step))
+	return min(max(k, 0), len(allowed)-1)
+
+# the tallest layer allowed anywhere between z0 and z1
+def allowed_height(profile, z0, z1):
+	allowed = profile[2]
+	return min(allowed[band(profile, z0):band(profile, z1)+1])
+
+# profile from the faces of a mesh, vertices are (x, y, z) and faces lists of vertex indexes
+# (3 or 4, like rs.MeshFaceVertices), returns (zmin, band height, tallest layer of each band)
+def face_profile(vertices, faces, layer_height, min_height):
+	zs = [v[2] for v in vertices]
+	zmin = min(zs)
+	step = layer_height/float(BANDS)
+	count = int(math.floor((max(zs)-zmin)/step))+1
+	allowed = [float(layer_height)]*count
+	for f in faces:
+		a = vertices[f[0]]
+		b = vertices[f[1]]
+		c = vertices[f[2]]
+		ux = b[0]-a[0]
+		uy = b[1]-a[1]
+		uz = b[2]-a[2]
+		vx = c[0]-a[0]
+		vy = c[1]-a[1]
+		vz = c[2]-a[2]
+		nx = uy*vz-uz*vy
+		ny = uz*vx-ux*vz
+		nz = ux*vy-uy*vx
+		length = math.sqrt(nx*nx+ny*ny+nz*nz)
+		if (length==0):
+			continue
+		cos_lean = math.sqrt(nx*nx+ny*ny)/length
+		if (cos_lean<1-FLAT):
+			continue
+		h = max(layer_height*cos_lean, min_height)
+		low = min(a[2], b[2], c[2])
+		high = max(a[2], b[2], c[2])
+		for k in range(int((low-zmin)/step), min(int((high-zmin)/step), count-1)+1):
+			if (h<allowed[k]):
+				allowed[k] = h
+	return (zmin, step, allowed)
+
+# profile from cross sections, a list of (z, area, (x, y) centroid) sorted by z, about
+# layer_height/BANDS apart, the wall moves sideways by the change in the radius of a circle
+# of the same area plus the shift of the centroid
+def section_profile(sections, layer_height, min_height):
+	zmin = sections[0][0]
+	step = layer_height/float(BANDS)
+	count = int(math.floor((sections[-1][0]-zmin)/step))+1
+	allowed = [float(layer_height)]*count
+	for i in range(1, len(sections)):
+		z0, area0, center0 = sections[i-1]
+		z1, area1, center1 = sections[i]
+		dz = z1-z0
+		if (dz<=0):
+			continue
+		dr = abs(math.sqrt(area1/math.pi)-math.sqrt(area0/math.pi))
+		dr += math.sqrt((center1[0]-center0[0])**2+(center1[1]-center0[1])**2)
+		h = max(layer_height/math.sqrt(1+(dr/dz)**2), min_height)
+		for k in range(int((z0-zmin)/step), min(int((z1-zmin)/step), count-1)+1):
+			if (h<allowed[k]):
+				allowed[k] = h
+	return (zmin, step, allowed)
+
+# heights of the slicing planes from zmin to zmax
+# each layer is as tall as the profile allows over its whole height
+# the last plane is at zmax, like mesh_slicer.plane_heights (slicing moves both ends
+# END_OFFSET inside the shape)
+def layer_heights(profile, zmin, zmax, min_height):
+	heights = []
+	z = zmin
+	while (z<=zmax-min_height/2.0):
+		heights.append(z)
+		h = allowed_height(profile, z, z)
+		h = max(allowed_height(profile, z, z+h), min_height)
+		z += h
+	if (not(heights) or heights[-1]<zmax):
+		heights.append(zmax)
+	return heights
@@ -0,0 +1,14 @@
+import os
+import sys
+
+# benchmarks for the turtle, the slicers and the G-code tools
+# shapes makes synthetic parametric inputs (cylinders, flared vases, multi-branch towers),
+# cases lists the entry points to time, runner runs them and saves or compares JSON baselines
+# the library modules import each other by name, so their folder goes on the path,
+# and the slicers import the extruder_turtle package, so its parent folder does too
+__location__ = os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir))
+for folder in (__location__, os.path.dirname(__location__)):
+	if (folder not in sys.path):
+		sys.path.append(folder)
+
+from .runner import run, save_baseline, load_baseline, compare
@@ -0,0 +1,103 @@
+import math
+from . import shapes
+
+# the entry points the benchmarks time
+# each case is (name, uses_turtle, function), the function gets a fresh turtle
+# (or None when the case doesn't use one), the moves and G-code bytes are read from the turtle,
+# cases without one return (moves, bytes) or the number of moves
+# the shapes are meshes, so every case runs in and out of Rhino (with the polyline geometry backend)
+
+
+def forward(t):
+	for i in range(20000):
+		t.forward(1.0)
+		t.right(1.0)
+
+def set_position(t):
+	for i in range(20000):
+		a = i*0.01
+		t.set_position(50*math.cos(a), 50*math.sin(a), i*0.001)
+
+def oscillating_circle(t):
+	import turtle_utilities as tu
+	for i in range(20):
+		tu.oscillating_circle(t, 100, 40, 3)
+
+def polar_rose(t):
+	import turtle_utilities as tu
+	for i in range(20):
+		tu.polar_rose(t, 100, 5, 3)
+		t.lift(t.get_layer_height())
+
+def slice_turtle_cylinder(t):
+	import slicer_utilities as su
+	su.slice_turtle(t, shapes.cylinder())
+
+def slice_turtle_towers(t):
+	import slicer_utilities as su
+	su.slice_turtle(t, shapes.towers())
+
+def weave_slice_turtle_vase(t):
+	import weave_slicer as ws
+	ws.weave_slice_turtle(t, shapes.flared_vase())
+
+def slice_even_walls_vase(t):
+	import weave_slicer as ws
+	ws.slice_even_walls(t, shapes.flared_vase())
+
+def slice_even_walls_towers(t):
+	import weave_slicer as ws
+	ws.slice_even_walls(t, shapes.towers())
+
+# G-code for the parsing cases, a spiral of short moves
+def sample_gcode(moves=50000):
+	lines = ["G91\n", "G1 F1000\n"]
+	for i in range(moves):
+		a = i*0.05
+		lines.append("G1 X%s Y%s E%s\n" % (round(-2*math.sin(a)*0.05, 4), round(2*math.cos(a)*0.05, 4), 0.005))
+		if (i%500==499):
+			lines.append("G1 Z0.2\n; LAYER\n")
+	return "".join(lines)
+
+def read_gcode(t):
+	import gcode_utilities as gu
+	text = sample_gcode()
+	moves = gu.read_gcode(text.splitlines(True), wait_for_relative=True)
+	moves.stats(15)
+	return len(moves), len(text)
+
+def parse_gcode(t):
+	import os
+	import tempfile
+	import gcode_utilities as gu
+	handle, filename = tempfile.mkstemp(suffix=".gcode")
+	os.close(handle)
+	text = sample_gcode()
+	file = open(filename, 'w')
+	file.write(text)
+	file.close()
+	try:
+		gu.parse_gcode(filename)
+	finally:
+		os.remove(filename)
+	return 50000, len(text)
+
+def slice_mesh_vase(t):
+	import mesh_slicer as ms
+	layers = ms.slice_mesh(shapes.flared_vase(segments=256, rings=256), 0.5)
+	return sum([len(points) for layer in layers for points, closed in layer])
+
+CASES = (
+	("forward", True, forward),
+	("set_position", True, set_position),
+	("oscillating_circle", True, oscillating_circle),
+	("polar_rose", True, polar_rose),
+	("slice_turtle_cylinder", True, slice_turtle_cylinder),
+	("slice_turtle_towers", True, slice_turtle_towers),
+	("weave_slice_turtle_vase", True, weave_slice_turtle_vase),
+	("slice_even_walls_vase", True, slice_even_walls_vase),
+	("slice_even_walls_towers", True, slice_even_walls_towers),
+	("parse_gcode", False, parse_gcode),
+	("read_gcode", False, read_gcode),
+	("slice_mesh_vase", False, slice_mesh_vase),
+)
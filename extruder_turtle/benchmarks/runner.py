@@ -0,0 +1,168 @@
+import gc
+import json
+import sys
+import time
+import rhino_calls as rc
+from . import cases
+
+# runs the benchmark cases and measures, for each one:
+# moves per second, G-code bytes per second, peak memory per move (where the Python
+# can trace allocations) and the number of rhinoscriptsyntax calls
+# results are dictionaries keyed by case name, saved as JSON baselines and compared between runs
+try:
+	import tracemalloc
+except ImportError:
+	tracemalloc = None
+
+# changes smaller than this fraction are reported as unchanged
+THRESHOLD = 0.05
+# the measures compare shows, and whether bigger is better
+MEASURES = (("moves_per_second", True), ("bytes_per_second", True), ("peak_bytes_per_move", False), ("rhino_calls", False))
+
+
+def rhino_available():
+	try:
+		import rhinoscriptsyntax
+	except ImportError:
+		return False
+	return True
+
+# a turtle set up for printer, writing its G-code to memory
+def make_turtle(printer):
+	import ExtruderTurtle as e
+	import gcode_writer as gw
+	t = e.ExtruderTurtle()
+	t.setup(printer=printer)
+	t.set_sink(gw.MemoryGcodeSink())
+	return t
+
+# calls the case function, returns (moves, bytes) from what it returned or from the turtle
+def call(function, t):
+	result = function(t)
+	moves = result
+	size = 0
+	if (isinstance(result, tuple)):
+		moves, size = result
+	if (t is not None):
+		size = len(t.get_sink().getvalue())
+		if (moves is None):
+			moves = len(t.get_history())
+	return moves or 0, size
+
+# runs one case and returns its measures
+# it is timed once, then run again with allocation tracing for the peak memory (when
+# tracemalloc is there and memory is True), tracing slows Python down too much to time it
+def measure(name, uses_turtle, function, printer="super", memory=True):
+	t = None
+	counter = rc.RhinoCallLog()
+	if (uses_turtle):
+		t = make_turtle(printer)
+	if (rhino_available()):
+		counter.install()
+	gc.collect()
+	start = time.time()
+	try:
+		moves, size = call(function, t)
+	finally:
+		seconds = max(time.time()-start, 1e-9)
+		counter.uninstall()
+	result = {"seconds": seconds, "moves": moves, "bytes": size,
+		"moves_per_second": moves/seconds, "bytes_per_second": size/seconds,
+		"peak_bytes_per_move": None, "rhino_calls": counter.calls}
+	if (memory and tracemalloc is not None and moves):
+		if (uses_turtle):
+			t = make_turtle(printer)
+		gc.collect()
+		tracemalloc.start()
+		try:
+			call(function, t)
+			peak = tracemalloc.get_traced_memory()[1]
+		finally:
+			tracemalloc.stop()
+		result["peak_bytes_per_move"] = peak/float(moves)
+	return result
+
+# runs the cases (all of them, or the ones named) and returns {name: measures}
+# Rhino calls are only counted in Rhino, elsewhere they are 0
+def run(names=None, printer="super", repeat=1, memory=True):
+	results = {}
+	for name, uses_turtle, function in cases.CASES:
+		if (names is not None and name not in names):
+			continue
+		# the fastest of repeat runs
+		best = None
+		for i in range(repeat):
+			result = measure(name, uses_turtle, function, printer, memory and i==0)
+			if (best is None or result["seconds"]<best["seconds"]):
+				best = result
+		results[name] = best
+		print(name + ": " +str(best["moves"]) + " moves in " +str(round(best["seconds"],3)) + " s, " +str(int(best["moves_per_second"])) + " moves/s, " +str(int(best["bytes_per_second"])) + " bytes/s, " +str(best["rhino_calls"]) + " Rhino calls")
+	return results
+
+def save_baseline(results, filename):
+	baseline = {"python": sys.version, "time": time.strftime("%Y-%m-%d %H:%M:%S"), "results": results}
+	file = open(filename, 'w')
+	try:
+		json.dump(baseline, file, indent=1, sort_keys=True)
+	finally:
+		file.close()
+
+def load_baseline(filename):
+	file = open(filename)
+	try:
+		return json.load(file)["results"]
+	finally:
+		file.close()
+
+# compares two sets of results (or baseline files), prints and returns the report lines
+# each measure shows the old and new values and the change, marked faster/slower past threshold
+def compare(old, new, threshold=THRESHOLD):
+	if not(isinstance(old, dict)):
+		old = load_baseline(old)
+	if not(isinstance(new, dict)):
+		new = load_baseline(new)
+	lines = []
+	for name in sorted(set(old)|set(new)):
+		if (name not in old or name not in new):
+			lines.append(name + ": only in the " +("new" if name in new else "old") + " results")
+			continue
+		for measure_name, bigger_is_better in MEASURES:
+			a = old[name].get(measure_name)
+			b = new[name].get(measure_name)
+			if (a is None or b is None):
+				continue
+			if (a==0):
+				change = 0.0 if b==0 else 1.0
+			else:
+				change = (b-a)/float(a)
+			if (abs(change)<threshold):
+				verdict = "unchanged"
+			elif ((change>0)==bigger_is_better):
+				verdict = "better"
+			else:
+				verdict = "worse"
+			lines.append(name + " " + measure_name + ": " +str(round(a,2)) + " -> " +str(round(b,2)) + " (" +str(round(change*100,1)) + "%, " + verdict + ")")
+	for line in lines:
+		print(line)
+	return lines
+
+# python -m benchmarks run [baseline.json] [case ...]
+# python -m benchmarks compare old.json new.json
+def main(argv):
+	if (len(argv)>=3 and argv[0]=="compare"):
+		compare(argv[1], argv[2])
+	elif (argv and argv[0]=="run"):
+		filename = None
+		names = None
+		rest = argv[1:]
+		if (rest and rest[0].endswith(".json")):
+			filename = rest[0]
+			rest = rest[1:]
+		if (rest):
+			names = rest
+		results = run(names)
+		if (filename):
+			save_baseline(results, filename)
+	else:
+		print("usage: python -m benchmarks run [baseline.json] [case ...]")
+		print("       python -m benchmarks compare old.json new.json")
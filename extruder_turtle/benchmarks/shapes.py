@@ -0,0 +1,59 @@
+import math
+import mesh_slicer as ms
+
+# synthetic shapes for the benchmarks, as mesh_slicer.TriangleMesh objects
+# so they slice the same way in and out of Rhino
+# a shape is a surface of revolution given by its radius at each height
+
+
+# closed mesh of a surface of revolution around (cx, cy), profile is a list of (radius, z)
+# from the bottom up, segments points around, with flat caps at the bottom and top
+def lathe(profile, segments=64, cx=0.0, cy=0.0):
+	vertices = []
+	faces = []
+	for r, z in profile:
+		for i in range(segments):
+			a = 2*math.pi*i/segments
+			vertices.append((cx+r*math.cos(a), cy+r*math.sin(a), z))
+	for j in range(len(profile)-1):
+		for i in range(segments):
+			a = j*segments+i
+			b = j*segments+(i+1)%segments
+			c = (j+1)*segments+(i+1)%segments
+			d = (j+1)*segments+i
+			faces.append((a, b, c))
+			faces.append((a, c, d))
+	bottom = len(vertices)
+	vertices.append((cx, cy, profile[0][1]))
+	top = len(vertices)
+	vertices.append((cx, cy, profile[-1][1]))
+	last = (len(profile)-1)*segments
+	for i in range(segments):
+		faces.append((bottom, (i+1)%segments, i))
+		faces.append((top, last+i, last+(i+1)%segments))
+	return vertices, faces
+
+def cylinder(radius=40.0, height=80.0, segments=64, rings=2):
+	profile = [(radius, height*j/(rings-1.0)) for j in range(rings)]
+	return ms.TriangleMesh(*lathe(profile, segments))
+
+# a vase that flares out from base_radius to top_radius, with a waist and a lip
+def flared_vase(base_radius=30.0, top_radius=60.0, height=120.0, segments=96, rings=48):
+	profile = []
+	for j in range(rings):
+		u = j/(rings-1.0)
+		r = base_radius+(top_radius-base_radius)*u*u-8.0*math.sin(math.pi*u)
+		profile.append((r, height*u))
+	return ms.TriangleMesh(*lathe(profile, segments))
+
+# count separate towers in a ring, every layer has count branches
+def towers(count=4, radius=15.0, spread=60.0, height=60.0, segments=48):
+	vertices = []
+	faces = []
+	for k in range(count):
+		a = 2*math.pi*k/count
+		v, f = lathe([(radius, 0.0), (radius*0.8, height)], segments, spread*math.cos(a), spread*math.sin(a))
+		start = len(vertices)
+		vertices.extend(v)
+		faces.extend([tuple([start+i for i in face]) for face in f])
+	return ms.TriangleMesh(vertices, faces)
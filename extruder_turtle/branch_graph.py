@@ -0,0 +1,108 @@
+import math
+import geometry_backend as gb
+import slice_cache as sc
+
+# which branch of the next layer continues each branch of a sliced shape
+# built once for the whole stack of slices, so the slicers look the answer up
+# instead of searching the next layer (with a random sample point) every time
+# branches are compared by their bounding boxes first, only branches whose boxes
+# overlap are measured, so each layer costs a few closest point calls per branch
+# all choices are made from fixed sample points, so the graph is always the same
+
+# branches are sampled at SAMPLES points, and compared at the SAMPLE_INDICES ones (away from the ends)
+SAMPLES = 20
+SAMPLE_INDICES = (2, 6, 10, 14, 18)
+
+# xy bounding box of a list of points, (xmin, ymin, xmax, ymax)
+def bounding_box(points):
+	xs = [p[0] for p in points]
+	ys = [p[1] for p in points]
+	return (min(xs), min(ys), max(xs), max(ys))
+
+def boxes_overlap(box0, box1, margin=0.0):
+	return (box0[0]-margin<=box1[2] and box1[0]-margin<=box0[2] and
+		box0[1]-margin<=box1[3] and box1[1]-margin<=box0[3])
+
+def box_center(box):
+	return ((box[0]+box[2])/2, (box[1]+box[3])/2)
+
+def branch_samples(curve):
+	points = sc.cache.divide(curve, SAMPLES)
+	return [points[i] for i in SAMPLE_INDICES if i<len(points)]
+
+# mean distance from the sample points to curve
+def branch_distance(samples, curve):
+	total = 0.0
+	for p in samples:
+		q = gb.EvaluateCurve(curve, gb.CurveClosestPoint(curve, p))
+		total += math.sqrt((q[0]-p[0])**2+(q[1]-p[1])**2+(q[2]-p[2])**2)
+	return total/len(samples)
+
+# indexes of next_slices, closest to curve first
+# branches with overlapping bounding boxes are ranked by measured distance,
+# the rest come after them, ranked by the distance between box centers
+# also returns the indexes whose boxes overlap
+def ranked_branches(curve, next_slices, boxes=None, margin=0.0):
+	samples = branch_samples(curve)
+	box = bounding_box(sc.cache.divide(curve, SAMPLES))
+	if (boxes is None):
+		boxes = [bounding_box(sc.cache.divide(c, SAMPLES)) for c in next_slices]
+	overlapping = [j for j in range(len(next_slices)) if boxes_overlap(box, boxes[j], margin)]
+	measured = sorted([(branch_distance(samples, next_slices[j]), j) for j in overlapping])
+	cx, cy = box_center(box)
+	rest = []
+	for j in range(len(next_slices)):
+		if (j not in overlapping):
+			x, y = box_center(boxes[j])
+			rest.append(((x-cx)**2+(y-cy)**2, j))
+	rest.sort()
+	return [j for d, j in measured]+[j for d, j in rest], overlapping
+
+
+class BranchGraph(object):
+
+	# shape_slices is a list of layers, each a list of branch curves (as from slice_shape)
+	# margin widens the bounding boxes when testing for overlap
+	def __init__(self, shape_slices, margin=0.0):
+		self.shape_slices = shape_slices
+		boxes = [[bounding_box(sc.cache.divide(curve, SAMPLES)) for curve in layer] for layer in shape_slices]
+		self.ranked = [] # ranked[i][k] = branches of layer i+1 for branch k of layer i, closest first
+		self.overlaps = [] # overlaps[i][k] = branches of layer i+1 that overlap branch k of layer i
+		self.below = [[[] for curve in layer] for layer in shape_slices] # below[i][j] = branches of layer i-1 that overlap and continue into branch j
+		for i in range(len(shape_slices)-1):
+			layer_ranked = []
+			layer_overlaps = []
+			for k in range(len(shape_slices[i])):
+				ranked, overlapping = ranked_branches(shape_slices[i][k], shape_slices[i+1], boxes[i+1], margin)
+				layer_ranked.append(ranked)
+				layer_overlaps.append(overlapping)
+				if (ranked and ranked[0] in overlapping):
+					self.below[i+1][ranked[0]].append(k)
+			self.ranked.append(layer_ranked)
+			self.overlaps.append(layer_overlaps)
+
+	# index of the branch in layer i+1 that continues branch k of layer i, -1 if there is none
+	def next_branch(self, i, k):
+		if (i>=len(self.ranked) or not(self.ranked[i][k])):
+			return -1
+		return self.ranked[i][k][0]
+
+	# all branches of layer i+1, closest to branch k of layer i first
+	def candidates(self, i, k):
+		if (i>=len(self.ranked)):
+			return []
+		return list(self.ranked[i][k])
+
+	# branches of layer i-1 that continue into branch j of layer i
+	def previous_branches(self, i, j):
+		return list(self.below[i][j])
+
+	# branches of layer i that overlap more than one branch above (the shape splits)
+	def splits(self, i):
+		if (i>=len(self.overlaps)):
+			return []
+		return [k for k in range(len(self.overlaps[i])) if len(self.overlaps[i][k])>1]
+
+	# branches of layer i that more than one branch below continues into (the shape merges)
+	def merges(self, i):
+		return [j for j in range(len(self.below[i])) if len(self.below[i][j])>1]
@@ -0,0 +1,274 @@
+import math
+import geometry_backend as gb
+
+# a turtle that only knows where it is and which way it is facing
+# position plus forward, left and up vectors, no history, no gcode and no printer settings
+# use it for the helper turtles that slicers and generators use for vector math
+# ExtruderTurtle builds on this class and adds extrusion, gcode and history
+
+# generators turn by the same few angles thousands of times,
+# so cos and sin are looked up by angle (in radians) instead of recomputed
+TRIG_CACHE_SIZE = 4096
+trig_cache = {}
+
+def cos_sin(theta):
+	cs = trig_cache.get(theta)
+	if (cs is None):
+		if (len(trig_cache)>=TRIG_CACHE_SIZE):
+			trig_cache.clear()
+		cs = trig_cache[theta] = (math.cos(theta), math.sin(theta))
+	return cs
+
+
+class FrameTurtle(object):
+	__slots__ = ('x', 'y', 'z', 'forward_vec', 'left_vec', 'up_vec', 'use_degrees', 'pen')
+
+	def __init__(self, x=0, y=0, z=0):
+		self.x = x
+		self.y = y
+		self.z = z
+		self.forward_vec = [1, 0, 0]
+		self.left_vec = [0, 1, 0]
+		self.up_vec = [0, 0, 1]
+		self.use_degrees = True
+		self.pen = True
+
+	###################################################################
+	# Pen, kept so helper turtles can be driven like ExtruderTurtles
+	###################################################################
+
+	def penup(self):
+		self.pen = False
+
+	def pen_up(self):
+		self.pen = False
+
+	def pendown(self):
+		self.pen = True
+
+	def pen_down(self):
+		self.pen = True
+
+	def get_pen(self):
+		return self.pen
+
+	###################################################################
+	# Orientation
+	###################################################################
+
+	def convert_angle(self, angle):
+		if self.use_degrees: return math.radians(angle)
+		return angle
+
+	# each rotation turns one pair of frame rows within their own plane
+	def yaw(self, angle):
+		c, s = cos_sin(self.convert_angle(angle))
+		f0, f1, f2 = self.forward_vec
+		l0, l1, l2 = self.left_vec
+		self.forward_vec = [c*f0 + s*l0, c*f1 + s*l1, c*f2 + s*l2]
+		self.left_vec = [c*l0 - s*f0, c*l1 - s*f1, c*l2 - s*f2]
+
+	def pitch(self, angle):
+		c, s = cos_sin(self.convert_angle(angle))
+		f0, f1, f2 = self.forward_vec
+		u0, u1, u2 = self.up_vec
+		self.forward_vec = [c*f0 + s*u0, c*f1 + s*u1, c*f2 + s*u2]
+		self.up_vec = [c*u0 - s*f0, c*u1 - s*f1, c*u2 - s*f2]
+
+	def roll(self, angle):
+		c, s = cos_sin(self.convert_angle(angle))
+		l0, l1, l2 = self.left_vec
+		u0, u1, u2 = self.up_vec
+		self.left_vec = [c*l0 + s*u0, c*l1 + s*u1, c*l2 + s*u2]
+		self.up_vec = [c*u0 - s*l0, c*u1 - s*l1, c*u2 - s*l2]
+
+	def left(self, angle):
+		self.yaw(angle)
+
+	def right(self, angle):
+		self.yaw(-angle)
+
+	def pitch_up(self, angle):
+		self.pitch(angle)
+
+	def pitch_down(self, angle):
+		self.pitch(-angle)
+
+	def roll_left(self, angle):
+		self.roll(-angle)
+
+	def roll_right(self, angle):
+		self.roll(angle)
+
+	def set_heading(self, yaw, pitch=0, roll=0):
+		self.forward_vec = [1, 0, 0]
+		self.left_vec = [0, 1, 0]
+		self.up_vec = [0, 0, 1]
+		self.yaw(yaw)
+		self.pitch(pitch)
+		self.roll(roll)
+
+	def set_angle(self, yaw, pitch=0, roll=0):
+		self.set_heading(yaw, pitch, roll)
+
+	# turn to face along a move of dx, dy (distance is the length of the whole move)
+	# one yaw by the difference between the current and the new heading
+	#!!!! NOTE should keep track of all angles, right now only yaw
+	def head_along(self, dx, dy, distance):
+		if (distance==0):
+			return
+		heading = math.acos(dx/distance)
+		if (dy<=0):
+			heading = -heading
+		theta = heading - math.atan2(self.forward_vec[1], self.forward_vec[0])
+		c = math.cos(theta)
+		s = math.sin(theta)
+		f0, f1, f2 = self.forward_vec
+		l0, l1, l2 = self.left_vec
+		self.forward_vec = [c*f0 + s*l0, c*f1 + s*l1, c*f2 + s*l2]
+		self.left_vec = [c*l0 - s*f0, c*l1 - s*f1, c*l2 - s*f2]
+
+	# orientation as a 3x3 matrix, rows are the forward, left and up vectors
+	def get_frame(self):
+		return [list(self.forward_vec), list(self.left_vec), list(self.up_vec)]
+
+	def set_frame(self, frame):
+		self.forward_vec = list(frame[0])
+		self.left_vec = list(frame[1])
+		self.up_vec = list(frame[2])
+
+	def get_vector(self):
+		x, y, z = self.forward_vec
+		return gb.CreatePoint(x,y,z)
+
+	def get_heading(self):
+		return self.get_yaw()
+
+	def get_yaw(self):
+		x, y, z = self.forward_vec
+		net_yaw = math.atan2(y, x)
+		if self.use_degrees: return math.degrees(net_yaw)
+		return net_yaw
+
+	def get_pitch(self):
+		x, y, z = self.forward_vec
+		r = math.sqrt(x**2+y**2)
+		net_pitch = math.atan2(z, r)
+		if self.use_degrees: return math.degrees(net_pitch)
+		return net_pitch
+
+	def get_roll(self):
+		net_yaw = self.get_yaw()
+		net_pitch = self.get_pitch()
+		if self.use_degrees:
+			net_yaw = math.radians(net_yaw)
+			net_pitch = math.radians(net_pitch)
+		left_vech = [-math.sin(net_yaw), math.cos(net_yaw), 0]
+		up_vech = [-math.sin(net_pitch)*math.cos(net_yaw), -math.sin(net_pitch)*math.sin(net_yaw), math.cos(net_pitch)]
+		y = sum([self.left_vec[i]*up_vech[i] for i in range(3)])
+		x = sum([self.left_vec[i]*left_vech[i] for i in range(3)])
+		net_roll = math.atan2(y, x)
+		if self.use_degrees: return math.degrees(net_roll)
+		return net_roll
+
+	###################################################################
+	# Movement
+	###################################################################
+
+	def forward(self, distance):
+		self.x += float(distance * self.forward_vec[0])
+		self.y += float(distance * self.forward_vec[1])
+		self.z += float(distance * self.forward_vec[2])
+
+	def backward(self, distance):
+		self.forward(-float(distance))
+
+	def back(self, distance):
+		self.forward(-float(distance))
+
+	def forward_lift(self, distance, height):
+		self.x += float(distance * self.forward_vec[0] + height * self.up_vec[0])
+		self.y += float(distance * self.forward_vec[1] + height * self.up_vec[1])
+		self.z += float(distance * self.forward_vec[2] + height * self.up_vec[2])
+
+	def lift(self, height):
+		self.z += float(height)
+
+	# move by dx, dy, dz, length is the distance covered (used for extrusion)
+	# lifting is True for forward_lift style moves
+	# turn_sequence calls this once per step, ExtruderTurtle also writes the move
+	def step(self, dx, dy, dz, length, lifting=False):
+		self.x += dx
+		self.y += dy
+		self.z += dz
+
+	# turn by angles[i] and then go forward distances[i], for every i
+	# distances (and heights) can also be one number used for every step
+	# with heights, each step is a forward_lift(distance, height) instead of a forward(distance)
+	# with turn_first=False each step moves first and then turns
+	# same result as calling left() and forward() in a loop, without the per call overhead
+	def turn_sequence(self, angles, distances, heights=None, turn_first=True):
+		n = len(angles)
+		if not(isinstance(distances, (list, tuple))):
+			distances = [distances]*n
+		lifting = heights is not None
+		if (lifting and not(isinstance(heights, (list, tuple)))):
+			heights = [heights]*n
+		convert = self.use_degrees
+		step = self.step
+		f0, f1, f2 = self.forward_vec
+		l0, l1, l2 = self.left_vec
+		u0, u1, u2 = self.up_vec
+		for i in range(n):
+			if (turn_first):
+				theta = angles[i]
+				if convert: theta = math.radians(theta)
+				c, s = cos_sin(theta)
+				f0, f1, f2, l0, l1, l2 = c*f0 + s*l0, c*f1 + s*l1, c*f2 + s*l2, c*l0 - s*f0, c*l1 - s*f1, c*l2 - s*f2
+			d = distances[i]
+			if (lifting):
+				h = heights[i]
+				step(float(d*f0 + h*u0), float(d*f1 + h*u1), float(d*f2 + h*u2), math.sqrt(d**2+h**2), True)
+			else:
+				step(float(d*f0), float(d*f1), float(d*f2), abs(d))
+			if not(turn_first):
+				theta = angles[i]
+				if convert: theta = math.radians(theta)
+				c, s = cos_sin(theta)
+				f0, f1, f2, l0, l1, l2 = c*f0 + s*l0, c*f1 + s*l1, c*f2 + s*l2, c*l0 - s*f0, c*l1 - s*f1, c*l2 - s*f2
+		self.forward_vec = [f0, f1, f2]
+		self.left_vec = [l0, l1, l2]
+
+	# set position from a rhinoscript point
+	def set_position_point(self, point):
+		self.set_position(point.X, point.Y, point.Z)
+
+	# set position from optional x, y, and z values
+	def set_position(self, x=False, y=False, z=False, point=False):
+		if x is False: x = self.x
+		if y is False: y = self.y
+		if z is False: z = self.z
+		if (point):
+			x = point.X
+			y = point.Y
+			z = point.Z
+		dx = x-self.x
+		dy = y-self.y
+		dz = z-self.z
+		self.x = float(x)
+		self.y = float(y)
+		self.z = float(z)
+		self.head_along(dx, dy, math.sqrt(dx*dx+dy*dy+dz*dz))
+
+	# get position as a rhinoscript point
+	def get_position(self):
+		return gb.CreatePoint(self.x, self.y, self.z)
+
+	def getX(self):
+		return self.x
+
+	def getY(self):
+		return self.y
+
+	def getZ(self):
+		return self.z
@@ -1,6 +1,6 @@
-import rhinoscriptsyntax as rs
 import math
-import csv
+from array import array
+import geometry_backend as gb
 
 def get_point_from_gcode_line(r, relative_position=True, current_z=0.0):
     #rs.CurrentView('Top')
@@ -26,76 +26,258 @@ def get_point_from_gcode_line(r, relative_position=True, current_z=0.0):
             break #stop searching if you hit a comment
     
     if (x is not False and y is not False):
-        return rs.CreatePoint(x,y,z)
+        return gb.CreatePoint(x,y,z)
     else:
         return False
 
+# streaming G-code reader
+# reads one line at a time, so large files from any slicer can be analyzed
+# moves are stored in columnar arrays and geometry is only made on request
+
+# move codes stored for each move
+G0 = 0 # travel
+G1 = 1 # print (or any linear move)
+G2 = 2 # clockwise arc, stored by its end point
+G3 = 3 # counterclockwise arc, stored by its end point
+MOVE_CODES = {'G0': G0, 'G00': G0, 'G1': G1, 'G01': G1, 'G2': G2, 'G02': G2, 'G3': G3, 'G03': G3}
+
+# splits a G-code line into (command, {letter: value}), comments removed
+# returns (False, False) for empty and comment-only lines
+def parse_gcode_line(line):
+    comment = line.find(';')
+    if (comment>=0):
+        line = line[:comment]
+    words = line.split()
+    if (not(words)):
+        return False, False
+    command = words[0].upper()
+    params = {}
+    for word in words[1:]:
+        try:
+            params[word[0].upper()] = float(word[1:])
+        except ValueError:
+            pass # flags with no value, like the X in "M84 X Y"
+    return command, params
+
+
+# moves read from a G-code file
+# row 0 is the starting point, row i is the move from row i-1 to row i
+# x, y, z are absolute positions, e is the extrusion of the move,
+# feedrate in mm/minute, tool is the active T number, line is the line number in the file
+# other commands (G4 dwell, T tool changes, M codes) are kept in events as (line, command, params)
+class GcodeMoves(object):
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.code = array('B', [G0])
+        self.x = array('d', [x])
+        self.y = array('d', [y])
+        self.z = array('d', [z])
+        self.e = array('f', [0.0])
+        self.feedrate = array('f', [0.0])
+        self.tool = array('B', [0])
+        self.line = array('l', [0])
+        self.events = []
+        self.dwell_time = 0.0 # seconds, from G4 commands
+
+    def __len__(self):
+        return len(self.x)-1
+
+    def append(self, code, x, y, z, e, feedrate, tool, line):
+        self.code.append(code)
+        self.x.append(x)
+        self.y.append(y)
+        self.z.append(z)
+        self.e.append(e)
+        self.feedrate.append(feedrate)
+        self.tool.append(tool)
+        self.line.append(line)
+
+    def point(self, row):
+        return (self.x[row], self.y[row], self.z[row])
+
+    def segment(self, row):
+        return (self.x[row-1], self.y[row-1], self.z[row-1]), (self.x[row], self.y[row], self.z[row])
+
+    def length(self, row):
+        dx = self.x[row]-self.x[row-1]
+        dy = self.y[row]-self.y[row-1]
+        dz = self.z[row]-self.z[row-1]
+        return math.sqrt(dx*dx+dy*dy+dz*dz)
+
+    def rows(self, code=None):
+        if (code is None):
+            return range(1, len(self.x))
+        codes = self.code
+        return [row for row in range(1, len(self.x)) if codes[row]==code]
+
+    # rows of all moves that are not G0 travels
+    def print_rows(self):
+        codes = self.code
+        return [row for row in range(1, len(self.x)) if codes[row]!=G0]
+
+    # totals computed from the arrays, no geometry is created
+    # travels longer than travel_length are counted as "true" travels
+    # times are in minutes
+    def stats(self, travel_length=15):
+        print_distance = 0.0
+        travel_distance = 0.0
+        print_time = 0.0
+        travel_time = 0.0
+        extrusion = 0.0
+        number_true_travels = 0
+        true_travel_length = 0.0
+        number_short_travels = 0
+        codes = self.code
+        feedrate = self.feedrate
+        for row in range(1, len(self.x)):
+            distance = self.length(row)
+            if (feedrate[row]>0):
+                time = distance/feedrate[row]
+            else:
+                time = 0.0
+            if (codes[row]==G0):
+                if (distance==0):
+                    continue
+                travel_distance += distance
+                travel_time += time
+                if (distance>travel_length):
+                    number_true_travels += 1
+                    true_travel_length += distance
+                else:
+                    number_short_travels += 1
+            else:
+                print_distance += distance
+                print_time += time
+                extrusion += self.e[row]
+        return {
+            'moves': len(self),
+            'print_distance': print_distance,
+            'travel_distance': travel_distance,
+            'print_time': print_time,
+            'travel_time': travel_time,
+            'dwell_time': self.dwell_time/60.0,
+            'extrusion': extrusion,
+            'number_true_travels': number_true_travels,
+            'true_travel_length': true_travel_length,
+            'number_short_travels': number_short_travels,
+        }
+
+    ###################################################################
+    # geometry, only built when asked for
+    ###################################################################
+
+    # one Rhino polyline per move, for the given rows (all moves if None)
+    # only moves longer than longer_than are included, so zero length moves are skipped
+    def get_lines(self, rows=None, longer_than=0):
+        if (rows is None):
+            rows = self.rows()
+        lines = []
+        for row in rows:
+            if (self.length(row)<=longer_than):
+                continue
+            start, end = self.segment(row)
+            lines.append(gb.AddPolyline([start, end]))
+        return lines
+
+    def get_print_lines(self):
+        return self.get_lines(self.print_rows())
+
+    def get_travel_lines(self, longer_than=0):
+        return self.get_lines(self.rows(G0), longer_than)
+
+
+# reads G-code from a file name, an open file or any iterable of lines
+# positions start in absolute mode (G90) and follow G90/G91 after that,
+# extrusion is relative after M83 or G91 and absolute after M82 or G90
+# with wait_for_relative=True everything before the first G91 is skipped
+# (the header of a file written by ExtruderTurtle)
+def read_gcode(source, wait_for_relative=False):
+    if (isinstance(source, str)):
+        f = open(source)
+        try:
+            return read_gcode(f, wait_for_relative)
+        finally:
+            f.close()
+    moves = GcodeMoves()
+    relative = False
+    relative_e = False
+    waiting = wait_for_relative
+    x = 0.0
+    y = 0.0
+    z = 0.0
+    last_e = 0.0
+    feedrate = 0.0
+    tool = 0
+    move_codes = MOVE_CODES
+    line_number = 0
+    for text in source:
+        line_number += 1
+        command, params = parse_gcode_line(text)
+        if (command is False):
+            continue
+        if (waiting):
+            if (command=='G91'):
+                waiting = False
+                relative = True
+                relative_e = True
+            continue
+        code = move_codes.get(command)
+        if (code is not None):
+            if ('F' in params):
+                feedrate = params['F']
+            if (relative):
+                x += params.get('X', 0.0)
+                y += params.get('Y', 0.0)
+                z += params.get('Z', 0.0)
+            else:
+                x = params.get('X', x)
+                y = params.get('Y', y)
+                z = params.get('Z', z)
+            e = 0.0
+            if ('E' in params):
+                if (relative_e):
+                    e = params['E']
+                else:
+                    e = params['E']-last_e
+                    last_e = params['E']
+            if ('X' in params or 'Y' in params or 'Z' in params or e!=0):
+                moves.append(code, x, y, z, e, feedrate, tool, line_number)
+        elif (command=='G91'):
+            relative = True
+            relative_e = True
+        elif (command=='G90'):
+            relative = False
+            relative_e = False
+        elif (command=='M83'):
+            relative_e = True
+        elif (command=='M82'):
+            relative_e = False
+        elif (command=='G92'):
+            if ('E' in params):
+                last_e = params['E']
+            x = params.get('X', x)
+            y = params.get('Y', y)
+            z = params.get('Z', z)
+        else:
+            if (command=='G4'):
+                # P is milliseconds, S is seconds
+                moves.dwell_time += params.get('P', 0.0)/1000.0 + params.get('S', 0.0)
+            elif (command[0]=='T' and command[1:].isdigit()):
+                tool = int(command[1:])
+            moves.events.append((line_number, command, params))
+    return moves
+
+
 def parse_gcode(file, relative_position=True, travel_length=15):
-    print_points = []
-    print_lines = []
-    travel_points = []
-    travel_lines = []
-    true_travel_lines = []
-    number_true_travels = 0
-    true_travel_length = 0.0
-    number_all_travels = 0
-    relative_position_flag = relative_position
-
-    with open(file) as file:
-        reader = csv.reader(file)
-        i = 0
-        previous_point = rs.CreatePoint(0.0,0.0,0.0)
-        print_points.append(previous_point)
-        current_z = 0
-        for row in reader:
-            i= i+1
-            if (len(row)>=1): 
-                r = row[0].split()
-                # if you are parsing a relative position gcode file,
-                # wait for relative position command before parsing
-                if (relative_position and relative_position_flag):
-                    print("relative position")
-                    if (r[0]=='G91'):
-                        relative_position_flag=False 
-                elif (r[0]=='G1'): # normal printing command
-                    point = get_point_from_gcode_line(r,relative_position,current_z)
-                    if (point!=False):
-                        if (relative_position):
-                            point = point+previous_point
-                        else:
-                            if (point.Z>0):
-                                current_z =point.Z
-                        try:
-                            current_line = rs.AddPolyline([previous_point,point])
-                        except:
-                            print ("error adding line at row: " +str(i))
-                        print_lines.append(current_line)
-                        previous_point = point
-
-                elif (r[0]=='G0'): # travel command
-                    point = get_point_from_gcode_line(r,relative_position,current_z)
-                    if (point!=False):
-                        if (relative_position):
-                            point = point+previous_point
-                        else:
-                            if (point.Z>0):
-                                current_z =point.Z
-                        try:
-                            current_line = rs.AddPolyline([previous_point, point])
-                        except:
-                            print ("error adding line at row: " +str(i))
-                        section_length = rs.CurveLength(current_line)
-                        if (section_length>travel_length):
-                            number_true_travels +=1
-                            true_travel_lines.append(current_line)
-                            true_travel_length = true_travel_length+section_length
-                        else:
-                            number_all_travels +=1
-                        travel_lines.append(current_line)
-                        previous_point = point
-
-    file.close()
+    moves = read_gcode(file, wait_for_relative=relative_position)
+    stats = moves.stats(travel_length)
+    number_true_travels = stats['number_true_travels']
+    true_travel_length = stats['true_travel_length']
+    print_lines = moves.get_print_lines()
+    # the long travels are picked out of travel_lines, not added to the document again
+    travel_rows = [row for row in moves.rows(G0) if moves.length(row)>0]
+    travel_lines = moves.get_lines(travel_rows)
+    true_travel_lines = [travel_lines[k] for k in range(len(travel_rows)) if moves.length(travel_rows[k])>travel_length]
     print("The number of travels with a length of at least: " +str(travel_length) +" mm is: " +str(number_true_travels))
     print("The total length of these travels is: " +str(round(true_travel_length,0)))
     return print_lines, travel_lines, true_travel_lines, number_true_travels, true_travel_length
-
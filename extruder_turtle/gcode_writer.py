@@ -0,0 +1,718 @@
+import os
+import math
+import gzip
+import zlib
+import struct
+import polyline_tools as pt
+
+# G-code sinks used by ExtruderTurtle to write its output
+# the turtle hands moves to a sink as (code, values) tuples
+# sinks queue moves and raw text and format them in batches,
+# instead of formatting and writing one string per move
+
+# move codes and the line template for each code
+# values are passed in the order the template expects them
+G1XYZE = 0 # (x, y, z, e)
+G1XYE = 1  # (x, y, e)
+G0XYZ = 2  # (x, y, z)
+G0XY = 3   # (x, y)
+G1Z = 4    # (z,)
+G2XYIJE = 5 # (x, y, i, j, e) clockwise arc
+G3XYIJE = 6 # (x, y, i, j, e) counterclockwise arc
+
+MOVE_FORMATS = (
+	"G1 X%s Y%s Z%s E%s\n",
+	"G1 X%s Y%s E%s\n",
+	"G0 X%s Y%s Z%s\n",
+	"G0 X%s Y%s\n",
+	"G1 Z%s\n",
+	"G2 X%s Y%s I%s J%s E%s\n",
+	"G3 X%s Y%s I%s J%s E%s\n",
+)
+
+# turns a list of queued moves and raw strings into one block of text
+def format_batch(pending):
+	formats = MOVE_FORMATS
+	out = []
+	append = out.append
+	for item in pending:
+		if (item.__class__ is tuple):
+			append(formats[item[0]] % item[1])
+		else:
+			append(item)
+	return "".join(out)
+
+
+# base sink: queues moves and raw text until batch_size entries are waiting
+# subclasses decide what to do with each formatted block in emit()
+class GcodeSink(object):
+
+	def __init__(self, batch_size=4096):
+		self.batch_size = batch_size
+		self.pending = []
+		self.lines_written = 0
+		self.bytes_written = 0
+
+	# write raw G-code text exactly as given, newlines included
+	def write(self, text):
+		self.pending.append(text)
+		if (len(self.pending)>=self.batch_size):
+			self.flush_pending()
+
+	# queue one move, values is a tuple matching MOVE_FORMATS[code]
+	def move(self, code, values):
+		self.pending.append((code, values))
+		if (len(self.pending)>=self.batch_size):
+			self.flush_pending()
+
+	def flush_pending(self):
+		if (not(self.pending)):
+			return
+		text = format_batch(self.pending)
+		self.lines_written += len(self.pending)
+		self.bytes_written += len(text)
+		self.pending = []
+		self.emit(text)
+
+	def emit(self, text):
+		pass
+
+	def flush(self):
+		self.flush_pending()
+
+	def close(self):
+		self.flush()
+
+
+# keeps all output in memory as a list of formatted chunks
+class MemoryGcodeSink(GcodeSink):
+
+	def __init__(self, batch_size=4096):
+		GcodeSink.__init__(self, batch_size)
+		self.chunks = []
+
+	def emit(self, text):
+		self.chunks.append(text)
+
+	def getvalue(self):
+		self.flush_pending()
+		return "".join(self.chunks)
+
+
+# writes to a file, formatting and flushing every flush_lines lines
+class FileGcodeSink(GcodeSink):
+
+	def __init__(self, filename, flush_lines=4096, mode='w+'):
+		GcodeSink.__init__(self, flush_lines)
+		self.filename = filename
+		self.file = open(filename, mode)
+
+	def emit(self, text):
+		self.file.write(text)
+
+	def flush(self):
+		self.flush_pending()
+		self.file.flush()
+
+	def close(self):
+		if (self.file.closed):
+			return
+		self.flush_pending()
+		self.file.close()
+
+
+# writes gzip compressed G-code, compressing as it goes (read it back with gzip or convert_to_text)
+class GzipGcodeSink(FileGcodeSink):
+
+	def __init__(self, filename, flush_lines=4096, compresslevel=6):
+		GcodeSink.__init__(self, flush_lines)
+		self.filename = filename
+		self.file = gzip.open(filename, 'wb', compresslevel)
+
+	def emit(self, text):
+		if not(isinstance(text, bytes)):
+			text = text.encode('utf-8')
+		self.file.write(text)
+
+
+# binary G-code: compact records, compressed in blocks, written as the turtle runs
+# the file starts with BINARY_MAGIC and a metadata block holding all the text written before
+# the first move (the header comments and start sequence), then blocks of records:
+# a 4 byte big-endian length and the zlib compressed records
+# a move record is its code (with RECORD_NEGATIVE_ZERO and a mask byte if a value is -0.0)
+# followed by its values in 1/VALUE_SCALE mm, each one minus the same value of the previous move
+# with the same code in the block, as zigzag varints, a text record is RECORD_TEXT,
+# a varint length and the utf-8 text, so plain text comes back byte for byte
+BINARY_MAGIC = b"ETGB\x01"
+VALUE_SCALE = 10000
+RECORD_TEXT = 0x7f
+RECORD_NEGATIVE_ZERO = 0x80
+
+def write_varint(out, n):
+	while (n>=0x80):
+		out.append((n&0x7f)|0x80)
+		n >>= 7
+	out.append(n)
+
+def read_varint(data, i):
+	n = 0
+	shift = 0
+	while True:
+		b = data[i]
+		i += 1
+		n |= (b&0x7f)<<shift
+		if (b<0x80):
+			return n, i
+		shift += 7
+
+def write_text_record(out, text):
+	if not(isinstance(text, bytes)):
+		text = text.encode('utf-8')
+	out.append(RECORD_TEXT)
+	write_varint(out, len(text))
+	out.extend(bytearray(text))
+
+class BinaryGcodeSink(GcodeSink):
+
+	def __init__(self, filename, block_moves=4096, compresslevel=6):
+		GcodeSink.__init__(self, block_moves)
+		self.filename = filename
+		self.compresslevel = compresslevel
+		self.file = open(filename, 'wb')
+		self.file.write(BINARY_MAGIC)
+		self.metadata = [] # text before the first move
+		self.block = bytearray()
+		self.records = 0
+		self.previous = {} # code -> integer values of the last move with that code in the block
+
+	def write(self, text):
+		if (self.metadata is not None):
+			self.metadata.append(text)
+			return
+		write_text_record(self.block, text)
+		self.count_record()
+
+	def move(self, code, values):
+		if (self.metadata is not None):
+			self.write_metadata()
+		block = self.block
+		numbers = []
+		mask = 0
+		for k in range(len(values)):
+			v = values[k]
+			n = int(round(v*VALUE_SCALE))
+			if (n/float(VALUE_SCALE)!=v or v.__class__ is not float):
+				# not a multiple of 1/VALUE_SCALE, or not a float (3 is written "3", not "3.0"),
+				# keep it as text
+				write_text_record(block, MOVE_FORMATS[code] % values)
+				self.count_record()
+				return
+			if (n==0 and math.copysign(1.0, v)<0):
+				mask |= 1<<k
+			numbers.append(n)
+		if (mask):
+			block.append(code|RECORD_NEGATIVE_ZERO)
+			block.append(mask)
+		else:
+			block.append(code)
+		previous = self.previous.get(code)
+		for k in range(len(numbers)):
+			d = numbers[k]
+			if (previous is not None):
+				d -= previous[k]
+			if (d<0):
+				write_varint(block, -2*d-1)
+			else:
+				write_varint(block, 2*d)
+		self.previous[code] = numbers
+		self.count_record()
+
+	def write_metadata(self):
+		text = "".join(self.metadata).encode('utf-8')
+		self.metadata = None
+		header = bytearray()
+		write_varint(header, len(text))
+		self.file.write(bytes(header))
+		self.file.write(text)
+
+	def count_record(self):
+		self.records += 1
+		self.lines_written += 1
+		if (self.records>=self.batch_size):
+			self.flush_pending()
+
+	def flush_pending(self):
+		if (self.metadata is not None or not(self.block)):
+			return
+		data = zlib.compress(bytes(self.block), self.compresslevel)
+		self.file.write(struct.pack(">I", len(data)))
+		self.file.write(data)
+		self.bytes_written += len(data)
+		self.block = bytearray()
+		self.records = 0
+		self.previous = {}
+
+	def flush(self):
+		self.flush_pending()
+		self.file.flush()
+
+	def close(self):
+		if (self.file.closed):
+			return
+		if (self.metadata is not None):
+			self.write_metadata()
+		self.flush_pending()
+		self.file.close()
+
+
+# number of values each move code takes
+VALUE_COUNTS = tuple([f.count("%s") for f in MOVE_FORMATS])
+
+# the text of a binary G-code file, one chunk for the metadata and one for each block
+# raises ValueError if the file ends part way through its header or a block
+def read_binary(filename):
+	file = open(filename, 'rb')
+	try:
+		if (file.read(len(BINARY_MAGIC))!=BINARY_MAGIC):
+			raise ValueError("not a binary G-code file: " +str(filename))
+		# metadata length, read a byte at a time up to the end of the varint
+		header = bytearray()
+		while True:
+			b = bytearray(file.read(1))
+			if not(b):
+				raise ValueError("truncated binary G-code file, no metadata: " +str(filename))
+			header.extend(b)
+			if (b[0]<0x80):
+				break
+		length = read_varint(header, 0)[0]
+		yield read_exactly(file, length, filename).decode('utf-8')
+		# only a clean end of file between blocks ends the file
+		while True:
+			size = file.read(4)
+			if not(size):
+				break
+			if (len(size)<4):
+				raise ValueError("truncated binary G-code file, partial block length: " +str(filename))
+			data = bytearray(zlib.decompress(read_exactly(file, struct.unpack(">I", size)[0], filename)))
+			yield decode_block(data)
+	finally:
+		file.close()
+
+# the next length bytes of file, ValueError if it ends before them
+def read_exactly(file, length, filename):
+	data = file.read(length)
+	if (len(data)<length):
+		raise ValueError("truncated binary G-code file: " +str(filename))
+	return data
+
+# the text of one block of records
+def decode_block(data):
+	pending = []
+	previous = {}
+	i = 0
+	while (i<len(data)):
+		code = data[i]
+		i += 1
+		if (code==RECORD_TEXT):
+			length, i = read_varint(data, i)
+			pending.append(bytes(data[i:i+length]).decode('utf-8'))
+			i += length
+			continue
+		mask = 0
+		if (code&RECORD_NEGATIVE_ZERO):
+			code &= ~RECORD_NEGATIVE_ZERO
+			mask = data[i]
+			i += 1
+		last = previous.get(code)
+		numbers = []
+		for k in range(VALUE_COUNTS[code]):
+			n, i = read_varint(data, i)
+			if (n&1):
+				n = -(n+1)//2
+			else:
+				n = n//2
+			if (last is not None):
+				n += last[k]
+			numbers.append(n)
+		previous[code] = numbers
+		values = []
+		for k in range(len(numbers)):
+			if (mask&(1<<k)):
+				values.append(-0.0)
+			else:
+				values.append(numbers[k]/float(VALUE_SCALE))
+		pending.append((code, tuple(values)))
+	return format_batch(pending)
+
+# writes a gzip or binary G-code file (as written by GzipGcodeSink or BinaryGcodeSink)
+# out as plain text G-code, for printers that need it, plain text is copied as it is
+def convert_to_text(filename, out_filename):
+	file = open(filename, 'rb')
+	start = file.read(len(BINARY_MAGIC))
+	file.close()
+	if (start==BINARY_MAGIC):
+		chunks = read_binary(filename)
+		mode = 'w'
+	elif (start[:2]==b"\x1f\x8b"):
+		chunks = gzip_chunks(filename)
+		mode = 'wb'
+	else:
+		chunks = plain_chunks(filename)
+		mode = 'wb'
+	out = open(out_filename, mode)
+	try:
+		for chunk in chunks:
+			out.write(chunk)
+	finally:
+		out.close()
+
+def gzip_chunks(filename, size=1<<20):
+	file = gzip.open(filename, 'rb')
+	try:
+		chunk = file.read(size)
+		while chunk:
+			yield chunk
+			chunk = file.read(size)
+	finally:
+		file.close()
+
+def plain_chunks(filename, size=1<<20):
+	file = open(filename, 'rb')
+	try:
+		chunk = file.read(size)
+		while chunk:
+			yield chunk
+			chunk = file.read(size)
+	finally:
+		file.close()
+
+# output formats for open_sink
+OUTPUT_FORMATS = ("gcode", "gzip", "binary")
+
+# a sink writing filename in output_format, "gcode" (plain text), "gzip" or "binary"
+def open_sink(filename, output_format="gcode"):
+	if (output_format=="gcode"):
+		return FileGcodeSink(filename)
+	elif (output_format=="gzip"):
+		return GzipGcodeSink(filename)
+	elif (output_format=="binary"):
+		return BinaryGcodeSink(filename)
+	raise ValueError("unknown output format: " +str(output_format))
+
+
+# discards everything, used when no G-code output is wanted
+class NullGcodeSink(GcodeSink):
+
+	def write(self, text):
+		pass
+
+	def move(self, code, values):
+		pass
+
+
+# base for sinks that rewrite the move stream on its way to another sink
+# moves are collected in runs by the subclass (see flush_run), text always ends a run
+# and is passed on unchanged, counts the moves coming in and going out
+class FilterSink(GcodeSink):
+
+	name = "filter"
+
+	def __init__(self, sink):
+		GcodeSink.__init__(self)
+		self.sink = sink
+		self.run = []
+		self.moves_in = 0
+		self.moves_out = 0
+
+	def write(self, text):
+		self.flush_run()
+		self.sink.write(text)
+
+	def move(self, code, values):
+		self.moves_in += 1
+		self.flush_run()
+		self.output(code, values)
+
+	# rewrite and pass on the moves collected so far
+	def flush_run(self):
+		self.run = []
+
+	def output(self, code, values):
+		self.moves_out += 1
+		self.sink.move(code, values)
+
+	def flush(self):
+		self.flush_run()
+		self.sink.flush()
+
+	def close(self):
+		self.flush_run()
+		self.sink.close()
+
+	# moves in per line out
+	def compression_ratio(self):
+		if (self.moves_out==0):
+			return 1.0
+		return self.moves_in/float(self.moves_out)
+
+	def report(self):
+		print(self.name + ": " +str(self.moves_in) + " moves in, " +str(self.moves_out) + " out, compression " +str(round(self.compression_ratio(),2)) + "x")
+		return self.compression_ratio()
+
+
+# circle through three points, (center x, center y, radius), None if they are in a line
+def circle_through(p0, p1, p2):
+	ax = p1[0]-p0[0]
+	ay = p1[1]-p0[1]
+	bx = p2[0]-p0[0]
+	by = p2[1]-p0[1]
+	d = 2*(ax*by-ay*bx)
+	if (d==0):
+		return None
+	a2 = ax*ax+ay*ay
+	b2 = bx*bx+by*by
+	cx = (by*a2-ay*b2)/d
+	cy = (ax*b2-bx*a2)/d
+	return (p0[0]+cx, p0[1]+cy, math.sqrt(cx*cx+cy*cy))
+
+# replaces runs of extruding moves that lie on a circular arc with one G2/G3 move
+# and passes everything else on to sink unchanged (relative coordinates, like the turtle)
+# the arc ends exactly where the run ended and extrudes exactly what the run extruded
+# a run has to stay within tolerance (mm) of the arc at its points and along its segments,
+# keep turning the same way, extrude at a steady rate, and sweep less than MAX_SWEEP degrees
+# use with t.set_arc_fitting(), which wraps the turtle's current sink
+class ArcFittingSink(FilterSink):
+
+	name = "arc fitting"
+
+	MIN_SEGMENTS = 3 # shortest run worth an arc
+	MAX_RADIUS = 1000.0 # flatter runs stay as lines
+	MAX_TURN = 45.0 # largest turn between two segments of an arc, in degrees
+	MAX_SWEEP = 300.0
+	RATE_TOLERANCE = 0.01 # how much the extrusion per mm may vary within an arc
+
+	def __init__(self, sink, tolerance=0.01):
+		FilterSink.__init__(self, sink)
+		self.tolerance = tolerance
+		self.arcs = 0
+
+	# G1XYE moves wait in the run, (x, y, e), to be fitted
+	def move(self, code, values):
+		self.moves_in += 1
+		if (code==G1XYE):
+			self.run.append(values)
+			if (len(self.run)>=self.batch_size):
+				self.flush_run()
+			return
+		self.flush_run()
+		self.output(code, values)
+
+	def flush_run(self):
+		run = self.run
+		self.run = []
+		i = 0
+		while (i<len(run)):
+			arc = self.fit_arc(run, i)
+			if (arc is None):
+				self.output(G1XYE, run[i])
+				i += 1
+				continue
+			end, cx, cy, turn = arc
+			x = 0.0
+			y = 0.0
+			e = 0.0
+			for k in range(i, end):
+				x += run[k][0]
+				y += run[k][1]
+				e += run[k][2]
+			if (turn>0):
+				code = G3XYIJE
+			else:
+				code = G2XYIJE
+			self.arcs += 1
+			self.output(code, (round(x,4), round(y,4), round(cx,4), round(cy,4), round(e,4)))
+			i = end
+
+	# the longest arc starting at move i of run, (end index, center x, center y, turn direction)
+	# the center is relative to the start of the arc, None if no arc of MIN_SEGMENTS moves fits
+	def fit_arc(self, run, i):
+		tolerance = self.tolerance
+		max_turn = math.radians(self.MAX_TURN)
+		points = [(0.0, 0.0)]
+		best = None
+		direction = 0
+		sweep = 0.0
+		rate = None
+		previous = None
+		for j in range(i, len(run)):
+			dx, dy, e = run[j]
+			length = math.sqrt(dx*dx+dy*dy)
+			if (length==0):
+				break
+			if (rate is None):
+				rate = e/length
+			elif (abs(e/length-rate)>self.RATE_TOLERANCE*max(abs(rate), 1e-9)):
+				break
+			if (previous is not None):
+				cross = previous[0]*dy-previous[1]*dx
+				dot = previous[0]*dx+previous[1]*dy
+				if (cross==0 or (direction!=0 and (cross>0)!=(direction>0))):
+					break
+				direction = cross
+				angle = math.atan2(abs(cross), dot)
+				if (angle>max_turn):
+					break
+				sweep += angle
+			previous = (dx, dy)
+			points.append((points[-1][0]+dx, points[-1][1]+dy))
+			if (len(points)<=self.MIN_SEGMENTS):
+				continue
+			circle = circle_through(points[0], points[len(points)//2], points[-1])
+			if (circle is None or not(self.fits(points, circle))):
+				break
+			# the sweep of an arc is its turn plus one segment's worth
+			if (math.degrees(sweep*(len(points)-1)/(len(points)-2.0))>=self.MAX_SWEEP):
+				break
+			best = (j+1, circle[0], circle[1], direction)
+		return best
+
+	# True if every point is within tolerance of the circle and no segment strays further from it
+	def fits(self, points, circle):
+		cx, cy, r = circle
+		if (r>self.MAX_RADIUS):
+			return False
+		for p in points:
+			if (abs(math.sqrt((p[0]-cx)**2+(p[1]-cy)**2)-r)>self.tolerance):
+				return False
+		for k in range(1, len(points)):
+			half = math.sqrt((points[k][0]-points[k-1][0])**2+(points[k][1]-points[k-1][1])**2)/2
+			if (half>r or r-math.sqrt(r*r-half*half)>self.tolerance):
+				return False
+		return True
+
+	def report(self):
+		print("arc fitting: " +str(self.arcs) + " arcs")
+		return FilterSink.report(self)
+
+
+# merges runs of moves that lie (nearly) on a line into fewer, longer moves
+# each run is simplified with Douglas-Peucker, no dropped point is further than
+# tolerance (mm) from the new path, the merged moves add up to the moves they replace,
+# so positions and extrusion are unchanged
+# a run only holds moves of the same kind (extruding or travel) at a steady extrusion
+# per mm, text (feedrate, extruder and layer lines) and Z only moves end it
+# use with t.set_decimation(), which wraps the turtle's current sink
+class DecimatingSink(FilterSink):
+
+	name = "decimation"
+	RATE_TOLERANCE = 0.01 # how much the extrusion per mm may vary within a run
+	# move code -> (pen down, index of dz, index of e) in its values
+	KINDS = {G1XYZE: (True, 2, 3), G1XYE: (True, None, 2), G0XYZ: (False, 2, None), G0XY: (False, None, None)}
+
+	def __init__(self, sink, tolerance=0.05):
+		FilterSink.__init__(self, sink)
+		self.tolerance = tolerance
+		self.pen = None # kind of the moves in the run
+		self.rate = None # extrusion per mm of the run
+
+	# moves wait in the run as (dx, dy, dz, e)
+	def move(self, code, values):
+		self.moves_in += 1
+		kind = self.KINDS.get(code)
+		if (kind is None):
+			self.flush_run()
+			self.output(code, values)
+			return
+		pen, z_index, e_index = kind
+		dz = 0.0
+		e = 0.0
+		if (z_index is not None):
+			dz = values[z_index]
+		if (e_index is not None):
+			e = values[e_index]
+		dx = values[0]
+		dy = values[1]
+		rate = None
+		length = math.sqrt(dx*dx+dy*dy+dz*dz)
+		if (pen and length>0):
+			rate = e/length
+		if (pen!=self.pen or (rate is not None and self.rate is not None and
+				abs(rate-self.rate)>self.RATE_TOLERANCE*max(abs(self.rate), 1e-9))):
+			self.flush_run()
+		self.pen = pen
+		if (rate is not None and self.rate is None):
+			self.rate = rate
+		self.run.append((dx, dy, dz, e))
+		if (len(self.run)>=self.batch_size):
+			self.flush_run()
+
+	def flush_run(self):
+		run = self.run
+		self.run = []
+		pen = self.pen
+		self.pen = None
+		self.rate = None
+		if not(run):
+			return
+		# positions along the run, with the index of the move that ends there
+		x = 0.0
+		y = 0.0
+		z = 0.0
+		points = [(0.0, 0.0, 0.0, 0)]
+		for i in range(len(run)):
+			x += run[i][0]
+			y += run[i][1]
+			z += run[i][2]
+			points.append((x, y, z, i+1))
+		kept = [p[3] for p in pt.simplify(points, self.tolerance)]
+		for k in range(1, len(kept)):
+			dx = 0.0
+			dy = 0.0
+			dz = 0.0
+			e = 0.0
+			for move in run[kept[k-1]:kept[k]]:
+				dx += move[0]
+				dy += move[1]
+				dz += move[2]
+				e += move[3]
+			dx = round(dx,4)
+			dy = round(dy,4)
+			dz = round(dz,4)
+			if (pen):
+				if (dz==0.0):
+					self.output(G1XYE, (dx, dy, round(e,4)))
+				else:
+					self.output(G1XYZE, (dx, dy, dz, round(e,4)))
+			elif (dz==0.0):
+				self.output(G0XY, (dx, dy))
+			else:
+				self.output(G0XYZ, (dx, dy, dz))
+
+
+# passes everything on unchanged and keeps a copy of it, as the turtle wrote it
+# (before any filter sinks further down), so it can be written again with replay
+class RecordingSink(FilterSink):
+
+	name = "record"
+
+	def __init__(self, sink):
+		FilterSink.__init__(self, sink)
+		self.items = [] # text, or (code, values) for moves
+
+	def write(self, text):
+		self.items.append(text)
+		self.sink.write(text)
+
+	def move(self, code, values):
+		self.moves_in += 1
+		self.moves_out += 1
+		self.items.append((code, values))
+		self.sink.move(code, values)
+
+# writes items kept by a RecordingSink to sink, in order
+def replay(items, sink):
+	for item in items:
+		if (isinstance(item, tuple)):
+			sink.move(item[0], item[1])
+		else:
+			sink.write(item)
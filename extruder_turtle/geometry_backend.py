@@ -0,0 +1,43 @@
+import os
+
+# picks where the slicers' curve functions come from, when this module is first imported
+# "rhino" uses rhinoscriptsyntax (Rhino curve ids), "polyline" uses polyline_geometry
+# (Polyline curves, no Rhino needed), set EXTRUDER_TURTLE_GEOMETRY to choose,
+# otherwise rhino is used when rhinoscriptsyntax can be imported
+# callers look the functions up on this module (gb.CurveLength(curve)),
+# so use_backend can also switch backends later on
+# the turtle and slicer modules only call rhinoscriptsyntax directly for things that need
+# a Rhino document (surfaces, contours, meshes from Rhino), so they import and run without it
+
+FUNCTIONS = ('DivideCurve', 'DivideCurveEquidistant', 'OffsetCurve', 'CurveArea', 'CurveAreaCentroid',
+	'CurveClosestPoint', 'EvaluateCurve', 'CurveLength', 'IsCurveClosed', 'PointInPlanarClosedCurve', 'AddPolyline',
+	'AddLine', 'AddCurve', 'CloseCurve', 'ReverseCurve', 'IsCurveClosable', 'CreatePoint', 'AddPoint',
+	'Distance', 'VectorSubtract', 'VectorAngle', 'IsMesh', 'IsPolyline', 'PolylineVertices', 'CurveDiscontinuity')
+
+BACKEND = None
+
+def use_backend(name):
+	global BACKEND
+	if (name=="rhino"):
+		import rhinoscriptsyntax as kernel
+	elif (name=="polyline"):
+		import polyline_geometry as kernel
+	else:
+		raise ValueError("unknown geometry backend: " +str(name))
+	module = globals()
+	for function in FUNCTIONS:
+		module[function] = getattr(kernel, function)
+	BACKEND = name
+
+def get_backend():
+	return BACKEND
+
+
+backend = os.environ.get("EXTRUDER_TURTLE_GEOMETRY")
+if (backend):
+	use_backend(backend)
+else:
+	try:
+		use_backend("rhino")
+	except ImportError:
+		use_backend("polyline")
@@ -0,0 +1,96 @@
+import polyline_tools as pt
+
+# layer pipeline for the weave slicer
+# phase 0 (weave_slicer.weave_layer_jobs) gets what each layer is planned from in Rhino,
+# the same things weave_one_slice_turtle plans from: the (skin) slices as polylines, divided into
+# the number of points to weave, and the branches above in the order the branch graph ranks them
+# phase 1 (this module) plans every layer from those, no Rhino calls,
+# so layers can be planned in parallel: the angles and the matching branch above
+# phase 2 (weave_slicer.weave_plans) replays the plans into the turtle in order
+# a layer's plan only depends on its own job, and results come back in layer order,
+# so the output is the same for any number of workers
+
+# a slice branch is passed around as (points, closed, divided), points are (x, y, z) tuples
+# and divided the points it is woven through (False if it is too small to weave)
+
+# a branch whose first angle is about 90 degrees (a co-planar slice) is planned against
+# the next closest branch above instead, at most this many times
+RETRIES = 5
+
+# polyline version of weave_slicer.find_points_and_angles
+# returns points0, points1, angles or False, False, False for very small layers
+def find_points_and_angles(branch0, branch1):
+	points0, closed0, divided0 = branch0
+	points1, closed1, divided1 = branch1
+	if (divided0 is False):
+		return False, False, False
+
+	# if slice0 is closed and slice1 is open, measure the angles from slice1 down to slice0
+	swapped_layers = closed0 and not(closed1)
+	if (swapped_layers):
+		lower = divided1
+		upper = points0
+		upper_closed = closed0
+		vertical = (0, 0, -1.0)
+	else:
+		lower = divided0
+		upper = points1
+		upper_closed = closed1
+		vertical = (0, 0, 1.0)
+
+	angles = []
+	for p, q in zip(lower, pt.closest_points(upper, lower, upper_closed)):
+		angles.append(pt.vector_angle(vertical, (q[0]-p[0], q[1]-p[1], q[2]-p[2])))
+
+	return divided0, divided1, angles
+
+# plans one layer, job is (layer, branches), each branch is (k, branch, uppers):
+# branch k of the layer and the (j, branch) of the branches above, closest first
+# (for the top layer, the first branch of the layer below and of the top layer)
+# returns a list of (k, j, points0, points1, angles): branch k of this layer woven against branch j above
+def plan_weave_layer(job):
+	layer, branches = job
+	plans = []
+	for k, branch, uppers in branches:
+		j, upper = uppers[0]
+		points0, points1, angles = find_points_and_angles(branch, upper)
+		count = 0
+		while (angles is not False and angles[0]>85 and angles[0]<95 and count<min(len(uppers)-1, RETRIES)):
+			# a co-planar slice was found, it is probably the wrong one, try the next closest
+			count += 1
+			j, upper = uppers[count]
+			points0, points1, angles = find_points_and_angles(branch, upper)
+		plans.append((k, j, points0, points1, angles))
+	return plans
+
+# maps function over jobs and returns the results in job order
+# uses a process pool (CPython), ghpythonlib.parallel (Grasshopper), or a plain loop
+def run_jobs(function, jobs, workers=None):
+	if (workers is None or workers<=1 or len(jobs)<2):
+		return [function(job) for job in jobs]
+	try:
+		import multiprocessing
+	except ImportError:
+		multiprocessing = None
+	if (multiprocessing is not None):
+		pool = multiprocessing.Pool(workers)
+		try:
+			return pool.map(function, jobs, max(1, len(jobs)//(workers*4)))
+		finally:
+			pool.close()
+			pool.join()
+	try:
+		import ghpythonlib.parallel
+		return list(ghpythonlib.parallel.run(function, jobs, False))
+	except ImportError:
+		return [function(job) for job in jobs]
+
+# the layers layer i is planned from, (below, above): the top layer is planned against the one below it
+def planned_from(i, count):
+	if (i==count-1):
+		return (max(i-1, 0), i)
+	return (i, i+1)
+
+# plans every job (from weave_slicer.weave_layer_jobs), on workers processes
+def plan_weave_layers(jobs, workers=None):
+	return run_jobs(plan_weave_layer, jobs, workers)
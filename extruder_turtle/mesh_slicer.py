@@ -0,0 +1,159 @@
+import math
+import bisect
+
+# slices a triangle mesh into layers in one pass, without Rhino
+# each triangle works out which layer planes cross it from its own z range,
+# so every triangle is visited once and every crossing is computed once
+# crossings are keyed by the mesh edge they lie on, two triangles that share an edge
+# share the crossing point, and the segments of a layer are stitched into loops
+# by following those edge keys
+# a vertex exactly on a plane counts as above it, so every crossed triangle has two crossing edges
+
+# how far the bottom and top planes are moved into the mesh, as a fraction of the layer height
+# so a flat bottom or top still gets a slice
+END_OFFSET = 1e-4
+
+
+# a mesh given as plain data, vertices are (x, y, z) and faces are lists of 3 or 4 vertex indices
+# (rs.MeshFaceVertices style, a triangle may repeat its last index)
+class TriangleMesh(object):
+
+	def __init__(self, vertices, faces):
+		self.vertices = [(float(v[0]), float(v[1]), float(v[2])) for v in vertices]
+		self.faces = [tuple(f) for f in faces]
+
+
+# merges vertices closer than tolerance, so unwelded meshes (e.g. from STL files) still share edges
+# returns the new vertices and the faces renumbered to use them
+def weld(vertices, faces, tolerance=1e-6):
+	index = {}
+	welded = []
+	renumber = []
+	for v in vertices:
+		key = (int(round(v[0]/tolerance)), int(round(v[1]/tolerance)), int(round(v[2]/tolerance)))
+		i = index.get(key)
+		if (i is None):
+			i = index[key] = len(welded)
+			welded.append(v)
+		renumber.append(i)
+	return welded, [[renumber[i] for i in f] for f in faces]
+
+# triangles of the faces, quads are split in two and degenerate triangles are dropped
+def triangles(faces):
+	for f in faces:
+		if (len(f)==4 and f[2]!=f[3]):
+			tris = ((f[0], f[1], f[2]), (f[0], f[2], f[3]))
+		else:
+			tris = ((f[0], f[1], f[2]),)
+		for a, b, c in tris:
+			if (a!=b and b!=c and c!=a):
+				yield a, b, c
+
+# heights of the slicing planes, layer_height apart starting at the bottom of the mesh
+def plane_heights(zmin, zmax, layer_height):
+	count = int(math.floor((zmax-zmin)/layer_height+1e-9))+1
+	heights = []
+	for k in range(count):
+		z = zmin+k*layer_height
+		z = min(max(z, zmin+layer_height*END_OFFSET), zmax-layer_height*END_OFFSET)
+		heights.append(z)
+	return heights
+
+# joins the segments of one layer into polylines
+# links maps the edge a segment starts on to the edge it ends on
+# returns a list of (points, closed), open chains first
+def stitch(links, crossings):
+	targets = set(links.values())
+	loops = []
+	visited = set()
+	heads = sorted([key for key in links if key not in targets])
+	for start in heads+sorted(links):
+		if (start in visited):
+			continue
+		points = []
+		key = start
+		closed = False
+		while (key is not None):
+			visited.add(key)
+			p = crossings[key]
+			if (not(points) or p!=points[-1]):
+				points.append(p)
+			key = links.get(key)
+			if (key==start):
+				closed = True
+				break
+			if (key in visited):
+				break
+		if (closed and len(points)>1 and points[0]==points[-1]):
+			points.pop()
+		if (len(points)>=3 or (len(points)>=2 and not(closed))):
+			loops.append((points, closed))
+	return loops
+
+# slices the mesh every layer_height, from the bottom of the mesh up
+# or at the given heights (sorted, e.g. from adaptive_layers), layer_height then only sets
+# how far the bottom and top planes are moved in
+# returns a list of layers, each a list of branches (points, closed), in the order slice_shape uses
+# (loops sorted by the x, then y, of their first point), layers without a crossing are left out
+def slice_mesh(mesh, layer_height=1.0, tolerance=1e-6, heights=None):
+	vertices, faces = weld(mesh.vertices, mesh.faces, tolerance)
+	if not(vertices):
+		return []
+	zs = [v[2] for v in vertices]
+	zmin = min(zs)
+	zmax = max(zs)
+	if (heights is None):
+		heights = plane_heights(zmin, zmax, layer_height)
+	else:
+		heights = [min(max(z, zmin+layer_height*END_OFFSET), zmax-layer_height*END_OFFSET) for z in heights]
+	links = [{} for z in heights]
+	crossings = [{} for z in heights]
+	last = len(heights)-1
+	for a, b, c in triangles(faces):
+		za = zs[a]
+		zb = zs[b]
+		zc = zs[c]
+		low = min(za, zb, zc)
+		high = max(za, zb, zc)
+		# the planes above low and at or below high cross this triangle
+		k = bisect.bisect_right(heights, low)
+		while (k<=last and heights[k]<=high):
+			z = heights[k]
+			if (z>low):
+				start = None
+				end = None
+				for p, q in ((a, b), (b, c), (c, a)):
+					below_p = zs[p]<z
+					below_q = zs[q]<z
+					if (below_p==below_q):
+						continue
+					if (p<q):
+						key = (p, q)
+					else:
+						key = (q, p)
+					if (key not in crossings[k]):
+						vp = vertices[p]
+						vq = vertices[q]
+						if (vp[2]==z):
+							crossings[k][key] = vp
+						elif (vq[2]==z):
+							crossings[k][key] = vq
+						else:
+							u = (z-vp[2])/(vq[2]-vp[2])
+							crossings[k][key] = (vp[0]+u*(vq[0]-vp[0]), vp[1]+u*(vq[1]-vp[1]), z)
+					# with outward facing triangles, outer loops run counterclockwise
+					if (below_p):
+						end = key
+					else:
+						start = key
+				if (start is not None and end is not None):
+					links[k][start] = end
+			k += 1
+	layers = []
+	for k in range(len(heights)):
+		if not(links[k]):
+			continue
+		branches = stitch(links[k], crossings[k])
+		branches.sort(key=lambda branch: (round(branch[0][0][0], 3), round(branch[0][0][1], 3)))
+		layers.append(branches)
+	return layers
@@ -0,0 +1,261 @@
+import math
+from array import array
+
+# compact, column-oriented record of every move a turtle makes
+# row 0 is the starting point, row i is the move from row i-1 to row i
+# positions are kept as doubles because each point is built from the one before it,
+# everything else is stored as float32 or uint8
+# arrays grow in place with amortized appends, so a move costs ~30 bytes
+# instead of the tuples and nested lists it used to take
+
+def clamp_color(color):
+	return tuple([min(max(int(c), 0), 255) for c in color])
+
+
+# running totals for a path, updated as each move is recorded
+# kept overall, per extruder and per color so path statistics
+# (length, time, volume, mass) are lookups instead of a rescan of the history
+# times are in minutes (distance in mm / feedrate in mm/minute)
+class PathStats(object):
+
+	def __init__(self):
+		self.print_distance = 0.0
+		self.travel_distance = 0.0
+		self.print_time = 0.0
+		self.travel_time = 0.0
+		self.extrusion = 0.0
+		# key -> [print distance, travel distance, time, extrusion]
+		self.by_extruder = {}
+		self.by_color = {}
+
+	def add(self, distance, e, feedrate, color, pen, extruder):
+		if (distance==0):
+			return
+		if (feedrate>0):
+			time = distance/feedrate
+		else:
+			time = 0.0
+		extruder_totals = self.by_extruder.get(extruder)
+		if (extruder_totals is None):
+			extruder_totals = self.by_extruder[extruder] = [0.0, 0.0, 0.0, 0.0]
+		color_totals = self.by_color.get(color)
+		if (color_totals is None):
+			color_totals = self.by_color[color] = [0.0, 0.0, 0.0, 0.0]
+		if pen:
+			self.print_distance += distance
+			self.print_time += time
+			self.extrusion += e
+			extruder_totals[0] += distance
+			color_totals[0] += distance
+			extruder_totals[3] += e
+			color_totals[3] += e
+		else:
+			self.travel_distance += distance
+			self.travel_time += time
+			extruder_totals[1] += distance
+			color_totals[1] += distance
+		extruder_totals[2] += time
+		color_totals[2] += time
+
+	def total_distance(self):
+		return self.print_distance+self.travel_distance
+
+	def total_time(self):
+		return self.print_time+self.travel_time
+
+	def extruder_totals(self, extruder):
+		return tuple(self.by_extruder.get(extruder, (0.0, 0.0, 0.0, 0.0)))
+
+	def color_totals(self, color):
+		return tuple(self.by_color.get(clamp_color(color), (0.0, 0.0, 0.0, 0.0)))
+
+
+class MoveHistory(object):
+
+	def __init__(self, x=0, y=0, z=0):
+		self.reset(x, y, z)
+
+	def reset(self, x=0, y=0, z=0):
+		self.x = array('d', [x])
+		self.y = array('d', [y])
+		self.z = array('d', [z])
+		self.e = array('f', [0.0])
+		self.feedrate = array('f', [0.0])
+		self.r = array('B', [0])
+		self.g = array('B', [0])
+		self.b = array('B', [0])
+		self.pen = array('B', [0])
+		self.extruder = array('B', [0])
+		# row numbers of pen-down and pen-up moves
+		self.print_rows = array('l')
+		self.travel_rows = array('l')
+		self.last_color = None
+		self.last_rgb = (0, 0, 0)
+		self.stats = PathStats()
+
+	def __len__(self):
+		return len(self.x)-1
+
+	def append(self, dx, dy, dz, e, feedrate, color, pen, extruder):
+		x = self.x
+		y = self.y
+		z = self.z
+		x0 = x[-1]
+		y0 = y[-1]
+		z0 = z[-1]
+		x.append(x0+dx)
+		y.append(y0+dy)
+		z.append(z0+dz)
+		# measure the stored points so totals match the recorded path exactly
+		distance = math.sqrt((x[-1]-x0)**2+(y[-1]-y0)**2+(z[-1]-z0)**2)
+		if (color is not self.last_color):
+			self.last_color = color
+			self.last_rgb = clamp_color(color)
+		# colors are totalled by the stored (clamped) rgb, the same key extend uses
+		self.stats.add(distance, e, feedrate, self.last_rgb, pen, extruder)
+		self.e.append(e)
+		self.feedrate.append(feedrate)
+		r, g, b = self.last_rgb
+		self.r.append(r)
+		self.g.append(g)
+		self.b.append(b)
+		self.extruder.append(extruder)
+		if pen:
+			self.pen.append(1)
+			self.print_rows.append(len(x)-1)
+		else:
+			self.pen.append(0)
+			self.travel_rows.append(len(x)-1)
+
+	# start the next move from (x, y, z) without recording a move to it
+	def jump_to(self, x, y, z):
+		if (len(self)==0):
+			self.x[0] = x
+			self.y[0] = y
+			self.z[0] = z
+			return
+		self.x.append(x)
+		self.y.append(y)
+		self.z.append(z)
+		self.e.append(0.0)
+		self.feedrate.append(0.0)
+		self.r.append(0)
+		self.g.append(0)
+		self.b.append(0)
+		self.pen.append(2) # neither a print nor a travel move
+		self.extruder.append(0)
+
+	# the rows after row start as plain tuples, (x, y, z, e, feedrate, r, g, b, pen, extruder),
+	# for saving part of a history and adding it back later with extend
+	def rows(self, start=0):
+		return [(self.x[i], self.y[i], self.z[i], self.e[i], self.feedrate[i], self.r[i], self.g[i], self.b[i], self.pen[i], self.extruder[i]) for i in range(start+1, len(self.x))]
+
+	# adds rows saved by rows(), at the positions they were recorded at
+	def extend(self, rows):
+		for x1, y1, z1, e, feedrate, r, g, b, pen, extruder in rows:
+			if (pen==2):
+				self.jump_to(x1, y1, z1)
+				continue
+			x0, y0, z0 = self.last_point()
+			self.x.append(x1)
+			self.y.append(y1)
+			self.z.append(z1)
+			distance = math.sqrt((x1-x0)**2+(y1-y0)**2+(z1-z0)**2)
+			self.stats.add(distance, e, feedrate, (r, g, b), pen, extruder)
+			self.e.append(e)
+			self.feedrate.append(feedrate)
+			self.r.append(r)
+			self.g.append(g)
+			self.b.append(b)
+			self.pen.append(pen)
+			self.extruder.append(extruder)
+			if pen:
+				self.print_rows.append(len(self.x)-1)
+			else:
+				self.travel_rows.append(len(self.x)-1)
+
+	###################################################################
+	# read-only views
+	###################################################################
+
+	def point(self, row):
+		return (self.x[row], self.y[row], self.z[row])
+
+	def last_point(self):
+		return (self.x[-1], self.y[-1], self.z[-1])
+
+	def points(self):
+		return zip(self.x, self.y, self.z)
+
+	def segment(self, row):
+		return (self.x[row-1], self.y[row-1], self.z[row-1]), (self.x[row], self.y[row], self.z[row])
+
+	# True if the move at row goes nowhere
+	def is_zero(self, row):
+		return (self.x[row]==self.x[row-1] and self.y[row]==self.y[row-1] and self.z[row]==self.z[row-1])
+
+	def length(self, row):
+		dx = self.x[row]-self.x[row-1]
+		dy = self.y[row]-self.y[row-1]
+		dz = self.z[row]-self.z[row-1]
+		return math.sqrt(dx*dx+dy*dy+dz*dz)
+
+	def color(self, row):
+		return (self.r[row], self.g[row], self.b[row])
+
+	# pen-down segments as (start, end) point tuples
+	def print_segments(self):
+		for row in self.print_rows:
+			yield self.segment(row)
+
+	# pen-up segments as (start, end) point tuples
+	def travel_segments(self):
+		for row in self.travel_rows:
+			yield self.segment(row)
+
+	# contiguous pen-down runs as lists of points, one list per run
+	# a travel or a jump breaks the run, zero-length moves are skipped
+	def print_runs(self):
+		run = []
+		prev = -2
+		for row in self.print_rows:
+			if (row!=prev+1):
+				if (len(run)>1):
+					yield run
+				run = [self.point(row-1)]
+			prev = row
+			if (not(self.is_zero(row))):
+				run.append(self.point(row))
+		if (len(run)>1):
+			yield run
+
+	def print_colors(self):
+		r = self.r
+		g = self.g
+		b = self.b
+		return [(r[row], g[row], b[row]) for row in self.print_rows]
+
+	def print_speeds(self):
+		feedrate = self.feedrate
+		return [feedrate[row] for row in self.print_rows]
+
+	def travel_speeds(self):
+		feedrate = self.feedrate
+		return [feedrate[row] for row in self.travel_rows]
+
+	def print_extrusion(self):
+		e = self.e
+		return [e[row] for row in self.print_rows]
+
+	# overwrite the colors of the pen-down moves, e.g. after diffusing them
+	def set_print_colors(self, colors):
+		for row, color in zip(self.print_rows, colors):
+			r, g, b = clamp_color(color)
+			self.r[row] = r
+			self.g[row] = g
+			self.b[row] = b
+
+	def memory_size(self):
+		columns = (self.x, self.y, self.z, self.e, self.feedrate, self.r, self.g, self.b,
+			self.pen, self.extruder, self.print_rows, self.travel_rows)
+		return sum([c.itemsize*len(c) for c in columns])
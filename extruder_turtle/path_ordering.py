@@ -0,0 +1,179 @@
+import math
+
+# the order to print the loops of a layer in, to keep pen up travel short
+# a nearest neighbor tour is built first, from where the turtle is, then improved with 2-opt
+# (reversing runs of the tour while that shortens it), closed loops can start anywhere
+# so each one starts at its point closest to where the last loop ended,
+# open paths can be printed from either end
+# loops are (points, closed), points are (x, y, z) tuples or Rhino points, no Rhino calls
+
+# 2-opt passes over the tour at most
+TWO_OPT_PASSES = 8
+
+
+def distance(p, q):
+	return math.sqrt((p[0]-q[0])**2+(p[1]-q[1])**2)
+
+def nearest_index(points, p):
+	best = 0
+	best_d2 = None
+	for i in range(len(points)):
+		d2 = (points[i][0]-p[0])**2+(points[i][1]-p[1])**2
+		if (best_d2 is None or d2<best_d2):
+			best = i
+			best_d2 = d2
+	return best
+
+# where the loop is entered and left, (entry, exit, start index, reversed)
+def endpoints(loop, position, reverse=False):
+	points, closed = loop
+	if (closed):
+		if (position is None):
+			j = 0
+		else:
+			j = nearest_index(points, position)
+		return (points[j], points[j], j, False)
+	if (reverse):
+		return (points[-1], points[0], len(points)-1, True)
+	return (points[0], points[-1], 0, False)
+
+# how the loop is best entered from position, open paths from their closer end
+def best_endpoints(loop, position):
+	forward = endpoints(loop, position)
+	if (loop[1] or position is None):
+		return forward
+	backward = endpoints(loop, position, reverse=True)
+	if (distance(backward[0], position)<distance(forward[0], position)):
+		return backward
+	return forward
+
+# pen up travel of printing loops in order, each a (index, start index, reversed) tuple
+def travel_length(loops, order, start=None):
+	total = 0.0
+	position = start
+	for index, j, reverse in order:
+		points, closed = loops[index]
+		if (position is not None):
+			total += distance(points[j], position)
+		if (closed):
+			position = points[j]
+		elif (reverse):
+			position = points[0]
+		else:
+			position = points[-1]
+	return total
+
+# the loops as they are, in their own order, starting at their first points
+def given_order(loops):
+	return [(i, 0, False) for i in range(len(loops))]
+
+# the order to print the loops in, a list of (index, start index, reversed)
+# start is where the turtle is, start index is the point each loop starts at
+def order_loops(loops, start=None):
+	if (len(loops)<2):
+		return [(i,)+best_endpoints(loops[i], start)[2:] for i in range(len(loops))]
+	# nearest neighbor
+	remaining = list(range(len(loops)))
+	tour = []
+	position = start
+	while remaining:
+		best = None
+		for i in remaining:
+			ends = best_endpoints(loops[i], position)
+			if (position is None):
+				d = 0.0
+			else:
+				d = distance(ends[0], position)
+			if (best is None or d<best[0]):
+				best = (d, i, ends)
+		remaining.remove(best[1])
+		tour.append(best[1])
+		position = best[2][1]
+	# 2-opt, then choose the start points again for the new order, until nothing improves
+	order = place(loops, tour, start)
+	length = travel_length(loops, order, start)
+	for n in range(TWO_OPT_PASSES):
+		tour = two_opt(loops, order, start)
+		new_order = place(loops, tour, start)
+		new_length = travel_length(loops, new_order, start)
+		if (new_length>=length-1e-9):
+			break
+		order = new_order
+		length = new_length
+	return order
+
+# start points and directions for loops printed in tour order
+def place(loops, tour, start):
+	order = []
+	position = start
+	for i in tour:
+		ends = best_endpoints(loops[i], position)
+		order.append((i, ends[2], ends[3]))
+		position = ends[1]
+	return order
+
+# one round of 2-opt over the tour, with the loops' entry and exit points held fixed
+# (reversing a run of the tour reverses the open paths in it)
+def two_opt(loops, order, start):
+	entries = []
+	exits = []
+	for index, j, reverse in order:
+		points, closed = loops[index]
+		entries.append(points[j])
+		if (closed):
+			exits.append(points[j])
+		elif (reverse):
+			exits.append(points[0])
+		else:
+			exits.append(points[-1])
+	tour = [item[0] for item in order]
+	n = len(tour)
+	improved = True
+	passes = 0
+	while (improved and passes<TWO_OPT_PASSES):
+		improved = False
+		passes += 1
+		for a in range(n-1):
+			for b in range(a+1, n):
+				# reverse tour[a..b], the travel into a and out of b change
+				before = 0.0
+				after = 0.0
+				if (a>0):
+					before += distance(exits[a-1], entries[a])
+					after += distance(exits[a-1], exits[b])
+				elif (start is not None):
+					before += distance(start, entries[a])
+					after += distance(start, exits[b])
+				if (b<n-1):
+					before += distance(exits[b], entries[b+1])
+					after += distance(entries[a], entries[b+1])
+				if (after<before-1e-9):
+					tour[a:b+1] = tour[a:b+1][::-1]
+					entries[a:b+1], exits[a:b+1] = exits[a:b+1][::-1], entries[a:b+1][::-1]
+					improved = True
+	return tour
+
+
+# adds up the travel saved by ordering, over a whole print
+class TravelSavings(object):
+
+	def __init__(self):
+		self.before = 0.0
+		self.after = 0.0
+		self.layers = 0
+
+	def add(self, before, after):
+		self.before += before
+		self.after += after
+		self.layers += 1
+
+	def saved(self):
+		return self.before-self.after
+
+	# speed is the travel feedrate in mm/minute, returns the time saved in seconds
+	def report(self, speed):
+		seconds = 0.0
+		if (speed):
+			seconds = self.saved()/speed*60.0
+		print("travel ordering: " +str(round(self.before,1)) + " mm of travel before, " +str(round(self.after,1)) + " mm after, saved " +str(round(self.saved(),1)) + " mm (" +str(round(seconds,1)) + " s)")
+		return seconds
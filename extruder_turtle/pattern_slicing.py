@@ -1,6 +1,7 @@
-import Rhino.Geometry as geom
-import rhinoscriptsyntax as rs
 import ExtruderTurtle as e
+import slice_cache as sc
+import geometry_backend as gb
+import frame_turtle as ft
 import operator as op
 import math
 import random
@@ -80,7 +81,7 @@ def follow_points_clean_edges(t,points,follow_z=True,closed=False,pattern_row=Fa
 			print("Number of points doesn't match pattern size")
 			return
 
-	t2=ExtruderTurtle()
+	t2=ft.FrameTurtle()
 
 	i=0
 	speed=t.get_speed()
@@ -140,13 +141,13 @@ def follow_points_clean_edges(t,points,follow_z=True,closed=False,pattern_row=Fa
 
 
 def find_curve_rotation(outer_curve, inner_curve):
-	outer_points = rs.DivideCurve(outer_curve, 20)
-	inner_points = rs.DivideCurve(inner_curve, 20)
-	closest=rs.CurveClosestPoint(inner_curve,outer_points[9])
-	closest_point = rs.EvaluateCurve(inner_curve, closest)
-	vector0 = rs.AddPoint(closest_point.X, closest_point.Y,0)
-	vector1 = rs.AddPoint(inner_points[9].X, inner_points[9].Y,0)
-	angle=rs.VectorAngle(vector0,vector1)
+	outer_points = sc.cache.divide(outer_curve, 20)
+	inner_points = sc.cache.divide(inner_curve, 20)
+	closest=gb.CurveClosestPoint(inner_curve,outer_points[9])
+	closest_point = gb.EvaluateCurve(inner_curve, closest)
+	vector0 = gb.AddPoint(closest_point.X, closest_point.Y,0)
+	vector1 = gb.AddPoint(inner_points[9].X, inner_points[9].Y,0)
+	angle=gb.VectorAngle(vector0,vector1)
 	return angle
 
 def rotate_pattern(pattern_row,angle,step_shift=False):
@@ -165,7 +166,7 @@ def rotate_pattern(pattern_row,angle,step_shift=False):
 
 
 def pixel_size(curve,pattern_row):
-	length = rs.CurveLength(curve)
+	length = sc.cache.length(curve)
 	n_pixels = len(pattern_row)
 	p_size = length/n_pixels
 	# print("pixel size: " +str(p_size))
@@ -221,8 +222,8 @@ def follow_curve_pattern_only(t, curve=False, points=False, steps=100, number_wa
 	t.set_extruder(1)
 
 	if (points is False):
-		curve = get_offset_curve(curve,t.get_extrude_width()*number_walls*.3)
-		points = rs.DivideCurve (curve, steps=steps)
+		curve = su.get_offset_curve(curve,t.get_extrude_width()*number_walls*.3)
+		points = sc.cache.divide(curve, steps)
 
 	if (reverse):
 		points.reverse()
@@ -235,7 +236,7 @@ def follow_curve_pattern_only(t, curve=False, points=False, steps=100, number_wa
 	t.extrude(15)
 	t.set_speed(speed)
 
-	follow_points (t,points,closed=True,pattern_row=new_pattern_row,pattern_mode=1)
+	su.follow_points(t,points,closed=True,pattern_row=new_pattern_row,pattern_mode=1)
 	
 	t.penup() # don't extrude between walls
 	t.set_extruder(0)
@@ -266,10 +267,10 @@ def follow_curve_loops(t,curve,num_loops,loop_width=.5, loop_length=4, offset=0,
 	print("steps per space: " +str(space_steps))
 	print("")
 
-	points = rs.DivideCurve (curve, steps)
+	points = sc.cache.divide(curve, steps)
 	dtheta = 360.0/steps
 
-	t2=ExtruderTurtle()
+	t2=ft.FrameTurtle()
 	t2.penup()
 	t.penup()
 
@@ -360,4 +361,4 @@ def follow_curve_loops(t,curve,num_loops,loop_width=.5, loop_length=4, offset=0,
 
 
 	# t.set_speed(speed)
-	return t2.get_lines() 
+	return [] # t2 is only used for positions and never draws lines
@@ -0,0 +1,434 @@
+import math
+
+# inward offsets of slice polygons, all the rings of a wall or bottom in one call
+# polygons are lists of (x, y, z) points in mm, converted to integer coordinates
+# (SCALE units per mm) so the orientation and intersection tests are exact
+# ring k offsets every edge of the polygon by k times the distance (like Clipper, so the
+# rounding of one ring doesn't carry over into the next), adds miter or round joins (or goes back through the corner
+# where an offset edge turns around, as Clipper does), then removes the parts
+# of the raw offset that fold over themselves: the raw loop is
+# split where it crosses itself and only the edges with winding 1 on their left
+# (inside) and 0 on their right (outside) are kept, so a ring that pinches off
+# comes back as separate islands and collapsed corners disappear
+# the polygon is thinned once to the points needed to stay within ARC_TOLERANCE of it,
+# and so are the rings, so the work per ring follows the shape, not the number of points
+# sampled, and every ring is within ARC_TOLERANCE (plus rounding to the integer units)
+# of the exact offset of the polygon
+# no Rhino calls, slicer_utilities turns the rings back into curves
+
+# integer units per mm
+SCALE = 1000
+# reflex corners whose miter would reach further than MITER_LIMIT times the offset get a round join
+MITER_LIMIT = 2.0
+# how far a round join may stray from a true arc, in mm
+ARC_TOLERANCE = 0.01
+# at most this many points are dropped in a row when thinning a ring
+MAX_DROPPED = 64
+
+
+# points in integer units, rounded=False keeps the fractions (offset_loop works from those)
+def to_integer(points, rounded=True):
+	if (rounded):
+		return [(int(round(p[0]*SCALE)), int(round(p[1]*SCALE))) for p in points]
+	return [(p[0]*SCALE, p[1]*SCALE) for p in points]
+
+def signed_area(points):
+	area = 0
+	for i in range(len(points)):
+		a = points[i-1]
+		b = points[i]
+		area += a[0]*b[1]-b[0]*a[1]
+	return area/2.0
+
+# drops repeated points and the closing point, returns a counterclockwise loop
+# (points closer than one integer unit count as repeated)
+def clean_loop(points):
+	loop = []
+	for p in points:
+		if (not(loop) or abs(p[0]-loop[-1][0])+abs(p[1]-loop[-1][1])>=1):
+			loop.append(p)
+	while (len(loop)>1 and abs(loop[0][0]-loop[-1][0])+abs(loop[0][1]-loop[-1][1])<1):
+		loop.pop()
+	if (signed_area(loop)<0):
+		loop.reverse()
+	return loop
+
+# raw offset of a loop by delta integer units to its left (inwards for a counterclockwise loop)
+# the loop keeps its fractions, so rounding doesn't tilt the normals of short edges,
+# the offset points are rounded to integers
+# may cross itself, resolve() removes the parts that do
+def offset_loop(loop, delta):
+	n = len(loop)
+	normals = []
+	lengths = []
+	for i in range(n):
+		a = loop[i]
+		b = loop[(i+1)%n]
+		dx = b[0]-a[0]
+		dy = b[1]-a[1]
+		d = math.sqrt(dx*dx+dy*dy)
+		normals.append((-dy/d, dx/d))
+		lengths.append(d)
+	# how far the miter at each corner cuts back along the offset edges next to it
+	trims = []
+	for i in range(n):
+		n0 = normals[i-1]
+		n1 = normals[i]
+		cross = n0[0]*n1[1]-n0[1]*n1[0]
+		dot = n0[0]*n1[0]+n0[1]*n1[1]
+		trims.append(abs(delta*cross)/(1+dot) if (cross*delta>0 and 1+dot>1e-12) else 0.0)
+	# arc steps per radian of a round join that keep it within ARC_TOLERANCE of a true arc
+	if (abs(delta)>ARC_TOLERANCE*SCALE):
+		steps_per_radian = 0.5/math.acos(1-ARC_TOLERANCE*SCALE/abs(delta))
+	else:
+		steps_per_radian = 0.0
+	raw = []
+	for i in range(n):
+		p = loop[i]
+		n0 = normals[i-1]
+		n1 = normals[i]
+		cross = n0[0]*n1[1]-n0[1]*n1[0]
+		dot = n0[0]*n1[0]+n0[1]*n1[1]
+		if (cross*delta<0 and 1+dot<2/(MITER_LIMIT*MITER_LIMIT)):
+			# the offset edges pull apart here, fill the gap with an arc around p
+			a0 = math.atan2(n0[1], n0[0])
+			sweep = math.atan2(cross, dot)
+			steps = max(int(abs(sweep)*steps_per_radian), 1)
+			for j in range(steps+1):
+				angle = a0+sweep*j/steps
+				raw.append((int(round(p[0]+delta*math.cos(angle))), int(round(p[1]+delta*math.sin(angle)))))
+		elif (cross*delta>0 and (trims[i-1]+trims[i]>lengths[i-1] or trims[i]+trims[(i+1)%n]>lengths[i])):
+			# an offset edge next to this corner is turned around, a miter would leave a sliver of it behind,
+			# so go back through p instead (like Clipper), the loops that makes wind the wrong way and drop out
+			raw.append((int(round(p[0]+n0[0]*delta)), int(round(p[1]+n0[1]*delta))))
+			raw.append((int(round(p[0])), int(round(p[1]))))
+			raw.append((int(round(p[0]+n1[0]*delta)), int(round(p[1]+n1[1]*delta))))
+		elif (1+dot>1e-12):
+			# miter, the offset lines of both edges meet here
+			scale = delta/(1+dot)
+			raw.append((int(round(p[0]+(n0[0]+n1[0])*scale)), int(round(p[1]+(n0[1]+n1[1])*scale))))
+		else:
+			# the polygon turns back on itself
+			raw.append((int(round(p[0]+n0[0]*delta)), int(round(p[1]+n0[1]*delta))))
+			raw.append((int(round(p[0]+n1[0]*delta)), int(round(p[1]+n1[1]*delta))))
+	return [p for i, p in enumerate(raw) if p!=raw[i-1]]
+
+# segments of the raw loops bucketed by the horizontal bands they span,
+# so a winding number only looks at the segments level with the point
+class BandIndex(object):
+
+	def __init__(self, segments, height):
+		self.height = height
+		self.bands = {}
+		for a, b in segments:
+			for band in range(int(math.floor(min(a[1], b[1])/height)), int(math.floor(max(a[1], b[1])/height))+1):
+				self.bands.setdefault(band, []).append((a, b))
+
+	# winding number of the point (x, y) around the loops
+	def winding_number(self, x, y):
+		winding = 0
+		for a, b in self.bands.get(int(math.floor(y/self.height)), ()):
+			if (a[1]<=y):
+				if (b[1]>y and (b[0]-a[0])*(y-a[1])-(x-a[0])*(b[1]-a[1])>0):
+					winding += 1
+			elif (b[1]<=y and (b[0]-a[0])*(y-a[1])-(x-a[0])*(b[1]-a[1])<0):
+				winding -= 1
+		return winding
+
+# True if point p lies on the segment a-b, strictly between its ends
+def inside_segment(p, a, b):
+	if ((b[0]-a[0])*(p[1]-a[1])-(b[1]-a[1])*(p[0]-a[0])!=0):
+		return False
+	dot = (p[0]-a[0])*(b[0]-a[0])+(p[1]-a[1])*(b[1]-a[1])
+	return 0<dot<(b[0]-a[0])**2+(b[1]-a[1])**2
+
+# where the segments of the loops cross or touch each other, found through a grid of buckets
+# returns {segment: [(t, point)]}, segments are numbered in loop order
+def split_points(segments, cell):
+	grid = {}
+	for s in range(len(segments)):
+		a, b = segments[s]
+		for gx in range(int(math.floor(min(a[0], b[0])/cell)), int(math.floor(max(a[0], b[0])/cell))+1):
+			for gy in range(int(math.floor(min(a[1], b[1])/cell)), int(math.floor(max(a[1], b[1])/cell))+1):
+				grid.setdefault((gx, gy), []).append(s)
+	tested = set()
+	found = {}
+	for key in sorted(grid):
+		bucket = grid[key]
+		for m in range(len(bucket)):
+			for n in range(m+1, len(bucket)):
+				s0 = bucket[m]
+				s1 = bucket[n]
+				if ((s0, s1) in tested):
+					continue
+				tested.add((s0, s1))
+				p1, p2 = segments[s0]
+				p3, p4 = segments[s1]
+				# an end of one segment touching the other one
+				for p, s, a, b in ((p3, s0, p1, p2), (p4, s0, p1, p2), (p1, s1, p3, p4), (p2, s1, p3, p4)):
+					if (inside_segment(p, a, b)):
+						t = float((p[0]-a[0])*(b[0]-a[0])+(p[1]-a[1])*(b[1]-a[1]))/((b[0]-a[0])**2+(b[1]-a[1])**2)
+						found.setdefault(s, []).append((t, p))
+				# the segments crossing
+				d1x = p2[0]-p1[0]
+				d1y = p2[1]-p1[1]
+				d2x = p4[0]-p3[0]
+				d2y = p4[1]-p3[1]
+				d = d1x*d2y-d1y*d2x
+				if (d==0):
+					continue
+				ex = p3[0]-p1[0]
+				ey = p3[1]-p1[1]
+				t = ex*d2y-ey*d2x
+				u = ex*d1y-ey*d1x
+				if (d<0):
+					d = -d
+					t = -t
+					u = -u
+				if not(0<t<d and 0<u<d):
+					continue
+				t = float(t)/d
+				u = float(u)/d
+				p = (p1[0]+t*d1x, p1[1]+t*d1y)
+				found.setdefault(s0, []).append((t, p))
+				found.setdefault(s1, []).append((u, p))
+	return found
+
+# the region with positive winding around the raw loops, as counterclockwise loops of float points
+def resolve(raw_loops):
+	raw_loops = [loop for loop in raw_loops if len(loop)>=3]
+	if not(raw_loops):
+		return []
+	segments = []
+	total = 0.0
+	for loop in raw_loops:
+		for i in range(len(loop)):
+			a = loop[i]
+			b = loop[(i+1)%len(loop)]
+			segments.append((a, b))
+			total += abs(b[0]-a[0])+abs(b[1]-a[1])
+	cell = max(total/len(segments), 1.0)
+	found = split_points(segments, cell)
+	index = BandIndex(segments, cell)
+	# points are shared through node numbers, crossings are matched to the nearest 1e-6 unit
+	node_numbers = {}
+	nodes = []
+	def node(p):
+		key = (round(p[0], 6), round(p[1], 6))
+		number = node_numbers.get(key)
+		if (number is None):
+			number = node_numbers[key] = len(nodes)
+			nodes.append((float(p[0]), float(p[1])))
+		return number
+	# split the segments where they meet, keep the pieces with the region on their left only
+	kept = [] # (start node, end node)
+	for s in range(len(segments)):
+		a, b = segments[s]
+		chain = [a]+[p for t, p in sorted(found.get(s, []))]+[b]
+		for j in range(len(chain)-1):
+			p = chain[j]
+			q = chain[j+1]
+			dx = q[0]-p[0]
+			dy = q[1]-p[1]
+			length = math.sqrt(dx*dx+dy*dy)
+			if (length==0):
+				continue
+			mx = (p[0]+q[0])/2.0
+			my = (p[1]+q[1])/2.0
+			nx = -dy/length*0.25
+			ny = dx/length*0.25
+			if (index.winding_number(mx+nx, my+ny)>0 and index.winding_number(mx-nx, my-ny)<=0):
+				start = node(p)
+				end = node(q)
+				if (start!=end):
+					kept.append((start, end))
+	# pieces of slivers thinner than the winding test can see may be kept on one side only,
+	# drop pieces that can't be part of a loop (nothing leads into them or out of them)
+	pruned = True
+	while pruned:
+		starts = set([start for start, end in kept])
+		ends = set([end for start, end in kept])
+		count = len(kept)
+		kept = [(start, end) for start, end in kept if start in ends and end in starts]
+		pruned = len(kept)<count
+	# join the kept pieces into loops, turning as far left as possible where loops touch
+	outgoing = {}
+	for e in range(len(kept)):
+		outgoing.setdefault(kept[e][0], []).append(e)
+	used = [False]*len(kept)
+	loops = []
+	for first in range(len(kept)):
+		if (used[first]):
+			continue
+		points = []
+		e = first
+		while (e is not None and not(used[e])):
+			used[e] = True
+			start, end = kept[e]
+			points.append(nodes[start])
+			options = [o for o in outgoing.get(end, []) if not(used[o]) or o==first]
+			if not(options):
+				points = []
+				break
+			ax = nodes[end][0]-nodes[start][0]
+			ay = nodes[end][1]-nodes[start][1]
+			best = None
+			best_turn = None
+			for o in options:
+				bx = nodes[kept[o][1]][0]-nodes[end][0]
+				by = nodes[kept[o][1]][1]-nodes[end][1]
+				turn = math.atan2(ax*by-ay*bx, ax*bx+ay*by)
+				if (best_turn is None or turn>best_turn):
+					best = o
+					best_turn = turn
+			if (best==first):
+				break
+			e = best
+		if (len(points)>=3 and signed_area(points)>0):
+			loops.append(points)
+	return loops
+
+# offsets counterclockwise loops (integer units, the islands of one ring) inwards by delta units
+# returns the resolved counterclockwise loops, and True if some were left out because
+# a part of the loops thinner than 2*delta turned inside out
+# (a loop smaller than delta turns over onto the outside of itself, so offsets have to lie inside)
+def offset_loops(loops, delta):
+	result = []
+	inside_out = False
+	for offset in resolve([offset_loop(loop, delta) for loop in loops]):
+		if (abs(signed_area(offset))<=SCALE*SCALE*1e-6):
+			continue
+		if (any([too_close(offset, loop, delta-(ARC_TOLERANCE*SCALE+2)) for loop in loops]) or
+				not(any([point_in_loop(loop, offset[0][0], offset[0][1]) for loop in loops]))):
+			inside_out = True
+			continue
+		result.append(offset)
+	return result, inside_out
+
+# offsets the polygon (x, y, z points, closed) inwards by distance mm
+# returns a list of counterclockwise loops of (x, y, z) points, more than one if the polygon splits
+def offset_polygon(points, distance):
+	z = points[0][2]
+	loop = clean_loop(to_integer(points, rounded=False))
+	if (len(loop)<3):
+		return []
+	return [to_mm(offset, z) for offset in offset_loops([loop], distance*SCALE)[0]]
+
+def to_mm(loop, z):
+	return [(p[0]/float(SCALE), p[1]/float(SCALE), z) for p in loop]
+
+# squared distance from point p to the segment a-b
+def segment_distance2(p, a, b):
+	abx = b[0]-a[0]
+	aby = b[1]-a[1]
+	apx = p[0]-a[0]
+	apy = p[1]-a[1]
+	ab2 = abx*abx+aby*aby
+	u = 0.0
+	if (ab2>0):
+		u = min(max((apx*abx+apy*aby)/ab2, 0.0), 1.0)
+	return (apx-u*abx)**2+(apy-u*aby)**2
+
+# True if some of the points of offset (up to SAMPLES_CHECKED of them) are closer than distance to loop
+# every point of a true offset is distance away from the polygon
+SAMPLES_CHECKED = 16
+
+def too_close(offset, loop, distance):
+	step = max(len(offset)//SAMPLES_CHECKED, 1)
+	limit = distance*distance
+	for p in offset[::step]:
+		for i in range(len(loop)):
+			if (segment_distance2(p, loop[i-1], loop[i])<limit):
+				return True
+	return False
+
+# the loop without the points that lie within tolerance (integer units) of the segment
+# between the points kept on either side of them, at most MAX_DROPPED in a row
+def thin_loop(loop, tolerance):
+	if (len(loop)<=4):
+		return loop
+	limit = tolerance*tolerance
+	kept = [loop[0]]
+	dropped = []
+	for i in range(1, len(loop)):
+		p = loop[i]
+		following = loop[(i+1)%len(loop)]
+		if (len(dropped)<MAX_DROPPED and all([segment_distance2(q, kept[-1], following)<=limit for q in dropped+[p]])):
+			dropped.append(p)
+		else:
+			kept.append(p)
+			dropped = []
+	if (len(kept)<3):
+		return loop
+	return kept
+
+# the inward rings of the polygon, distance mm apart, until the polygon is used up
+# (or count rings have been made), each ring is a list of loops (islands)
+# ring k is the polygon offset by k*distance, the polygon is used up when
+# nothing is left of it that isn't a part turned inside out
+def inset_rings(points, distance, count=None):
+	z = points[0][2]
+	polygon = thin_loop(clean_loop(to_integer(points, rounded=False)), ARC_TOLERANCE*SCALE)
+	if (len(polygon)<3):
+		return []
+	rings = []
+	while (count is None or len(rings)<count):
+		offsets = offset_loops([polygon], distance*SCALE*(len(rings)+1))[0]
+		loops = [thin_loop(clean_loop(loop), ARC_TOLERANCE*SCALE) for loop in offsets]
+		loops = [loop for loop in loops if len(loop)>=3]
+		if not(loops):
+			break
+		rings.append([to_mm(loop, z) for loop in loops])
+	return rings
+
+def point_in_loop(loop, x, y):
+	segments = [(loop[i-1], loop[i]) for i in range(len(loop))]
+	return BandIndex(segments, 1e9).winding_number(x, y)!=0
+
+# flattens rings (from inset_rings) into the order to print them
+# each island is finished, outside in, before moving on to the next one,
+# and every loop starts at its point closest to where the previous loop started
+def order_rings(rings, start=None):
+	# children[(k, i)] = loops of ring k+1 inside loop i of ring k
+	children = {}
+	for k in range(len(rings)-1):
+		for j in range(len(rings[k+1])):
+			p = rings[k+1][j][0]
+			for i in range(len(rings[k])):
+				if (point_in_loop(rings[k][i], p[0], p[1])):
+					children.setdefault((k, i), []).append(j)
+					break
+	ordered = []
+	position = start
+	if not(rings):
+		return ordered
+	stack = [(0, i) for i in reversed(range(len(rings[0])))]
+	if (position is not None):
+		stack.sort(key=lambda item: -nearest_distance(rings[0][item[1]], position))
+	while stack:
+		k, i = stack.pop()
+		loop = rings[k][i]
+		if (position is not None):
+			j = nearest_index(loop, position)
+			loop = loop[j:]+loop[:j]
+		ordered.append(loop)
+		position = loop[0]
+		inner = children.get((k, i), [])
+		inner = sorted(inner, key=lambda j: -nearest_distance(rings[k+1][j], position))
+		for j in inner:
+			stack.append((k+1, j))
+	return ordered
+
+def nearest_index(loop, p):
+	best = 0
+	best_d2 = None
+	for i in range(len(loop)):
+		d2 = (loop[i][0]-p[0])**2+(loop[i][1]-p[1])**2
+		if (best_d2 is None or d2<best_d2):
+			best = i
+			best_d2 = d2
+	return best
+
+def nearest_distance(loop, p):
+	q = loop[nearest_index(loop, p)]
+	return math.sqrt((q[0]-p[0])**2+(q[1]-p[1])**2)
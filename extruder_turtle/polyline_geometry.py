@@ -0,0 +1,373 @@
+import math
+import bisect
+import polyline_tools as pt
+
+# the curve functions of rhinoscriptsyntax that the slicers use, over plain polylines
+# same names, arguments and return values as the rs functions, so geometry_backend
+# can hand out either set, curves are Polyline objects instead of Rhino object ids
+# uses NumPy for the per-vertex work when it is installed, plain Python otherwise
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+# distance under which two points count as the same
+TOLERANCE = 1e-9
+
+
+# a point that works like a Rhino point (p.X, p.Y, p.Z) and like an (x, y, z) tuple
+class Point(tuple):
+	__slots__ = ()
+
+	def __new__(cls, x, y, z=0.0):
+		return tuple.__new__(cls, (float(x), float(y), float(z)))
+
+	X = property(lambda self: self[0])
+	Y = property(lambda self: self[1])
+	Z = property(lambda self: self[2])
+
+
+# a polyline curve, closed curves don't repeat their first point at the end
+# curve parameters run from 0 to the number of segments, segment i covers i to i+1
+class Polyline(object):
+
+	def __init__(self, points, closed=None):
+		points = [(float(p[0]), float(p[1]), float(p[2])) for p in points]
+		if (closed is None):
+			closed = len(points)>3 and pt.point_segment_distance(points[0], points[-1], points[-1])<=TOLERANCE
+		if (closed and len(points)>1 and pt.point_segment_distance(points[0], points[-1], points[-1])<=TOLERANCE):
+			points = points[:-1]
+		self.points = points
+		self.closed = bool(closed)
+		self.vertices = pt.closed_points(points, self.closed)
+		# length of the curve up to each vertex
+		self.cumulative = [0.0]
+		for i in range(1, len(self.vertices)):
+			a = self.vertices[i-1]
+			b = self.vertices[i]
+			self.cumulative.append(self.cumulative[-1]+math.sqrt((b[0]-a[0])**2+(b[1]-a[1])**2+(b[2]-a[2])**2))
+		if (np is not None):
+			self.array = np.array(self.vertices, dtype=float)
+
+	def __len__(self):
+		return len(self.points)
+
+	def length(self):
+		return self.cumulative[-1]
+
+	def segments(self):
+		return len(self.vertices)-1
+
+	# point at curve parameter t
+	def evaluate(self, t):
+		n = self.segments()
+		if (n<=0):
+			return Point(*self.vertices[0])
+		t = min(max(t, 0.0), float(n))
+		i = min(int(t), n-1)
+		u = t-i
+		a = self.vertices[i]
+		b = self.vertices[i+1]
+		return Point(a[0]+u*(b[0]-a[0]), a[1]+u*(b[1]-a[1]), a[2]+u*(b[2]-a[2]))
+
+	# point at distance s along the curve
+	def point_at_length(self, s):
+		cumulative = self.cumulative
+		i = bisect.bisect_right(cumulative, s)-1
+		i = min(max(i, 0), len(cumulative)-2)
+		segment_length = cumulative[i+1]-cumulative[i]
+		if (segment_length>0):
+			return self.evaluate(i+(s-cumulative[i])/segment_length)
+		return self.evaluate(i)
+
+	# parameter of the point on the curve closest to p
+	def closest_parameter(self, p):
+		if (self.segments()<=0):
+			return 0.0
+		if (np is not None):
+			a = self.array[:-1]
+			ab = self.array[1:]-a
+			ab2 = (ab*ab).sum(axis=1)
+			ap = np.array(p[:3], dtype=float)-a
+			u = np.where(ab2>0, (ap*ab).sum(axis=1)/np.where(ab2>0, ab2, 1.0), 0.0)
+			u = np.clip(u, 0.0, 1.0)
+			d = ap-ab*u[:, None]
+			i = int(np.argmin((d*d).sum(axis=1)))
+			return i+float(u[i])
+		best = 0.0
+		best_d2 = -1.0
+		vertices = self.vertices
+		px = p[0]
+		py = p[1]
+		pz = p[2]
+		for i in range(1, len(vertices)):
+			a = vertices[i-1]
+			b = vertices[i]
+			abx = b[0]-a[0]
+			aby = b[1]-a[1]
+			abz = b[2]-a[2]
+			ab2 = abx*abx+aby*aby+abz*abz
+			if (ab2>0):
+				u = ((px-a[0])*abx+(py-a[1])*aby+(pz-a[2])*abz)/ab2
+				if (u<0): u = 0.0
+				elif (u>1): u = 1.0
+			else:
+				u = 0.0
+			d2 = (a[0]+u*abx-px)**2+(a[1]+u*aby-py)**2+(a[2]+u*abz-pz)**2
+			if (best_d2<0 or d2<best_d2):
+				best = i-1+u
+				best_d2 = d2
+		return best
+
+	# signed area in the XY plane, positive for counterclockwise curves
+	def signed_area(self):
+		points = self.points
+		area = 0.0
+		for i in range(len(points)):
+			a = points[i-1]
+			b = points[i]
+			area += a[0]*b[1]-b[0]*a[1]
+		return area/2
+
+
+def coerce_curve(curve):
+	if (isinstance(curve, Polyline)):
+		return curve
+	return Polyline(curve)
+
+###################################################################
+# rhinoscriptsyntax functions
+###################################################################
+
+# a curve through points, closed if the last point repeats the first
+def AddPolyline(points, replace_id=None):
+	return Polyline(points)
+
+def IsCurveClosed(curve):
+	return coerce_curve(curve).closed
+
+def CurveLength(curve):
+	return coerce_curve(curve).length()
+
+# segments points for a closed curve, segments+1 for an open one
+def DivideCurve(curve, segments):
+	curve = coerce_curve(curve)
+	segments = int(segments)
+	if (segments<=0):
+		return None
+	length = curve.length()
+	if (curve.closed):
+		number = segments
+	else:
+		number = segments+1
+	if (np is not None and curve.segments()>0):
+		s = np.arange(number)*(length/segments)
+		cumulative = np.array(curve.cumulative)
+		i = np.clip(np.searchsorted(cumulative, s, side='right')-1, 0, len(cumulative)-2)
+		segment_length = cumulative[i+1]-cumulative[i]
+		u = np.clip(np.where(segment_length>0, (s-cumulative[i])/np.where(segment_length>0, segment_length, 1.0), 0.0), 0.0, 1.0)
+		a = curve.array[i]
+		points = a+(curve.array[i+1]-a)*u[:, None]
+		return [Point(p[0], p[1], p[2]) for p in points.tolist()]
+	return [curve.point_at_length(j*length/segments) for j in range(number)]
+
+# points distance apart along the curve, starting at the start of the curve
+def DivideCurveEquidistant(curve, distance):
+	curve = coerce_curve(curve)
+	if (distance<=0):
+		return None
+	length = curve.length()
+	count = int(length/distance+TOLERANCE)
+	return [curve.point_at_length(j*distance) for j in range(count+1)]
+
+def CurveClosestPoint(curve, test_point):
+	return coerce_curve(curve).closest_parameter(test_point)
+
+def EvaluateCurve(curve, t):
+	return coerce_curve(curve).evaluate(t)
+
+# [area, error] for a closed curve, None for an open one
+def CurveArea(curve):
+	curve = coerce_curve(curve)
+	if not(curve.closed):
+		return None
+	return [abs(curve.signed_area()), 0.0]
+
+# [centroid, error] for a closed curve, None for an open one
+def CurveAreaCentroid(curve):
+	curve = coerce_curve(curve)
+	if not(curve.closed):
+		return None
+	points = curve.points
+	area = curve.signed_area()
+	if (area==0):
+		n = float(len(points))
+		return [Point(sum([p[0] for p in points])/n, sum([p[1] for p in points])/n, sum([p[2] for p in points])/n), 0.0]
+	cx = 0.0
+	cy = 0.0
+	for i in range(len(points)):
+		a = points[i-1]
+		b = points[i]
+		cross = a[0]*b[1]-b[0]*a[1]
+		cx += (a[0]+b[0])*cross
+		cy += (a[1]+b[1])*cross
+	z = sum([p[2] for p in points])/len(points)
+	return [Point(cx/(6*area), cy/(6*area), z), 0.0]
+
+# 0 if point is outside curve, 1 if inside, 2 if on it (in the XY plane)
+def PointInPlanarClosedCurve(point, curve, plane=None, tolerance=None):
+	curve = coerce_curve(curve)
+	if (tolerance is None):
+		tolerance = 1e-6
+	x = point[0]
+	y = point[1]
+	flat = (x, y, 0.0)
+	inside = False
+	vertices = curve.vertices
+	for i in range(1, len(vertices)):
+		a = vertices[i-1]
+		b = vertices[i]
+		if (pt.point_segment_distance(flat, (a[0], a[1], 0.0), (b[0], b[1], 0.0))<=tolerance):
+			return 2
+		if ((a[1]>y)!=(b[1]>y)):
+			if (x<a[0]+(y-a[1])*(b[0]-a[0])/(b[1]-a[1])):
+				inside = not(inside)
+	if (inside):
+		return 1
+	return 0
+
+# offsets the curve by distance in its XY plane, to the side of direction
+# (a negative distance goes to the other side), returns a list with the new curve
+# corners are mitered, like OffsetCurve with a sharp corner style
+def OffsetCurve(curve, direction, distance, normal=None, style=1):
+	curve = coerce_curve(curve)
+	vertices = curve.vertices
+	if (len(vertices)<2):
+		return None
+	t = curve.closest_parameter(direction)
+	i = min(int(t), curve.segments()-1)
+	a = vertices[i]
+	b = vertices[i+1]
+	cross = (b[0]-a[0])*(direction[1]-a[1])-(b[1]-a[1])*(direction[0]-a[0])
+	if (cross<0):
+		distance = -distance
+	# distance is now towards the left of the curve
+	points = curve.points
+	n = len(points)
+	normals = []
+	for j in range(len(vertices)-1):
+		a = vertices[j]
+		b = vertices[j+1]
+		dx = b[0]-a[0]
+		dy = b[1]-a[1]
+		d = math.sqrt(dx*dx+dy*dy)
+		if (d>0):
+			normals.append((-dy/d, dx/d))
+		elif (normals):
+			normals.append(normals[-1])
+		else:
+			normals.append((0.0, 0.0))
+	offset = []
+	for j in range(n):
+		if (curve.closed):
+			n0 = normals[j-1]
+			n1 = normals[j]
+		else:
+			n0 = normals[max(j-1, 0)]
+			n1 = normals[min(j, len(normals)-1)]
+		mx = n0[0]+n1[0]
+		my = n0[1]+n1[1]
+		m2 = mx*mx+my*my
+		if (m2>TOLERANCE):
+			# miter, the offset lines of both segments meet at this point
+			scale = 2*distance/m2
+			offset.append((points[j][0]+mx*scale, points[j][1]+my*scale, points[j][2]))
+		else:
+			offset.append((points[j][0]+n1[0]*distance, points[j][1]+n1[1]*distance, points[j][2]))
+	return [Polyline(offset, curve.closed)]
+
+# points and vectors, as Point tuples
+
+def CreatePoint(point, y=None, z=None):
+	if (y is not None):
+		if (z is None):
+			z = 0.0
+		return Point(point, y, z)
+	if (len(point)==2):
+		return Point(point[0], point[1])
+	return Point(point[0], point[1], point[2])
+
+# there is no document to add to, so AddPoint is CreatePoint
+def AddPoint(point, y=None, z=None):
+	return CreatePoint(point, y, z)
+
+def Distance(point1, point2):
+	return math.sqrt((point1[0]-point2[0])**2+(point1[1]-point2[1])**2+(point1[2]-point2[2])**2)
+
+def VectorSubtract(vector1, vector2):
+	return Point(vector1[0]-vector2[0], vector1[1]-vector2[1], vector1[2]-vector2[2])
+
+# angle between two vectors in degrees
+def VectorAngle(vector1, vector2):
+	return pt.vector_angle(vector1, vector2)
+
+def IsMesh(object_id):
+	return False
+
+# curves
+
+def AddLine(start, end):
+	return Polyline([start, end], False)
+
+def IsPolyline(curve, segment_index=-1):
+	return isinstance(curve, Polyline)
+
+# the vertices, a closed polyline repeats its first one at the end
+def PolylineVertices(curve, segment_index=-1):
+	return [Point(*p) for p in coerce_curve(curve).vertices]
+
+# the inner vertices where the polyline changes direction, every style of
+# continuity breaks at a kink, and there are no other breaks in a polyline
+def CurveDiscontinuity(curve, style):
+	curve = coerce_curve(curve)
+	points = curve.points
+	if (curve.closed):
+		corners = range(1, len(points))
+	else:
+		corners = range(1, len(points)-1)
+	kinks = []
+	for i in corners:
+		a = points[i-1]
+		b = points[i]
+		c = points[(i+1)%len(points)]
+		if (pt.point_segment_distance(b, a, c)>TOLERANCE):
+			kinks.append(Point(*b))
+	return kinks
+
+# a curve through the control points, as a polyline through them
+def AddCurve(points, degree=3):
+	return Polyline(points)
+
+def CloseCurve(curve, tolerance=-1.0):
+	curve = coerce_curve(curve)
+	return Polyline(curve.points, True)
+
+# reverses the curve in place, like rs.ReverseCurve
+def ReverseCurve(curve):
+	reverse = Polyline(list(reversed(curve.points)), curve.closed)
+	curve.__dict__.update(reverse.__dict__)
+	return True
+
+# closed, or an open curve whose ends are within tolerance of each other and that
+# is longer than ten times that gap
+def IsCurveClosable(curve, tolerance=None):
+	curve = coerce_curve(curve)
+	if (curve.closed):
+		return True
+	if (tolerance is None):
+		tolerance = 0.002
+	points = curve.points
+	if (len(points)<3):
+		return False
+	gap = Distance(points[0], points[-1])
+	return gap<=tolerance and curve.length()>10*gap
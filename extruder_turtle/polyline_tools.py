@@ -0,0 +1,220 @@
+import math
+
+# small helpers for polylines given as lists of (x, y, z) tuples
+# no Rhino calls, so they can run on history rows before any geometry is made
+
+# distance from point p to the segment a-b
+def point_segment_distance(p, a, b):
+	abx = b[0]-a[0]
+	aby = b[1]-a[1]
+	abz = b[2]-a[2]
+	apx = p[0]-a[0]
+	apy = p[1]-a[1]
+	apz = p[2]-a[2]
+	ab2 = abx*abx+aby*aby+abz*abz
+	if (ab2==0):
+		return math.sqrt(apx*apx+apy*apy+apz*apz)
+	u = (apx*abx+apy*aby+apz*abz)/ab2
+	if (u<0): u = 0.0
+	elif (u>1): u = 1.0
+	dx = apx-u*abx
+	dy = apy-u*aby
+	dz = apz-u*abz
+	return math.sqrt(dx*dx+dy*dy+dz*dz)
+
+# Douglas-Peucker simplification, keeps the first and last points
+# no dropped point is further than tolerance from the simplified polyline
+def simplify(points, tolerance):
+	n = len(points)
+	if (n<3 or tolerance<=0):
+		return list(points)
+	keep = [False]*n
+	keep[0] = True
+	keep[n-1] = True
+	stack = [(0, n-1)]
+	while stack:
+		first, last = stack.pop()
+		a = points[first]
+		b = points[last]
+		max_distance = 0.0
+		index = first
+		for i in range(first+1, last):
+			d = point_segment_distance(points[i], a, b)
+			if (d>max_distance):
+				max_distance = d
+				index = i
+		if (max_distance>tolerance):
+			keep[index] = True
+			stack.append((first, index))
+			stack.append((index, last))
+	return [points[i] for i in range(n) if keep[i]]
+
+# split a sequence into lists of at most size items
+def chunks(items, size):
+	chunk = []
+	for item in items:
+		chunk.append(item)
+		if (len(chunk)>=size):
+			yield chunk
+			chunk = []
+	if chunk:
+		yield chunk
+
+# vertices of a polyline, with the first point repeated at the end if it is closed
+def closed_points(points, closed):
+	if (closed and len(points)>1 and tuple(points[0])!=tuple(points[-1])):
+		return list(points)+[points[0]]
+	return list(points)
+
+def polyline_length(points, closed=False):
+	points = closed_points(points, closed)
+	length = 0.0
+	for i in range(1, len(points)):
+		a = points[i-1]
+		b = points[i]
+		length += math.sqrt((b[0]-a[0])**2+(b[1]-a[1])**2+(b[2]-a[2])**2)
+	return length
+
+# points spaced evenly along the polyline, like rs.DivideCurve(curve, count):
+# count points for a closed polyline, count+1 (both ends included) for an open one
+def divide_polyline(points, count, closed=False):
+	points = closed_points(points, closed)
+	if (count<=0 or len(points)<2):
+		return []
+	total = polyline_length(points)
+	if (closed):
+		number = count
+	else:
+		number = count+1
+	step = total/count
+	result = []
+	segment = 1
+	covered = 0.0 # length of the polyline before segment
+	a = points[0]
+	b = points[1]
+	segment_length = math.sqrt((b[0]-a[0])**2+(b[1]-a[1])**2+(b[2]-a[2])**2)
+	for i in range(number):
+		target = i*step
+		while (covered+segment_length<target and segment<len(points)-1):
+			covered += segment_length
+			segment += 1
+			a = points[segment-1]
+			b = points[segment]
+			segment_length = math.sqrt((b[0]-a[0])**2+(b[1]-a[1])**2+(b[2]-a[2])**2)
+		if (segment_length>0):
+			u = min(max((target-covered)/segment_length, 0.0), 1.0)
+		else:
+			u = 0.0
+		result.append((a[0]+u*(b[0]-a[0]), a[1]+u*(b[1]-a[1]), a[2]+u*(b[2]-a[2])))
+	return result
+
+# closest point to (px, py, pz) on the segment a-b, as (squared distance, u), the point is a+u*(b-a)
+def segment_closest_point(a, b, px, py, pz):
+	abx = b[0]-a[0]
+	aby = b[1]-a[1]
+	abz = b[2]-a[2]
+	ab2 = abx*abx+aby*aby+abz*abz
+	if (ab2>0):
+		u = ((px-a[0])*abx+(py-a[1])*aby+(pz-a[2])*abz)/ab2
+		if (u<0): u = 0.0
+		elif (u>1): u = 1.0
+	else:
+		u = 0.0
+	qx = a[0]+u*abx
+	qy = a[1]+u*aby
+	qz = a[2]+u*abz
+	return (qx-px)**2+(qy-py)**2+(qz-pz)**2, u
+
+# point at curve parameter t of the polyline through points (closed ones repeat their first point),
+# segment i covers i to i+1, worked out the same way as polyline_geometry's EvaluateCurve
+def evaluate_polyline(points, t):
+	n = len(points)-1
+	if (n<=0):
+		return tuple(points[0])
+	t = min(max(t, 0.0), float(n))
+	i = min(int(t), n-1)
+	u = t-i
+	a = points[i]
+	b = points[i+1]
+	return (a[0]+u*(b[0]-a[0]), a[1]+u*(b[1]-a[1]), a[2]+u*(b[2]-a[2]))
+
+# closest point to p on the polyline, the same as gb.EvaluateCurve(curve, gb.CurveClosestPoint(curve, p))
+# on a polyline_geometry curve through the points
+def closest_point(points, p, closed=False):
+	points = closed_points(points, closed)
+	if (len(points)==1):
+		return tuple(points[0])
+	best = None
+	best_d2 = -1.0
+	for i in range(1, len(points)):
+		d2, u = segment_closest_point(points[i-1], points[i], p[0], p[1], p[2])
+		if (best is None or d2<best_d2):
+			best = i-1+u
+			best_d2 = d2
+	return evaluate_polyline(points, best)
+
+# closest points on the polyline to each point of ps, the same as closest_point for each one
+# the segments are bucketed in a grid of square cells (in x and y) about a segment long,
+# each point measures the segments in the cells around it, ring by ring, until every
+# segment it hasn't measured is further away than the closest one found
+def closest_points(points, ps, closed=False):
+	points = closed_points(points, closed)
+	if (len(points)<3 or len(ps)<2):
+		return [closest_point(points, p) for p in ps]
+	cell = max(polyline_length(points)/(len(points)-1), 1e-9)
+	grid = {}
+	for i in range(1, len(points)):
+		a = points[i-1]
+		b = points[i]
+		for gx in range(int(math.floor(min(a[0], b[0])/cell)), int(math.floor(max(a[0], b[0])/cell))+1):
+			for gy in range(int(math.floor(min(a[1], b[1])/cell)), int(math.floor(max(a[1], b[1])/cell))+1):
+				grid.setdefault((gx, gy), []).append(i)
+	gx0 = min([key[0] for key in grid])
+	gx1 = max([key[0] for key in grid])
+	gy0 = min([key[1] for key in grid])
+	gy1 = max([key[1] for key in grid])
+	result = []
+	for p in ps:
+		px = p[0]
+		py = p[1]
+		pz = p[2]
+		cx = int(math.floor(px/cell))
+		cy = int(math.floor(py/cell))
+		best = None
+		best_i = 0
+		best_d2 = -1.0
+		# the rings closer than the grid are empty
+		r = max(gx0-cx, cx-gx1, gy0-cy, cy-gy1, 0)
+		while True:
+			cells = []
+			for gx in range(max(cx-r, gx0), min(cx+r, gx1)+1):
+				cells.append((gx, cy-r))
+				if (r>0):
+					cells.append((gx, cy+r))
+			for gy in range(max(cy-r+1, gy0), min(cy+r-1, gy1)+1):
+				cells.append((cx-r, gy))
+				cells.append((cx+r, gy))
+			for key in cells:
+				for i in grid.get(key, ()):
+					d2, u = segment_closest_point(points[i-1], points[i], px, py, pz)
+					# ties go to the first segment, as in closest_point
+					if (best is None or d2<best_d2 or (d2==best_d2 and i<best_i)):
+						best = i-1+u
+						best_i = i
+						best_d2 = d2
+			if (best is not None and best_d2<(r*cell)**2):
+				break
+			if (cx-r<=gx0 and cx+r>=gx1 and cy-r<=gy0 and cy+r>=gy1):
+				break
+			r += 1
+		result.append(evaluate_polyline(points, best))
+	return result
+
+# angle in degrees between two vectors, 0 if either has no length
+def vector_angle(v0, v1):
+	n0 = math.sqrt(v0[0]**2+v0[1]**2+v0[2]**2)
+	n1 = math.sqrt(v1[0]**2+v1[1]**2+v1[2]**2)
+	if (n0==0 or n1==0):
+		return 0.0
+	c = (v0[0]*v1[0]+v0[1]*v1[1]+v0[2]*v1[2])/(n0*n1)
+	return math.degrees(math.acos(min(max(c, -1.0), 1.0)))
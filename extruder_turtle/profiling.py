@@ -0,0 +1,266 @@
+import sys
+import json
+import time
+import threading
+import gcode_writer as gw
+
+# opt in timing of the slicer's stages, for finding where a slow slice spends its time
+# with t.profile() as p:
+#     ws.weave_slice_turtle(t, shape, ...)
+# p.report()
+# p.save_trace("slice.json")
+# while a Profiler is active the functions in STAGES are replaced on their modules with timing
+# wrappers and the turtle writes through a sink that counts and times the G-code, on the way out
+# everything is put back, so when no Profiler is active nothing is wrapped and slicing costs the same
+# callers look stage functions up on their module when they call them (su.slice_shape, or a
+# global name in the module itself), which is what lets the wrappers see every call
+# each stage is filed under the layer the turtle is on when it starts, its z height
+# traces open in chrome://tracing or ui.perfetto.dev
+# worker processes (lp.plan_weave_layers with workers) are not timed inside, only as one stage
+
+# (module, function, stage name) of every function timed
+STAGES = (
+	("slicer_utilities", "slice_shape", "slice_shape"),
+	("slicer_utilities", "slice_mesh_shape", "slice_shape"),
+	("slicer_utilities", "slice_shape_at_heights", "slice_shape"),
+	("slicer_utilities", "adaptive_heights", "adaptive_heights"),
+	("slicer_utilities", "get_offset_curves", "offsets"),
+	("slicer_utilities", "find_walls", "offsets"),
+	("slicer_utilities", "branch_order", "ordering"),
+	("slicer_utilities", "follow_curve", "follow_curve"),
+	("weave_slicer", "find_points_and_angles", "find_points_and_angles"),
+	("layer_pipeline", "find_points_and_angles", "find_points_and_angles"),
+	("layer_pipeline", "plan_weave_layers", "plan_weave_layers"),
+	("weave_slicer", "weave_points_and_angles", "weave_points_and_angles"),
+	("weave_slicer", "weave_points_and_angles_pattern", "weave_points_and_angles"),
+	("turtle_utilities", "spiral_bottom", "bottom"),
+	("turtle_utilities", "zig_zag_bottom", "bottom"),
+)
+# G-code writes shorter than this (seconds) go into the totals but not into the trace one by one,
+# so the trace holds the flushes to the file and not every move
+MIN_WRITE_SPAN = 0.0001
+# layers listed in the summary, slowest first
+LAYERS_SHOWN = 10
+
+
+# the modules a stage's module is loaded as, only ones already imported are wrapped
+def loaded_modules(name):
+	modules = []
+	for full_name in (name, "extruder_turtle." + name):
+		module = sys.modules.get(full_name)
+		if (module is not None and module not in modules):
+			modules.append(module)
+	return modules
+
+# the sink at the end of a chain of filter sinks, the one that formats and writes
+def innermost_sink(sink):
+	while isinstance(sink, gw.FilterSink):
+		sink = sink.sink
+	return sink
+
+
+# passes the turtle's G-code on unchanged, counting it and timing the writes
+# formatting and writing to the file happen inside these calls, when a batch fills up
+class ProfilingSink(gw.FilterSink):
+
+	name = "profile"
+
+	def __init__(self, sink, profiler):
+		gw.FilterSink.__init__(self, sink)
+		self.profiler = profiler
+		self.writes = 0
+
+	def write(self, text):
+		self.writes += 1
+		self.profiler.begin()
+		start = time.time()
+		self.sink.write(text)
+		self.profiler.end("write", start, MIN_WRITE_SPAN)
+
+	def move(self, code, values):
+		self.moves_in += 1
+		self.moves_out += 1
+		self.profiler.begin()
+		start = time.time()
+		self.sink.move(code, values)
+		self.profiler.end("write", start, MIN_WRITE_SPAN)
+
+	def flush(self):
+		self.profiler.begin()
+		start = time.time()
+		self.sink.flush()
+		self.profiler.end("write", start)
+
+	def close(self):
+		self.profiler.begin()
+		start = time.time()
+		self.sink.close()
+		self.profiler.end("write", start)
+
+
+# times stages while it is active, as a with block or between start() and stop()
+class Profiler(object):
+
+	def __init__(self, turtle=None):
+		self.turtle = turtle
+		# traced spans, (stage, z, thread, start, seconds)
+		self.spans = []
+		# {(stage, z): [calls, seconds, self seconds]}, self time leaves out the stages called inside
+		self.totals = {}
+		# {thread: [seconds spent in the stages called by each open stage]}
+		self.stacks = {}
+		self.saved = []
+		self.sink = None
+		self.target = None
+		self.start_bytes = 0
+		self.moves = 0
+		self.writes = 0
+		self.bytes = 0
+		self.started = None
+		self.seconds = 0.0
+
+	def __enter__(self):
+		self.start()
+		return self
+
+	def __exit__(self, *exc):
+		self.stop()
+		return False
+
+	def start(self):
+		if (self.saved):
+			return
+		for module_name, function_name, stage in STAGES:
+			for module in loaded_modules(module_name):
+				function = getattr(module, function_name, None)
+				if (function is None):
+					continue
+				self.saved.append((module, function_name, function))
+				setattr(module, function_name, self.timing(stage, function))
+		if (self.turtle is not None):
+			self.sink = ProfilingSink(self.turtle.sink, self)
+			self.target = innermost_sink(self.turtle.sink)
+			self.start_bytes = self.target.bytes_written
+			if (self.turtle.out_file is self.turtle.sink):
+				self.turtle.out_file = self.sink
+			self.turtle.sink = self.sink
+		self.started = time.time()
+
+	def stop(self):
+		if (self.started is None):
+			return
+		self.seconds += time.time()-self.started
+		self.started = None
+		for module, function_name, function in reversed(self.saved):
+			setattr(module, function_name, function)
+		self.saved = []
+		if (self.sink is not None):
+			# formats what is queued so the byte count is complete, the text written is the same
+			self.target.flush_pending()
+			self.moves += self.sink.moves_in
+			self.writes += self.sink.writes
+			self.bytes += self.target.bytes_written-self.start_bytes
+			if (self.turtle.sink is self.sink):
+				if (self.turtle.out_file is self.sink):
+					self.turtle.out_file = self.sink.sink
+				self.turtle.sink = self.sink.sink
+			self.sink = None
+
+	def timing(self, stage, function):
+		def timed(*args, **kwargs):
+			self.begin()
+			start = time.time()
+			try:
+				return function(*args, **kwargs)
+			finally:
+				self.end(stage, start)
+		return timed
+
+	def begin(self):
+		thread = threading.current_thread().ident
+		stack = self.stacks.get(thread)
+		if (stack is None):
+			stack = self.stacks[thread] = []
+		stack.append(0.0)
+
+	# closes the stage begun last on this thread, tracing it if it took at least min_span seconds
+	def end(self, stage, start, min_span=0.0):
+		seconds = time.time()-start
+		thread = threading.current_thread().ident
+		stack = self.stacks[thread]
+		inner = stack.pop()
+		if (stack):
+			stack[-1] += seconds
+		z = self.layer()
+		total = self.totals.get((stage, z))
+		if (total is None):
+			total = self.totals[(stage, z)] = [0, 0.0, 0.0]
+		total[0] += 1
+		total[1] += seconds
+		total[2] += seconds-inner
+		if (seconds>=min_span):
+			self.spans.append((stage, z, thread, start, seconds))
+
+	# the layer work is filed under, the turtle's height
+	def layer(self):
+		if (self.turtle is None):
+			return None
+		return round(self.turtle.z, 4)
+
+	# {stage: [calls, seconds, self seconds]} over all layers
+	def stage_totals(self):
+		stages = {}
+		for (stage, z), total in self.totals.items():
+			if (stage not in stages):
+				stages[stage] = [0, 0.0, 0.0]
+			for i in range(3):
+				stages[stage][i] += total[i]
+		return stages
+
+	# {z: {stage: self seconds}}
+	def layer_totals(self):
+		layers = {}
+		for (stage, z), total in self.totals.items():
+			if (z not in layers):
+				layers[z] = {}
+			layers[z][stage] = total[2]
+		return layers
+
+	def summary(self):
+		lines = ["profile: " +str(round(self.seconds,3)) + " s, " +str(self.moves) + " moves, " +str(self.writes) + " writes, " +str(self.bytes) + " bytes"]
+		stages = self.stage_totals()
+		lines.append("%-26s %8s %10s %10s" % ("stage", "calls", "total s", "self s"))
+		for stage in sorted(stages, key=lambda s: -stages[s][2]):
+			calls, seconds, self_seconds = stages[stage]
+			lines.append("%-26s %8d %10.3f %10.3f" % (stage, calls, seconds, self_seconds))
+		layers = self.layer_totals()
+		if (len(layers)>1):
+			lines.append("slowest layers:")
+			slowest = sorted(layers, key=lambda z: -sum(layers[z].values()))
+			for z in slowest[:LAYERS_SHOWN]:
+				parts = sorted(layers[z].items(), key=lambda item: -item[1])
+				lines.append("z=" +str(z) + ": " +str(round(sum(layers[z].values()),3)) + " s (" + ", ".join([stage + " " +str(round(seconds,3)) for stage, seconds in parts]) + ")")
+		return "\n".join(lines)
+
+	def report(self):
+		print(self.summary())
+
+	# the spans as Chrome trace events, times in microseconds from the first span
+	def chrome_trace(self):
+		events = []
+		origin = min([span[3] for span in self.spans] or [0.0])
+		threads = {}
+		for stage, z, thread, start, seconds in self.spans:
+			if (thread not in threads):
+				threads[thread] = len(threads)
+			events.append({"name": stage, "cat": "slicer", "ph": "X", "pid": 1, "tid": threads[thread],
+				"ts": int((start-origin)*1e6), "dur": int(seconds*1e6), "args": {"z": z}})
+		return {"traceEvents": events, "displayTimeUnit": "ms",
+			"otherData": {"seconds": self.seconds, "moves": self.moves, "writes": self.writes, "bytes": self.bytes}}
+
+	def save_trace(self, filename):
+		file = open(filename, 'w')
+		try:
+			json.dump(self.chrome_trace(), file)
+		finally:
+			file.close()
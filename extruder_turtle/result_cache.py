@@ -0,0 +1,170 @@
+import os
+import pickle
+import hashlib
+import tempfile
+
+# disk backed cache of slicing results, so a Grasshopper recompute only redoes the stages
+# whose inputs changed
+# a result is stored under a key made by stable_hash from everything the stage depends on,
+# the slicers chain the keys: slices are keyed by the shape's geometry and the layer height,
+# each layer's weave plan by the slices' key and the weave parameters, and the G-code of each layer by
+# its plan, the parameters that only change some layers (bottom_layers, skin_layers),
+# the printer and the turtle's state when the layer starts
+# so moving the wavelength slider reuses the slices, changing bottom_layers only writes
+# the bottom layers again, and nothing is reused once the shape itself changes
+# each result is one pickle file in directory, named by its key, and the files used least
+# recently are removed once they add up to more than max_bytes
+# the slicers use the module's cache unless given another one, cache.clear() empties it
+
+# 200 MB
+DEFAULT_MAX_BYTES = 200*1024*1024
+DEFAULT_DIRECTORY = os.path.join(tempfile.gettempdir(), "extruder_turtle_cache")
+SUFFIX = ".pickle"
+# decimal places of the turtle state in layer keys
+STATE_DIGITS = 9
+
+
+# the same text for equal values, on every run
+# numbers are compared as floats (1 and 1.0 are the same), points as (x, y, z)
+def canonical(value):
+	if (value is None or isinstance(value, bool)):
+		return repr(value)
+	if (isinstance(value, (int, float))):
+		return repr(float(value))
+	if (isinstance(value, str)):
+		return repr(value)
+	if (isinstance(value, dict)):
+		return "{" +",".join([canonical(k) +":" +canonical(value[k]) for k in sorted(value)]) +"}"
+	if (isinstance(value, (list, tuple))):
+		return "[" +",".join([canonical(item) for item in value]) +"]"
+	if (hasattr(value, "X") and hasattr(value, "Y") and hasattr(value, "Z")):
+		return canonical((value.X, value.Y, value.Z))
+	return repr(value)
+
+# hex key for a stage's inputs, e.g. stable_hash("slices", shape_key, layer_height)
+def stable_hash(*parts):
+	return hashlib.sha1(canonical(parts).encode("utf-8")).hexdigest()
+
+
+# value with every float rounded to digits places, for keys made from a turtle's state:
+# the same point reached along another path can differ in the last bits of its heading
+def rounded(value, digits=STATE_DIGITS):
+	if (isinstance(value, float)):
+		return round(value, digits)+0.0 # no -0.0
+	if (isinstance(value, dict)):
+		return dict([(k, rounded(value[k], digits)) for k in value])
+	if (isinstance(value, (list, tuple))):
+		return [rounded(item, digits) for item in value]
+	return value
+
+
+class ResultCache(object):
+
+	def __init__(self, directory=DEFAULT_DIRECTORY, max_bytes=DEFAULT_MAX_BYTES):
+		self.directory = directory
+		self.max_bytes = max_bytes
+		self.hits = {} # stage -> count
+		self.misses = {}
+
+	def path(self, key):
+		return os.path.join(self.directory, key+SUFFIX)
+
+	# the result stored under key, or None, stage names the count it goes in for report
+	def get(self, key, stage="result"):
+		path = self.path(key)
+		try:
+			with open(path, "rb") as file:
+				value = pickle.load(file)
+		except (IOError, OSError, EOFError, pickle.UnpicklingError):
+			self.misses[stage] = self.misses.get(stage, 0)+1
+			return None
+		try:
+			os.utime(path, None) # most recently used
+		except OSError:
+			pass
+		self.hits[stage] = self.hits.get(stage, 0)+1
+		return value
+
+	# stores value (plain data) under key, then removes the oldest results over max_bytes
+	def put(self, key, value):
+		if not(os.path.isdir(self.directory)):
+			os.makedirs(self.directory)
+		path = self.path(key)
+		temp_path = path+".tmp"
+		with open(temp_path, "wb") as file:
+			pickle.dump(value, file, 2)
+		if (os.path.exists(path)):
+			os.remove(path)
+		os.rename(temp_path, path)
+		self.evict()
+
+	# the result of make() stored under key, made only when it isn't stored yet
+	def stage(self, stage, key, make):
+		value = self.get(key, stage)
+		if (value is None):
+			value = make()
+			self.put(key, value)
+		return value
+
+	# runs make() to write one layer with turtle t, or replays the layer stored under key
+	# the layer is recorded from the turtle's state when it starts (part of its key, rounded),
+	# so it is only replayed where the layer before it ended the same way, otherwise it is made again
+	# returns make()'s result, or None when the layer was replayed
+	def layer(self, t, key, make):
+		key = stable_hash(key, rounded(t.save_state()))
+		block = self.get(key, "layers")
+		if (block is not None):
+			t.replay(block)
+			return None
+		recording = t.start_recording()
+		result = make()
+		self.put(key, t.stop_recording(recording))
+		return result
+
+	# (last used, size, path) of every stored result, oldest first
+	def entries(self):
+		if not(os.path.isdir(self.directory)):
+			return []
+		entries = []
+		for name in os.listdir(self.directory):
+			if (name.endswith(SUFFIX)):
+				path = os.path.join(self.directory, name)
+				try:
+					entries.append((os.path.getmtime(path), os.path.getsize(path), path))
+				except OSError:
+					pass
+		entries.sort()
+		return entries
+
+	def size(self):
+		return sum([entry[1] for entry in self.entries()])
+
+	def evict(self):
+		entries = self.entries()
+		total = sum([entry[1] for entry in entries])
+		for last_used, size, path in entries:
+			if (total<=self.max_bytes):
+				break
+			try:
+				os.remove(path)
+			except OSError:
+				pass
+			total -= size
+
+	def clear(self):
+		for last_used, size, path in self.entries():
+			try:
+				os.remove(path)
+			except OSError:
+				pass
+		self.hits = {}
+		self.misses = {}
+
+	def report(self):
+		for stage in sorted(set(self.hits)|set(self.misses)):
+			print(stage +": " +str(self.hits.get(stage, 0)) +" reused, " +str(self.misses.get(stage, 0)) +" computed")
+		print("cache size: " +str(round(self.size()/1048576.0, 2)) +" MB")
+
+
+# the cache the slicers use by default
+cache = ResultCache()
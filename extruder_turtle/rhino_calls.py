@@ -0,0 +1,144 @@
+import os
+import sys
+import time
+
+# counts the calls made to rhinoscriptsyntax, for finding and budgeting Rhino round trips
+# with rc.RhinoCallLog(t) as log:
+#     ws.weave_slice_turtle(shape, t, ...)
+# log.report()
+# while a log is active every function of the rs module is replaced with a wrapper that counts
+# its calls and time, by rs function, by the library function that called it and by layer (the
+# turtle's z height, when the log has a turtle), and the document objects the calls created
+# callers look functions up on the module (rs.AddLine), so replacing them there sees every call,
+# geometry_backend copies the rs functions it uses, so it is pointed at the wrappers too
+# on the way out everything is put back, nothing is wrapped when no log is active
+
+# functions with these prefixes look objects up, the ids they return aren't new objects
+QUERY_PREFIXES = ("All", "Get", "Object", "Selected", "Normal", "Hidden", "Locked", "LastCreated", "Invisible", "Is")
+# rows shown for each table of the summary, most expensive first
+ROWS_SHOWN = 15
+
+
+# the number of document object ids (Guids) in a result, one id or a list of them
+def object_count(result):
+	if (type(result).__name__=="Guid"):
+		return 1
+	if (isinstance(result, (list, tuple)) and result and type(result[0]).__name__=="Guid"):
+		return len(result)
+	return 0
+
+# the library function a call came from, "module.function"
+def caller_name(frame):
+	module = os.path.splitext(os.path.basename(frame.f_code.co_filename))[0]
+	return module + "." + frame.f_code.co_name
+
+def add(table, key, seconds, created):
+	row = table.get(key)
+	if (row is None):
+		row = table[key] = [0, 0.0, 0]
+	row[0] += 1
+	row[1] += seconds
+	row[2] += created
+
+
+class RhinoCallLog(object):
+
+	def __init__(self, turtle=None):
+		self.turtle = turtle
+		# each table holds [calls, seconds, objects created] rows
+		self.functions = {}
+		self.callers = {}
+		self.layers = {}
+		self.calls = 0
+		self.seconds = 0.0
+		self.created = 0
+		self.saved = {}
+
+	def __enter__(self):
+		self.install()
+		return self
+
+	def __exit__(self, *exc):
+		self.uninstall()
+		return False
+
+	def install(self):
+		if (self.saved):
+			return
+		import rhinoscriptsyntax as rs
+		for name in dir(rs):
+			function = getattr(rs, name)
+			if (name.startswith("_") or not(callable(function)) or isinstance(function, type)):
+				continue
+			self.saved[name] = function
+			setattr(rs, name, self.counting(name, function))
+		self.refresh_backend()
+
+	def uninstall(self):
+		if not(self.saved):
+			return
+		import rhinoscriptsyntax as rs
+		for name in self.saved:
+			setattr(rs, name, self.saved[name])
+		self.saved = {}
+		self.refresh_backend()
+
+	# points geometry_backend at the rs functions as they are now
+	def refresh_backend(self):
+		gb = sys.modules.get("geometry_backend")
+		if (gb is not None and gb.get_backend()=="rhino"):
+			gb.use_backend("rhino")
+
+	def counting(self, name, function):
+		creates = not(name.startswith(QUERY_PREFIXES))
+		def counted(*args, **kwargs):
+			start = time.time()
+			result = function(*args, **kwargs)
+			seconds = time.time()-start
+			created = 0
+			if (creates):
+				created = object_count(result)
+			self.record(name, seconds, sys._getframe(1), created)
+			return result
+		return counted
+
+	def record(self, name, seconds, frame, created):
+		self.calls += 1
+		self.seconds += seconds
+		self.created += created
+		add(self.functions, name, seconds, created)
+		add(self.callers, (caller_name(frame), name), seconds, created)
+		add(self.layers, self.layer(), seconds, created)
+
+	# the layer calls are filed under, the turtle's height
+	def layer(self):
+		if (self.turtle is None):
+			return None
+		return round(self.turtle.z, 4)
+
+	# {z: (calls, objects created)} of the layers over either budget
+	def over_budget(self, calls=None, created=None):
+		over = {}
+		for z in self.layers:
+			row = self.layers[z]
+			if ((calls is not None and row[0]>calls) or (created is not None and row[2]>created)):
+				over[z] = (row[0], row[2])
+		return over
+
+	def summary(self):
+		lines = ["Rhino calls: " +str(self.calls) + " calls, " +str(round(self.seconds,3)) + " s, " +str(self.created) + " objects created"]
+		tables = (("rs function", self.functions, str), ("caller -> rs function", self.callers, lambda key: key[0] + " -> " + key[1]))
+		for title, table, label in tables:
+			lines.append("%-50s %8s %10s %8s" % (title, "calls", "s", "objects"))
+			for key in sorted(table, key=lambda k: -table[k][1])[:ROWS_SHOWN]:
+				calls, seconds, created = table[key]
+				lines.append("%-50s %8d %10.3f %8d" % (label(key), calls, seconds, created))
+		if (len(self.layers)>1):
+			lines.append("busiest layers:")
+			for z in sorted(self.layers, key=lambda z: -self.layers[z][0])[:ROWS_SHOWN]:
+				calls, seconds, created = self.layers[z]
+				lines.append("z=" +str(z) + ": " +str(calls) + " calls, " +str(round(seconds,3)) + " s, " +str(created) + " objects created")
+		return "\n".join(lines)
+
+	def report(self):
+		print(self.summary())
@@ -0,0 +1,148 @@
+import math
+
+# rectilinear (zig zag) infill of slice polygons, without Rhino
+# all the scan lines are intersected with the polygon in one sweep: the edges are sorted
+# by their lowest point (the edge table), and moved into and out of the active edge list
+# as the scan line passes them, so each line only looks at the edges that cross it
+# the inside parts of the lines are then joined into boustrophedon paths, each path
+# goes back and forth across a region until the region ends or splits
+# polygons are lists of loops of (x, y, z) points, holes are inside loops (even-odd rule)
+# angle is the direction of the scan lines in degrees, counterclockwise from the x axis
+
+
+# turns points by -angle, so the scan lines run along the x axis
+def rotate(points, angle):
+	c = math.cos(math.radians(angle))
+	s = math.sin(math.radians(angle))
+	return [(p[0]*c+p[1]*s, -p[0]*s+p[1]*c) for p in points]
+
+# turns (x, y) back by angle
+def unrotate(x, y, angle):
+	c = math.cos(math.radians(angle))
+	s = math.sin(math.radians(angle))
+	return (x*c-y*s, x*s+y*c)
+
+# edges of the loops, (ylow, yhigh, x at ylow, dx/dy), sorted by ylow
+# horizontal edges never cross a scan line and are left out
+def edge_table(loops):
+	edges = []
+	for loop in loops:
+		for i in range(len(loop)):
+			a = loop[i-1]
+			b = loop[i]
+			if (a[1]==b[1]):
+				continue
+			if (a[1]>b[1]):
+				a, b = b, a
+			edges.append((a[1], b[1], a[0], float(b[0]-a[0])/(b[1]-a[1])))
+	edges.sort()
+	return edges
+
+# heights of the scan lines, spacing apart and centered between ymin and ymax
+def scan_heights(ymin, ymax, spacing):
+	count = int(math.floor((ymax-ymin)/spacing))
+	if (count<1):
+		return [(ymin+ymax)/2.0]
+	start = ymin+((ymax-ymin)-(count-1)*spacing)/2.0
+	return [start+k*spacing for k in range(count)]
+
+# the inside parts of every scan line, in the rotated plane
+# returns a list of (y, [(x0, x1), ...]), parts sorted by x
+# an edge crosses the lines with ylow <= y < yhigh, so a line through a vertex counts it once
+def scan_segments(loops, spacing):
+	edges = edge_table(loops)
+	if not(edges):
+		return []
+	ymin = edges[0][0]
+	ymax = max([e[1] for e in edges])
+	lines = []
+	active = []
+	next_edge = 0
+	for y in scan_heights(ymin, ymax, spacing):
+		while (next_edge<len(edges) and edges[next_edge][0]<=y):
+			active.append(edges[next_edge])
+			next_edge += 1
+		active = [e for e in active if e[1]>y]
+		xs = sorted([e[2]+(y-e[0])*e[3] for e in active])
+		parts = []
+		for i in range(0, len(xs)-1, 2):
+			if (xs[i+1]>xs[i]):
+				parts.append((xs[i], xs[i+1]))
+		lines.append((y, parts))
+	return lines
+
+def overlap(part0, part1):
+	return part0[0]<=part1[1] and part1[0]<=part0[1]
+
+# joins the scan line parts into paths
+# a part continues the path of the part below it when they are each other's only overlap,
+# otherwise (the region splits or merges) it starts a new path
+# returns a list of paths, each a list of (x0, x1, y) parts, in scan order
+def join_parts(lines):
+	paths = []
+	previous = []  # (part, path index) of the line below
+	for k in range(len(lines)):
+		y, parts = lines[k]
+		current = []
+		for part in parts:
+			below = [item for item in previous if overlap(item[0], part)]
+			path = None
+			if (len(below)==1):
+				above = [p for p in parts if overlap(below[0][0], p)]
+				if (len(above)==1):
+					path = below[0][1]
+			if (path is None):
+				path = len(paths)
+				paths.append([])
+			paths[path].append((part[0], part[1], y))
+			current.append((part, path))
+		previous = current
+	return paths
+
+# the zig zag paths filling the loops, as lists of (x, y, z) points
+# inset moves the ends of every scan line in from the edge
+def zig_zag_paths(loops, spacing, angle=0.0, inset=0.0):
+	loops = [loop for loop in loops if len(loop)>=3]
+	if not(loops):
+		return []
+	z = loops[0][0][2]
+	lines = scan_segments([rotate(loop, angle) for loop in loops], spacing)
+	if (inset):
+		lines = [(y, [(x0+inset, x1-inset) for x0, x1 in parts if x1-x0>2*inset]) for y, parts in lines]
+	paths = []
+	for parts in join_parts(lines):
+		points = []
+		for i in range(len(parts)):
+			x0, x1, y = parts[i]
+			if (i%2==1):
+				x0, x1 = x1, x0
+			points.append(unrotate(x0, y, angle)+(z,))
+			points.append(unrotate(x1, y, angle)+(z,))
+		paths.append(points)
+	return paths
+
+# puts the paths in the order to print them, each one starting from the end closest
+# to where the last one finished (nearest neighbor)
+def order_paths(paths, start=None):
+	remaining = list(paths)
+	ordered = []
+	position = start
+	while remaining:
+		best = 0
+		best_d2 = None
+		flip = False
+		for i in range(len(remaining)):
+			if (position is None):
+				break
+			for end, reverse in ((remaining[i][0], False), (remaining[i][-1], True)):
+				d2 = (end[0]-position[0])**2+(end[1]-position[1])**2
+				if (best_d2 is None or d2<best_d2):
+					best = i
+					best_d2 = d2
+					flip = reverse
+		path = remaining.pop(best)
+		if (flip):
+			path = path[::-1]
+		ordered.append(path)
+		position = path[-1]
+	return ordered
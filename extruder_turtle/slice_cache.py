@@ -0,0 +1,104 @@
+import geometry_backend as gb
+
+# cache of slice curve properties shared by the slicers
+# the slicers ask for the area, centroid, length, closedness and divided points
+# of the same slice curves many times per layer, each time a round trip to Rhino
+# values are keyed by the curve's id and kept until the curve is invalidated
+# call invalidate(curve) after changing a curve in place, or clear() to drop everything
+# (the slicer entry points clear the cache when they start)
+class SliceCache(object):
+
+	def __init__(self):
+		self.clear()
+
+	def clear(self):
+		self.areas = {}
+		self.centroids = {}
+		self.lengths = {}
+		self.closed = {}
+		self.divisions = {} # (curve, count) -> points
+		self.equidistant = {} # (curve, distance) -> points
+		self.shape_slices = {} # (shape, layer_height) -> slices
+		self.graphs = {} # (shape, layer_height) -> branch graph
+
+	def invalidate(self, curve):
+		self.areas.pop(curve, None)
+		self.centroids.pop(curve, None)
+		self.lengths.pop(curve, None)
+		self.closed.pop(curve, None)
+		for cache in (self.divisions, self.equidistant, self.shape_slices, self.graphs):
+			for key in [key for key in cache if key[0]==curve]:
+				del cache[key]
+
+	# same as rs.CurveArea, None for open curves
+	def area(self, curve):
+		if (curve in self.areas):
+			return self.areas[curve]
+		area = self.areas[curve] = gb.CurveArea(curve)
+		return area
+
+	# centroid point from rs.CurveAreaCentroid, None for open curves
+	def centroid(self, curve):
+		if (curve in self.centroids):
+			return self.centroids[curve]
+		result = gb.CurveAreaCentroid(curve)
+		if (result):
+			centroid = result[0]
+		else:
+			centroid = None
+		self.centroids[curve] = centroid
+		return centroid
+
+	def length(self, curve):
+		length = self.lengths.get(curve)
+		if (length is None):
+			length = self.lengths[curve] = gb.CurveLength(curve)
+		return length
+
+	def is_closed(self, curve):
+		closed = self.closed.get(curve)
+		if (closed is None):
+			closed = self.closed[curve] = gb.IsCurveClosed(curve)
+		return closed
+
+	# same as gb.DivideCurve(curve, count), returns a new list each time
+	def divide(self, curve, count):
+		key = (curve, count)
+		if (key in self.divisions):
+			points = self.divisions[key]
+		else:
+			points = self.divisions[key] = gb.DivideCurve(curve, count)
+		if (points is None):
+			return None
+		return list(points)
+
+	# same as gb.DivideCurveEquidistant(curve, distance)
+	def divide_equidistant(self, curve, distance):
+		key = (curve, distance)
+		if (key in self.equidistant):
+			points = self.equidistant[key]
+		else:
+			points = self.equidistant[key] = gb.DivideCurveEquidistant(curve, distance)
+		if (points is None):
+			return None
+		return list(points)
+
+	# slices of shape at layer_height, made with slice_function(shape, layer_height=...) the first time
+	def slices(self, shape, layer_height, slice_function):
+		key = (shape, layer_height)
+		shape_slices = self.shape_slices.get(key)
+		if (shape_slices is None):
+			shape_slices = self.shape_slices[key] = slice_function(shape, layer_height=layer_height)
+		return shape_slices
+
+	# branch graph of shape at layer_height, made with make_graph(shape_slices) the first time
+	def branch_graph(self, shape, layer_height, shape_slices, make_graph):
+		key = (shape, layer_height)
+		graph = self.graphs.get(key)
+		if (graph is None):
+			graph = self.graphs[key] = make_graph(shape_slices)
+		return graph
+
+
+# the cache shared by weave_slicer, slicer_utilities and pattern_slicing
+cache = SliceCache()
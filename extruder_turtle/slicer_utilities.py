@@ -1,14 +1,28 @@
-import Rhino.Geometry as geom
-import rhinoscriptsyntax as rs
+try:
+	import rhinoscriptsyntax as rs
+except ImportError:
+	# meshes slice without Rhino, surfaces need it
+	rs = None
 import ExtruderTurtle as e
+import slice_cache as sc
+import geometry_backend as gb
+import mesh_slicer as ms
+import branch_graph as bg
+import polygon_offset as po
+import adaptive_layers as al
+import path_ordering as pa
+import polyline_tools as pt
 import operator as op
 import math
 import random
 import extruder_turtle
 import pattern_slicing as ps
+import result_cache as rcache
 from extruder_turtle import *
 
 def slice_shape(shape, layer_height=1.0):
+	if (isinstance(shape, ms.TriangleMesh) or gb.IsMesh(shape)):
+		return slice_mesh_shape(shape, layer_height=layer_height)
 	bounding_box = rs.BoundingBox(shape)
 	slice_vector=(bounding_box[0], bounding_box[4])
 	shape_slices = rs.AddSrfContourCrvs(shape, slice_vector, interval=layer_height)
@@ -17,7 +31,7 @@ def slice_shape(shape, layer_height=1.0):
 	# makes sure slices are correctly ordered
 	zlist=[]
 	for i in range (len(shape_slices)):
-		points0 = rs.DivideCurve(shape_slices[i], 10)
+		points0 = gb.DivideCurve(shape_slices[i], 10)
 		zlist.append({"z":round(points0[0].Z,3),"x": round(points0[0].X,3),"y": round(points0[0].Y,3), "index": i})
 	zlist.sort(key=lambda item: item["y"])
 	zlist.sort(key=lambda item: item["x"])
@@ -57,77 +71,196 @@ def slice_shape(shape, layer_height=1.0):
 	print("layers: " +str(len(shape_slices_layer)))
 	return shape_slices_layer
 
+# slices a mesh with mesh_slicer, in one pass instead of contouring it in Rhino
+# shape is a Rhino mesh or a mesh_slicer.TriangleMesh
+# returns the same list of layers, each a list of branch curves, as slice_shape
+# heights (optional) are the slicing planes to use instead of one every layer_height
+def slice_mesh_shape(shape, layer_height=1.0, heights=None):
+	if not(isinstance(shape, ms.TriangleMesh)):
+		shape = ms.TriangleMesh(rs.MeshVertices(shape), rs.MeshFaceVertices(shape))
+	shape_slices = []
+	for layer in ms.slice_mesh(shape, layer_height, heights=heights):
+		curves = []
+		for points, closed in layer:
+			if (closed):
+				points = points+[points[0]]
+			curves.append(gb.AddPolyline(points))
+		shape_slices.append(curves)
+	return shape_slices
+
+# heights of the slicing planes for variable layers, from adaptive_layers
+# layers are at most layer_height and at least min_height tall (layer_height/4 by default)
+# meshes are measured by their face normals, other shapes by one set of thin cross sections
+def adaptive_heights(shape, layer_height=1.0, min_height=None):
+	if (min_height is None):
+		min_height = layer_height/4.0
+	if (isinstance(shape, ms.TriangleMesh) or gb.IsMesh(shape)):
+		if not(isinstance(shape, ms.TriangleMesh)):
+			shape = ms.TriangleMesh(rs.MeshVertices(shape), rs.MeshFaceVertices(shape))
+		vertices, faces = ms.weld(shape.vertices, shape.faces)
+		faces = list(ms.triangles(faces))
+		zs = [v[2] for v in vertices]
+		profile = al.face_profile(vertices, faces, layer_height, min_height)
+		return al.layer_heights(profile, min(zs), max(zs), min_height)
+	bounding_box = rs.BoundingBox(shape)
+	zmin = bounding_box[0].Z
+	zmax = bounding_box[4].Z
+	step = layer_height/float(al.BANDS)
+	curves = rs.AddSrfContourCrvs(shape, (bounding_box[0], bounding_box[4]), interval=step) or []
+	# closed sections at the same height are added up, (area, area*x, area*y) by z
+	totals = {}
+	for curve in curves:
+		if not(gb.IsCurveClosed(curve)):
+			continue
+		area = gb.CurveArea(curve)[0]
+		center = gb.CurveAreaCentroid(curve)[0]
+		z = round(center.Z, 3)
+		total = totals.setdefault(z, [0.0, 0.0, 0.0])
+		total[0] += area
+		total[1] += area*center.X
+		total[2] += area*center.Y
+	# the sections are only measured, don't leave them in the document
+	if (curves):
+		rs.DeleteObjects(curves)
+	sections = []
+	for z in sorted(totals):
+		area, x, y = totals[z]
+		if (area>0):
+			sections.append((z, area, (x/area, y/area)))
+	if (len(sections)<2):
+		# too few sections to measure, even layers
+		return al.layer_heights((zmin, step, [float(layer_height)]), zmin, zmax, min_height)
+	profile = al.section_profile(sections, layer_height, min_height)
+	return al.layer_heights(profile, zmin, zmax, min_height)
+
+# a key for the shape's geometry, the same for the same geometry on every run
+def shape_key(shape):
+	if (isinstance(shape, ms.TriangleMesh)):
+		return rcache.stable_hash("mesh", shape.vertices, shape.faces)
+	if (gb.IsMesh(shape)):
+		return rcache.stable_hash("mesh", rs.MeshVertices(shape), rs.MeshFaceVertices(shape))
+	geometry = rs.coercegeometry(shape)
+	try:
+		import Rhino.FileIO
+		return rcache.stable_hash("geometry", geometry.ToJSON(Rhino.FileIO.SerializationOptions()))
+	except (ImportError, AttributeError):
+		# older Rhino, fall back to the bounding box, area and volume
+		return rcache.stable_hash("geometry", rs.BoundingBox(shape), rs.SurfaceArea(shape), rs.SurfaceVolume(shape))
+
+# slices of shape as plain polylines, a list of layers, each a list of branches (points, closed)
+# the slices from slice_shape with each branch as in sample_curve,
+# closed branches don't repeat their first point
+def slice_polylines(shape, layer_height=1.0, sample_spacing=0.25):
+	return [[sample_curve(curve, sample_spacing) for curve in layer] for layer in slice_shape(shape, layer_height)]
+
+# (points, closed) of a curve, a polyline's own vertices (so it is the same curve),
+# other curves points about sample_spacing apart
+def sample_curve(curve, sample_spacing=0.25):
+	closed = sc.cache.is_closed(curve)
+	if (gb.IsPolyline(curve)):
+		points = [(p[0], p[1], p[2]) for p in gb.PolylineVertices(curve)]
+		if (closed and len(points)>1):
+			points.pop()
+		return (points, closed)
+	count = max(int(sc.cache.length(curve)/sample_spacing), 8)
+	return ([(p.X, p.Y, p.Z) for p in sc.cache.divide(curve, count)], closed)
+
+# slice_polylines through the result cache (result_cache.cache if cache is None)
+# returns the key the slices are stored under, for keying later stages, and the slices
+def cached_slice_polylines(shape, layer_height=1.0, sample_spacing=0.25, cache=None):
+	if (cache is None):
+		cache = rcache.cache
+	key = rcache.stable_hash("slices", shape_key(shape), layer_height, sample_spacing)
+	return key, cache.stage("slices", key, lambda: slice_polylines(shape, layer_height, sample_spacing))
+
+# slices the shape at the given heights (e.g. from adaptive_heights)
+# meshes are cut at all of them in one pass by mesh_slicer, other shapes are contoured in Rhino
+# one plane at a time, since AddSrfContourCrvs only takes one plane or evenly spaced planes
+# returns a list of layers, each a list of branch curves, like slice_shape
+def slice_shape_at_heights(shape, heights, layer_height=1.0):
+	if (isinstance(shape, ms.TriangleMesh) or gb.IsMesh(shape)):
+		return slice_mesh_shape(shape, layer_height, heights)
+	bounding_box = rs.BoundingBox(shape)
+	zmin = bounding_box[0].Z+layer_height*ms.END_OFFSET
+	zmax = bounding_box[4].Z-layer_height*ms.END_OFFSET
+	shape_slices = []
+	for z in heights:
+		z = min(max(z, zmin), zmax)
+		curves = rs.AddSrfContourCrvs(shape, rs.PlaneFromNormal((0,0,z), (0,0,1)))
+		if (curves):
+			start = [gb.DivideCurve(curve, 10)[0] for curve in curves]
+			order = sorted(range(len(curves)), key=lambda i: (round(start[i].X,3), round(start[i].Y,3)))
+			shape_slices.append([curves[i] for i in order])
+	return shape_slices
+
 def get_offset_curve (curve, distance):
-	if (rs.IsCurveClosable(curve)):
-		point = rs.CurveAreaCentroid(curve)[0]
+	if (gb.IsCurveClosable(curve)):
+		point = sc.cache.centroid(curve)
 	else:
 		# create a new closed curve and find the center of that
-		points = rs.DivideCurve(curve,20)
+		points = sc.cache.divide(curve, 20)
 		points.append(points[0]) 
-		closed_curve = rs.AddCurve(points)
-		point = rs.CurveAreaCentroid(closed_curve)[0]
+		closed_curve = gb.AddCurve(points)
+		point = sc.cache.centroid(closed_curve)
 
-	offset_curve = rs.OffsetCurve(curve, point, distance)
+	offset_curve = gb.OffsetCurve(curve, point, distance)
 	return offset_curve
 
+# a closed curve as a polygon for polygon_offset and scanline_infill, without the closing point
+# a polyline gives its own vertices, so the corners stay sharp, other curves are divided
+# about every half millimeter and their kinks are added in, each in the piece it falls on
+def curve_polygon(curve):
+	if (gb.IsPolyline(curve)):
+		polygon = list(gb.PolylineVertices(curve))
+		if (len(polygon)>1 and gb.Distance(polygon[0], polygon[-1])<1e-9):
+			polygon.pop()
+		if (len(polygon)>=3):
+			return polygon
+	count = max(int(sc.cache.length(curve)/0.5), 16)
+	polygon = sc.cache.divide(curve, count)
+	for kink in gb.CurveDiscontinuity(curve, 4) or []:
+		pieces = [pt.point_segment_distance(kink, polygon[i-1], polygon[i]) for i in range(len(polygon))]
+		i = pieces.index(min(pieces))
+		if (min(gb.Distance(kink, polygon[i-1]), gb.Distance(kink, polygon[i]))>1e-9):
+			polygon.insert(i, kink)
+	return polygon
+
+# a closed curve through a loop of points (from polygon_offset)
+def loop_curve(loop):
+	return gb.AddPolyline(loop+[loop[0]])
+
+# all the inward offsets of a closed curve, distance apart, in the order to print them
+# computed in one go by polygon_offset, so parts that split off (islands) are kept,
+# each island is finished before moving on to the next one
+# the offsets are polylines, within polygon_offset.ARC_TOLERANCE of the exact offsets of the curve's polygon
 def get_offset_curves (curve, distance):
-	if (rs.IsCurveClosable(curve)==False):
+	if (gb.IsCurveClosable(curve)==False):
 		print("Can't get offsets for an open form.")
 		return
 
-	point = rs.CurveAreaCentroid(curve)[0]
-	next_curve=True
-	count=0
-
-	curve_list=[]
-	curve_list=recursive_offset(curve,curve_list,distance)
-
-	new_curve_list=[]
-
-	#get rid of duplicate curves in list
-	for i in range(0,len(curve_list)):
-		flag=False
-		curve=curve_list[i]
-		start0 = rs.CurveStartPoint(curve)
-		for j in range(i+1,len(curve_list)):
-			start1 = rs.CurveStartPoint(curve_list[j])
-			if(rs.Distance(start0,start1)<distance/2.0):
-				flag=True
-				break
-
-		if (flag==False):
-			compare_point=[-1000,0,0]
-			closest=rs.CurveClosestPoint(curve_list[i], compare_point)
-			sort_point = rs.EvaluateCurve(curve_list[i], closest)
-			new_curve_list.append({"curve": curve_list[i], "x": sort_point.X})
-
-	new_curve_list.sort(key=lambda item: item["x"])
-
-	curves=[]
-	for i in range(len(new_curve_list)):
-		curves.append(new_curve_list[i]["curve"])
-
-	return curves
+	polygon = curve_polygon(curve)
+	rings = po.inset_rings(polygon, distance)
+	return [loop_curve(loop) for loop in po.order_rings(rings, start=polygon[0])]
 
 def recursive_offset (curve,curve_list,distance):
 
-	if (rs.IsCurveClosable(curve)==False):
+	if (gb.IsCurveClosable(curve)==False):
 		print("Can't make a bottom for an open form.")
 		return []
 
-	c=rs.CurveLength(curve)
-	point = rs.CurveAreaCentroid(curve)[0]
+	c=sc.cache.length(curve)
+	point = sc.cache.centroid(curve)
 
 	if (distance>c/10):
 		# print("offset end condition curve length")
 		return []
 
-	a = rs.CurveArea(curve)[0]
+	a = sc.cache.area(curve)[0]
 	if (distance>math.sqrt(a/5)):
 		# print("offset end condition curve area")
 		return []
 
-	next_curve_list=rs.OffsetCurve(curve, point, distance=distance,style=3)
+	next_curve_list=gb.OffsetCurve(curve, point, distance=distance,style=3)
 	if (not(next_curve_list)):
 		# print("couldn't find any more offsets")
 		return []
@@ -146,11 +279,11 @@ def recursive_offset (curve,curve_list,distance):
 
 def bottom_layer (t, bottom_curve,offset_first_curve=False):
 	bottom_layer=[]
-	if (rs.IsCurveClosed(bottom_curve)==False):
+	if (sc.cache.is_closed(bottom_curve)==False):
 		print("Can't create bottom for an open form.")
 		return
 
-	point = rs.CurveAreaCentroid(bottom_curve)[0]
+	point = sc.cache.centroid(bottom_curve)
 
 	if (offset_first_curve is True):
 		bottom_curve_new = get_offset_curve(bottom_curve,t.get_extrude_width())
@@ -166,52 +299,108 @@ def bottom_layer (t, bottom_curve,offset_first_curve=False):
 
 
 def slice_turtle (t,shape, number_walls=1, bottom_layers=0, glass_clay=False):
+	write_slice_header(t)
+	layer_height = t.get_layer_height()
+	sc.cache.clear() # start from fresh slice properties
+	shape_slices = sc.cache.slices(shape, layer_height, slice_shape)
+	follow_slices(t, shape_slices, number_walls=number_walls, bottom_layers=bottom_layers)
+
+# same as slice_turtle, but slices and the G-code of each layer are kept in the result cache
+# (result_cache.cache if cache is None), a layer is reused while the shape, layer height, walls,
+# whether it is a bottom layer and the turtle's state at its start are unchanged,
+# so changing bottom_layers only follows the layers it changes again
+# the shape is only sliced in Rhino when a layer has to be followed
+def slice_turtle_cached (t,shape, number_walls=1, bottom_layers=0, sample_spacing=0.25, cache=None):
+	if (cache is None):
+		cache = rcache.cache
+	write_slice_header(t)
+	layer_height = t.get_layer_height()
+	sc.cache.clear() # start from fresh slice properties
+	slice_key, polylines = cached_slice_polylines(shape, layer_height, sample_spacing, cache)
+	layer_key = rcache.stable_hash("slice layers", slice_key, number_walls, t.get_printer())
+	def get_slices():
+		return sc.cache.slices(shape, layer_height, slice_shape)
+	savings = pa.TravelSavings()
+	for i in range (0,len(polylines)):
+		make = lambda: follow_slice(t, get_slices(), i, number_walls, bottom_layers, savings)
+		cache.layer(t, rcache.stable_hash(layer_key, i, i<bottom_layers), make)
+	savings.report(t.get_speed())
+
+def write_slice_header(t):
 	t.write_gcode_comment("**************************************************")
 	t.write_gcode_comment("******* file generated by Extruder Turtle ********")
 	t.write_gcode_comment("****** python implementation: Leah Buechley ******")
 	t.write_gcode_comment("************** 2023 - present ********************")
 	t.write_gcode_comment("**************************************************")
-	layer_height = t.get_layer_height()
-	shape_slices = slice_shape(shape,layer_height=layer_height)
+
+# follows every layer of shape_slices, with bottoms for the first bottom_layers layers
+def follow_slices(t, shape_slices, number_walls=1, bottom_layers=0):
+	savings = pa.TravelSavings()
 	# for all slices in shape
 
 	for i in range (0,len(shape_slices)):
-		k=0
-		while (k<len(shape_slices[i])):
-		# for all branches in current slice
-			slice0 = shape_slices[i][k] # current slice
+		follow_slice(t, shape_slices, i, number_walls, bottom_layers, savings)
+	savings.report(t.get_speed())
 
-			if (i<bottom_layers and rs.IsCurveClosed(slice0)):
-				bottom_layer(t,slice0)
-			else:
-				follow_curve(t,slice0,number_walls=number_walls)
-			k+=1
+# follows layer i, a bottom if i<bottom_layers
+def follow_slice(t, shape_slices, i, number_walls=1, bottom_layers=0, savings=None):
+	# for all branches in current slice, in the order that keeps travel short
+	for k, start_point, reverse in branch_order(t, shape_slices[i], savings):
+		slice0 = shape_slices[i][k] # current slice
 
-def follow_curve(t, curve, number_walls=1, pattern_row=False, reverse=False):
+		if (i<bottom_layers and sc.cache.is_closed(slice0)):
+			bottom_layer(t,slice0)
+		else:
+			follow_curve(t,slice0,number_walls=number_walls,reverse=reverse,start_point=start_point)
+
+# points per branch used to order the branches
+ORDER_SAMPLES = 64
+
+# the order to print the branches (curves) of a layer in, from where the turtle is
+# nearest neighbor and 2-opt from path_ordering, never more travel than the given order
+# returns (index, start point, reversed) for each branch, closed branches start at their start point,
+# open ones are printed backwards if reversed is True
+# the travel saved is added to savings (a path_ordering.TravelSavings) if one is given
+def branch_order(t, curves, savings=None):
+	loops = [(sc.cache.divide(curve, ORDER_SAMPLES), sc.cache.is_closed(curve)) for curve in curves]
+	start = (t.getX(), t.getY())
+	order = pa.order_loops(loops, start)
+	before = pa.travel_length(loops, pa.given_order(loops), start)
+	after = pa.travel_length(loops, order, start)
+	if (after>before):
+		order = pa.given_order(loops)
+		after = before
+	if (savings is not None):
+		savings.add(before, after)
+	return [(k, loops[k][0][j], reverse) for k, j, reverse in order]
+
+# start_point (optional) is where closed walls start, each at its point closest to it
+def follow_curve(t, curve, number_walls=1, pattern_row=False, reverse=False, start_point=False):
 	speed=t.get_speed()
 	if (pattern_row!=False):
 		steps = len(pattern_row)
 	else:
 		resolution = 1.0 # use a resolution of 1 point per mm
-		points = rs.DivideCurveEquidistant(curve, resolution) # create points resolution apart to find correct #
+		points = sc.cache.divide_equidistant(curve, resolution) # create points resolution apart to find correct #
 		steps = len(points)
-	closed = rs.IsCurveClosed(curve)
+	closed = sc.cache.is_closed(curve)
 	wall = 0
 	curve0=curve
 	walls = find_walls(t,curve,number_walls)
 	walls.reverse() # inner walls first, outer walls last
 
 	if (reverse and number_walls==1):
-		rs.ReverseCurve(curve)
+		gb.ReverseCurve(curve)
+		sc.cache.invalidate(curve) # reversed in place
 	# check to see if the inner walls are significantly rotated
 	# if they are, rotate the pattern to align with the wall rotation
 
 	rotated_pattern_row = pattern_row	
 	if (len(walls)>1):
-		angle = find_curve_rotation(walls[len(walls)-1],walls[len(walls)-2])
+		angle = ps.find_curve_rotation(walls[len(walls)-1],walls[len(walls)-2])
 		if (angle>1):
 			# print("rotating pattern")
-			rotated_pattern_row = rotate_pattern(pattern_row,angle)
+			rotated_pattern_row = ps.rotate_pattern(pattern_row,angle)
 
 	# rs.RotateObject(inner_curve,[0,0,t.getZ()],-angle)
 
@@ -221,15 +410,18 @@ def follow_curve(t, curve, number_walls=1, pattern_row=False, reverse=False):
 			if (pattern_row!=False):
 				steps = len(pattern_row)
 			else:
-				points = rs.DivideCurveEquidistant(curve, resolution) # create points resolution apart to find correct #
+				points = sc.cache.divide_equidistant(curve, resolution) # create points resolution apart to find correct #
 				steps = len(points)
-			points = rs.DivideCurve (curve, steps)
+			points = sc.cache.divide(curve, steps)
+			if (start_point and closed):
+				j = pa.nearest_index(points, start_point)
+				points = points[j:]+points[:j]
 		else:
 			#if offset fails, just return
 			print("Couldn't create an offset curve to follow at wall: " +str(wall+1))
 			return()
 		if (i==len(walls)-1 and pattern_row!=False): # outer wall with pattern
-			follow_points_clean_edges(t,points,closed=closed,pattern_row=pattern_row)
+			ps.follow_points_clean_edges(t,points,closed=closed,pattern_row=pattern_row)
 		else: 
 			if (pattern_row!=False): # inner wall with pattern, use adjusted pattern row
 				follow_points(t,points,closed=closed,pattern_row=rotated_pattern_row)
@@ -251,25 +443,17 @@ def follow_curve(t, curve, number_walls=1, pattern_row=False, reverse=False):
 	# ********************* PATTERN *********************
 	# ***************************************************
 
-	follow_curve_pattern_only(t, curve, number_walls=1, pattern_row=rotated_pattern_row, reverse=reverse)
+	ps.follow_curve_pattern_only(t, curve, number_walls=1, pattern_row=rotated_pattern_row, reverse=reverse)
 
 
+# index of the slice in next_slices closest to slice
+# measured from fixed points along slice, so the same slice is always found
+# (the slicers look this up in a branch_graph.BranchGraph instead)
 def find_closest_slice(slice,next_slices):
-	min_distance=10000
-	index=-1
-	# slice curve and pick an index for comparison point
-	points0 = rs.DivideCurve(slice, 20)
-	j = random.randint(4,16) #randomize the point that is chosen for comparison, avoiding the ends
-
-	for i in range (0,len(next_slices)):
-		# use a point along curve as a comparison to avoid branch comparison problems
-		closest=rs.CurveClosestPoint(next_slices[i],points0[j])
-		closest_point = rs.EvaluateCurve(next_slices[i], closest)
-		distance = abs(rs.Distance(points0[j],closest_point))
-		if (distance<min_distance):
-			min_distance=distance
-			index=i
-	return index
+	ranked, overlapping = bg.ranked_branches(slice, next_slices)
+	if (ranked):
+		return ranked[0]
+	return -1
 
 
 def follow_points(t,points,follow_z=True,closed=False,pattern_row=False,pattern_mode=0):
@@ -285,6 +469,17 @@ def follow_points(t,points,follow_z=True,closed=False,pattern_row=False,pattern_
 			pattern_row=False # there is no pattern, even if you have an array
 			first_pixel=0
 
+	if (pattern_row==False):
+		# no pattern, every point is printed
+		if (t.get_pen()==False):
+			t.set_position_point(points[0])
+		t.pendown()
+		t.follow_path(points)
+		if (closed):
+			t.set_position_point(points[0])
+		t.set_speed(speed)
+		return
+
 	for i in range (first_pixel,len(points)+first_pixel):
 		index = i%len(points)
 		point = points[index]
@@ -319,13 +514,12 @@ def follow_points(t,points,follow_z=True,closed=False,pattern_row=False,pattern_
 	t.set_speed(speed)
 
 
+# the curve and the inner walls, extrude width apart (polylines from polygon_offset, like get_offset_curves)
 def find_walls(t,curve,number_walls):
 	walls = []
 	walls.append(curve)
-	wall_number=1
-	while (wall_number<number_walls):
-		inner_curve = get_offset_curve(curve,t.get_extrude_width())
-		walls.append(inner_curve)
-		curve = inner_curve
-		wall_number+=1
+	if (number_walls>1):
+		polygon = curve_polygon(curve)
+		rings = po.inset_rings(polygon, t.get_extrude_width(), count=number_walls-1)
+		walls = walls + [loop_curve(loop) for loop in po.order_rings(rings, start=polygon[0])]
 	return walls
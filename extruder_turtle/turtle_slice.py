@@ -2,6 +2,7 @@ import copy
 import Rhino.Geometry as geom
 import rhinoscriptsyntax as rs
 import ExtruderTurtle as e
+import frame_turtle as ft
 import operator as op
 import math
 import random
@@ -160,7 +161,7 @@ def follow_closed_line(t,points=False,curve=False,z_inc=0,walls = 1,matrix=False
 	t.penup()
 
 	# t2 keeps track of points for next wall
-	t2 = e.ExtruderTurtle()
+	t2 = ft.FrameTurtle()
 	t2.penup()
 
 	# follow the curve
@@ -311,7 +312,7 @@ def follow_closed_line_chase (t,points=False,curve=False,z_inc=0,angle=50,moveme
 		t_extra_steps = 12
 
 	# t2 follows the basic curve, t will chase t2
-	t2 = e.ExtruderTurtle()
+	t2 = ft.FrameTurtle()
 	
 	if (z_inc==0 or walls > 1):
 		t2.set_position(points[0].X,points[0].Y,points[0].Z)
@@ -354,7 +355,7 @@ def follow_closed_line_weave(t,points=False, curve=False, num_oscillations=25.0,
 		points = rs.DivideCurve (curve, num_points)
 
 	num_points = len(points)
-	t2 = e.ExtruderTurtle()
+	t2 = ft.FrameTurtle()
 	if (z_inc==0):
 		t2.set_position(points[0].X,points[0].Y,points[0].Z)
 	else:
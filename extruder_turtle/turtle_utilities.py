@@ -1,7 +1,19 @@
 import copy
-import Rhino.Geometry as geom
-import rhinoscriptsyntax as rs
+try:
+	import Rhino.Geometry as geom
+except ImportError:
+	geom = None
+try:
+	import rhinoscriptsyntax as rs
+except ImportError:
+	# surfaces, transforms and booleans need Rhino, the rest goes through geometry_backend
+	rs = None
 import ExtruderTurtle as e
+import frame_turtle as ft
+import geometry_backend as gb
+import polygon_offset as po
+import scanline_infill as si
+import slicer_utilities as su
 import operator as op
 import math
 import random
@@ -13,12 +25,12 @@ def translate(g,x,y,z):
 	g.Transform(translation)
 	
 def rotate(g,angle):
-	point = rs.CurveAreaCentroid(g)[0]
+	point = gb.CurveAreaCentroid(g)[0]
 	rotation = geom.Transform.Rotation(math.radians(angle),point)
 	g.Transform(rotation)
 	
 def scale(g,scale_factor):
-	point = rs.CurveAreaCentroid(g)[0]
+	point = gb.CurveAreaCentroid(g)[0]
 	scale= geom.Transform.Scale(point,scale_factor)
 	g.Transform(scale)
 
@@ -31,13 +43,13 @@ def translate_copy(g,x,y,z):
 	
 def rotate_copy(g,angle):
 	shape = copy.deepcopy(g)
-	rotation = geom.Transform.Rotation(math.radians(angle),rs.CreatePoint(0,0,0))
+	rotation = geom.Transform.Rotation(math.radians(angle),gb.CreatePoint(0,0,0))
 	shape.Transform(rotation)
 	return shape
 	
 def scale_copy(g,scale_factor):
 	shape = copy.deepcopy(g)
-	scale= geom.Transform.Scale(rs.CreatePoint(0,0,0),scale_factor)
+	scale= geom.Transform.Scale(gb.CreatePoint(0,0,0),scale_factor)
 	shape.Transform(scale)
 	return shape
 
@@ -45,10 +57,10 @@ def scale_copy(g,scale_factor):
 # around the origin at height z
 def surface_for_slice(z,size):
 	points = []
-	points.append(rs.CreatePoint(-size,-size,z))
-	points.append(rs.CreatePoint(-size,size,z))
-	points.append(rs.CreatePoint(size,size,z))
-	points.append(rs.CreatePoint(size,-size,z))
+	points.append(gb.CreatePoint(-size,-size,z))
+	points.append(gb.CreatePoint(-size,size,z))
+	points.append(gb.CreatePoint(size,size,z))
+	points.append(gb.CreatePoint(size,-size,z))
 	plane = rs.AddSrfPt(points)
 	return plane
 
@@ -61,7 +73,7 @@ def convex_hull(points):
 		a = points[0]
 		for b in points:
 			if (a[0]-o[0])*(b[1]-o[1])-(a[1]-o[1])*(b[0]-o[0]) < 0: a = b
-		lines.append(rs.AddLine(o,a))
+		lines.append(gb.AddLine(o,a))
 		hull_points.append(o)
 		if (a == start): 
 			break
@@ -74,9 +86,9 @@ def mix_factor_metal(t):
 # slices a solid (shape)
 def slice_solid (shape, layer_height):
 	bb = rs.BoundingBox(shape)
-	height = rs.Distance(bb[0], bb[4])
+	height = gb.Distance(bb[0], bb[4])
 	layers = int(height/layer_height)
-	size = rs.Distance(bb[0], bb[2])*2
+	size = gb.Distance(bb[0], bb[2])*2
 	slices = []
 	z = layer_height
 	for i in range (1,layers+1):
@@ -105,14 +117,17 @@ def one_slice(shape,z,size,plane = False):
 def slice_with_turtle (t, shape, walls = 1, layer_height=False, spiral_up=False, bottom = False, start_layer=0, layers=10000):
 	if (layer_height==False or layer_height == 0):
 		layer_height = t.get_layer_height()
+	if (gb.IsMesh(shape)):
+		# meshes are sliced in one pass by mesh_slicer
+		return [curve for layer in su.slice_mesh_shape(shape, layer_height) for curve in layer]
 	bb = rs.BoundingBox(shape)
-	height = rs.Distance(bb[0], bb[4])
+	height = gb.Distance(bb[0], bb[4])
 	print("height: " +str(height))
 	layers = int(round(height/layer_height)) # number of slices
 	print("layers: " +str(layers))
-	size = rs.Distance(bb[0], bb[6])*2 # size of slicing plane
-	point_bottom = (rs.CreatePoint(0,0,bb[0].Z))
-	point_top = (rs.CreatePoint(0,0,bb[4].Z))
+	size = gb.Distance(bb[0], bb[6])*2 # size of slicing plane
+	point_bottom = (gb.CreatePoint(0,0,bb[0].Z))
+	point_top = (gb.CreatePoint(0,0,bb[4].Z))
 	
 	#slices
 	slices = rs.AddSrfContourCrvs(shape,(point_bottom,point_top),layer_height)
@@ -129,9 +144,9 @@ def slice_with_turtle_2 (t, shape, walls = 1, layer_height=False, spiral_up=Fals
 		layer_height = t.get_layer_height()
 
 	bb = rs.BoundingBox(shape)
-	height = rs.Distance(bb[0], bb[4])
+	height = gb.Distance(bb[0], bb[4])
 	layers = int(round(height/layer_height)) # number of slices
-	size = rs.Distance(bb[0], bb[6])*2 # size of slicing plane
+	size = gb.Distance(bb[0], bb[6])*2 # size of slicing plane
 	slices = []
 	z = bb[0].Z
 
@@ -167,7 +182,7 @@ def slice_with_turtle_2 (t, shape, walls = 1, layer_height=False, spiral_up=Fals
 def max_distance_between_slices(points0,points1):
 	maxd = 0
 	for i in range (0, len(points0)):
-		distance = rs.Distance(points0[i],points1[i])
+		distance = gb.Distance(points0[i],points1[i])
 		if (distance > maxd):
 			maxd = distance
 	return maxd
@@ -175,103 +190,18 @@ def max_distance_between_slices(points0,points1):
 # slices a shape with an equal distance between layers
 # calculates distance based on maximum total distance 
 # (vertical and horizontal) between layers
-def slice_with_turtle_even_layers (t, shape, walls = 1, layer_height=False, bottom=False, spiral_up=False):
+# the layer heights are planned once for the whole shape (slicer_utilities.adaptive_heights)
+# and the shape is cut at each of them (meshes in one pass, other shapes one plane at a time)
+def slice_with_turtle_even_layers (t, shape, walls = 1, layer_height=False, bottom=False, spiral_up=False, min_height=None):
 	if (layer_height==False or layer_height == 0):
 		layer_height = t.get_layer_height()
 
-	num_comparison_points = 2
-	bb = rs.BoundingBox(shape)
-	height = rs.Distance(bb[0], bb[4])
-	bottom_z = bb[0].Z
-	top_z = bb[4].Z
-	size = rs.Distance(bb[0], bb[6])*2 # size of slicing plane = diagonal*2
-	slices = []
-	z = bottom_z
-	print("z: " +str(z))
-	p0 = bb[0]
-	p1 = rs.CreatePoint(bb[0].X,bb[0].Y,z+.1)
-	slice = rs.AddSrfContourCrvs(shape,(p0,p1),layer_height)
-
-	#slice = one_slice(shape,z,size)
-	if (slice):
-		points = rs.DivideCurve (slice[len(slice)-1], num_comparison_points)
-	else: 
+	heights = su.adaptive_heights(shape, layer_height, min_height)
+	shape_slices = su.slice_shape_at_heights(shape, heights, layer_height)
+	if not(shape_slices):
 		print("Slicing error. Move your shape closer to the origin for slicing.")
 		return
-
-	#generate slice curves
-	count_main = 0
-	while (z < top_z and count_main <100):
-		print("z: " +str(z))
-		# measure max distance between point this slice & previous slice
-		# calculate z based on that distance
-		new_layer_height = 0
-		previous_points = copy.deepcopy(points)
-		p0 = rs.CreatePoint(bb[0].X,bb[0].Y,z)
-		p1 = rs.CreatePoint(bb[0].X,bb[0].Y,z+layer_height)
-		slice = rs.AddSrfContourCrvs(shape,(p0,p1),layer_height)
-		if (slice):
-			points = rs.DivideCurve (slice[len(slice)-1], num_comparison_points)
-
-		maxd = max_distance_between_slices(previous_points,points)
-		desired_distance = layer_height*1.0
-		print("maxd: " +str(maxd))
-		if (maxd>desired_distance): # generate a new slice
-			print("generating new slice at layer: " +str(count_main))
-			theta = math.asin(layer_height/maxd)
-			new_layer_height = math.sin(theta)*desired_distance
-			print("new layer height: " +str(new_layer_height))
-			p0 = rs.CreatePoint(bb[0].X,bb[0].Y,z)
-			p1 = rs.CreatePoint(bb[0].X,bb[0].Y,z+new_layer_height)
-			slice = rs.AddSrfContourCrvs(shape,(p0,p1),new_layer_height*2)
-			points = rs.DivideCurve (slice[len(slice)-1], num_comparison_points)
-
-		# if you're close to the top of the shape
-		# make sure you account for thinner layers
-		if (z+layer_height >= top_z-layer_height):
-			print("top slice")
-			if (new_layer_height):
-				if (z+new_layer_height < top_z):
-					z = z+new_layer_height
-				else:
-					print("very top")
-					slices = slices + slice
-					z0 = bb[4].Z -.05
-					z = bb[4].Z+.05
-					p0 = rs.CreatePoint(bb[0].X,bb[0].Y,z0)
-					p1 = rs.CreatePoint(bb[0].X,bb[0].Y,z)
-					slice = rs.AddSrfContourCrvs(shape,(p0,p1),new_layer_height)
-					slices.append(slice[len(slice)-1])
-					break
-			else:
-				z = z+layer_height/2
-
-		else:
-			if (new_layer_height>0):
-				print("adding new layer height")
-				z = z+new_layer_height
-			else:
-				print("adding normal layer height")
-				z = z+layer_height
-
-		#print("new distance: " +str(maxd))
-		if (slice):
-			print("number new slices: " + str(len(slice)))
-			slices.append(slice[len(slice)-1])
-
-		count_main = count_main + 1
-	'''
-	#slice the top layer
-	z = bb[7].Z-.01
-	p0 = rs.CreatePoint(bb[0].X,bb[0].Y,z)
-	p1 = rs.CreatePoint(bb[0].X,bb[0].Y,z+layer_height)
-	slice = rs.AddSrfContourCrvs(shape,(p0,p1),layer_height)
-	#slice = one_slice(shape,z,size)
-	if (slice):
-		slices = slices + slice
-	else:
-		print("final slice failed")
-	'''
+	slices = [curve for layer in shape_slices for curve in layer]
 	return slices
 
 	follow_slice_curves_with_turtle(t,slices,walls=walls,spiral_up=spiral_up)
@@ -518,7 +448,7 @@ def follow_slice_curves_woven_data(t,slices, bottom = False, spiral_up=False, ma
 
 
 def follow_closed_line_interior(t,curve,number=1,ignore_Z=False):
-	curve_center = rs.CurveAreaCentroid(curve)
+	curve_center = gb.CurveAreaCentroid(curve)
 	if (curve_center):
 		curve_center = curve_center[0]
 	else:
@@ -528,27 +458,27 @@ def follow_closed_line_interior(t,curve,number=1,ignore_Z=False):
 	# get a curve offset to the interior of the shape
 	for i in range(number):
 		if (i==0):
-			offset_curve = rs.OffsetCurve(curve,curve_center,t.get_extrude_width()/2.0)
+			offset_curve = gb.OffsetCurve(curve,curve_center,t.get_extrude_width()/2.0)
 		else:
-			offset_curve = rs.OffsetCurve(curve,curve_center,t.get_extrude_width()*(i+.5))
+			offset_curve = gb.OffsetCurve(curve,curve_center,t.get_extrude_width()*(i+.5))
 
 		follow_closed_line(t,curve=offset_curve, ignore_Z=ignore_Z)
 
 def follow_closed_line_exterior(t,curve,number=1,ignore_Z=False):
-	curve_center = rs.CurveAreaCentroid(curve)
+	curve_center = gb.CurveAreaCentroid(curve)
 	if (curve_center):
 		curve_center = curve_center[0]
 	else:
 		#print("Couldn't get a center point.")
-		curve_center = rs.CreatePoint(0,5.0,0)
+		curve_center = gb.CreatePoint(0,5.0,0)
 		return
 
 		# get a curve offset to the interior of the shape
 	for i in range(number):
 		if (i==0):
-			offset_curve = rs.OffsetCurve(curve,curve_center,-t.get_extrude_width()/2.0)
+			offset_curve = gb.OffsetCurve(curve,curve_center,-t.get_extrude_width()/2.0)
 		else:
-			offset_curve = rs.OffsetCurve(curve,curve_center,-t.get_extrude_width()*(i+.5))
+			offset_curve = gb.OffsetCurve(curve,curve_center,-t.get_extrude_width()*(i+.5))
 
 	follow_closed_line(t,curve=offset_curve)
 
@@ -571,7 +501,7 @@ def follow_closed_line(t,points=False,curve=False,z_inc=0,walls = 1,matrix=False
 	#t.penup()
 
 	# t2 keeps track of points for next wall
-	t2 = e.ExtruderTurtle()
+	t2 = ft.FrameTurtle()
 	t2.penup()
 
 	if (matrix):
@@ -659,73 +589,26 @@ def follow_closed_line(t,points=False,curve=False,z_inc=0,walls = 1,matrix=False
 	# 		follow_closed_line(t, points2, walls = walls)
 	# 	'''
 
+# fills a closed curve with rings, extrude width apart, from the outside in
+# the rings are all computed at once by polygon_offset, islands are filled one after the other
+# returns the center of the innermost ring
 def spiral_bottom(t,curve,walls=1):
-	extrude_rate = t.get_extrude_rate()
-
-	area = 0
-	previous_area = 10
-	i = 0
-	count = 100
-	previous_area = rs.CurveArea(curve)
-	area = previous_area
-	curve_center_previous =0
-
-	while (area <=previous_area and i<count):
-		# important!! 
-		# make sure curve center is in XY plane
-		# set current view to top view
-		strView = rs.CurrentView("Top") 
-		
-		curve_center = rs.CurveAreaCentroid(curve)
-		if (curve_center):
-			curve_center = curve_center[0]
-			curve_center_previous = curve_center
-		else:
-			print("Couldn't get a center point, using previous.")
-			curve_center = curve_center_previous
+	curve_center = gb.CurveAreaCentroid(curve)
+	if (curve_center):
+		curve_center = curve_center[0]
 
-		o = rs.OffsetCurve(curve,curve_center,t.get_extrude_width())
-		if (area):  
-			previous_area = area
-		else:
-			print("Couldn't get an area, using previous.")
-		
-		# if there is a viable offset curve, compute the new area
-		# otherwise, get out ot the loop
-		if (o):
-			try:
-				area = rs.CurveArea(o)
-			except:
-				print("Challenging bottom 1. Re-computing.")
-				try:
-					o = rs.OffsetCurve(curve,curve_center,t.get_extrude_width()-.5)
-				except:
-					print("Challenging bottom 2. Re-computing.")
-					o = rs.OffsetCurve(curve,curve_center,t.get_extrude_width()+.5)
-				try:
-					area = rs.CurveArea(o)
-				except:
-					print("Couldn't get an area.")
-					break
+	polygon = su.curve_polygon(curve)
+	rings = po.inset_rings(polygon, t.get_extrude_width())
+	for loop in po.order_rings(rings, start=polygon[0]):
+		o = su.loop_curve(loop)
+		follow_closed_line(t,curve=o)
+		center = gb.CurveAreaCentroid(o)
+		if (center):
+			curve_center = center[0]
 		else:
-			#print("Challenging bottom 3. No viable offset curve. Exiting.")
-			break
-
-		# if you have reached the inner-most ring of bottom, get out of loop
-		if (area>=previous_area):
-			#print("Next area larger. ")
-			#print("previous_area = " +str(previous_area) + ", area: " +str(area))
-			#print(i)
-			break
-		else:
-			follow_closed_line(t,curve=o)
-			curve = o
-		i = i+1
+			print("Couldn't get a center point, using previous.")
 
-	if (curve_center):
-		return curve_center
-	else:
-		return curve_center_previous
+	return curve_center
 
 
 # important: assumes turtle is either 
@@ -739,10 +622,10 @@ def zig_zag_circular_bottom(t,diameter,center_point,t_on_circle=True):
 	z = t.getZ()
 	r = diameter/2.0
 	points = []
-	points.append(rs.CreatePoint(-r,-r,z))
-	points.append(rs.CreatePoint(-r,r,z))
-	points.append(rs.CreatePoint(r,r,z))
-	points.append(rs.CreatePoint(r,-r,z))
+	points.append(gb.CreatePoint(-r,-r,z))
+	points.append(gb.CreatePoint(-r,r,z))
+	points.append(gb.CreatePoint(r,r,z))
+	points.append(gb.CreatePoint(r,-r,z))
 	plane = rs.AddSrfPt(points)
 	circle = rs.AddCircle(plane,r)
 	t.set_heading_point(center_point)
@@ -753,44 +636,25 @@ def zig_zag_circular_bottom(t,diameter,center_point,t_on_circle=True):
 	intersections = rs.CurveCurveIntersection(circle,line)
 
 #assumes curve is flat, doesn't work for non-planar curves
-def zig_zag_bottom(t,curve):
-	resolution = t.get_resolution()
-	points = curve_to_points(curve,resolution)
-	#find bounding box points, will define slicing line boundaries
-	minPx = min(points, key=op.itemgetter(0))
-	maxPx = max(points, key=op.itemgetter(0))
-	minPy = min(points, key=op.itemgetter(1))
-	maxPy = max(points, key=op.itemgetter(1))
-	index = go_to_point_on_curve(t,curve,minPx)
-	# print("index: " +str(index))
-	x = minPx.X
-	z = minPx.Z
-	x = x + t.get_extrude_width()
-	intersections_list = []
-	while (x < maxPx.X):
-		index = go_to_point_on_curve(t,curve,t.get_position())
-		# generate slicing line
-		# slice in x
-		# x increment = one spacing width
-		# line = current x from miny to maxy
-		line = rs.AddLine(rs.CreatePoint(x,minPy.Y,z),rs.CreatePoint(x,maxPy.Y,z))
-		# check for intersections between line and curve
-		intersections = rs.CurveCurveIntersection(curve,line)
-		intersections_list.append(intersections)
-		# find intersection at curve turtle is on
-		# travel along curve to the intersection
-		# jump to intersection across curve, stay inside shape
-		for i in range (len(intersections)):
-			d = distance_on_curve(t,curve,intersections[i][1],index)
-			if (d < t.get_extrude_width()*2):
-				# print("found the point at intersections: " +str(i))
-				# print("distance is: " +str(d))
-				t.set_position_point(intersections[i][1])
-				break
-
-		x = x + t.get_extrude_width()
-		# print("x slice: " +str(x))
-	return intersections_list
+# fills a closed curve with straight lines, extrude width apart (or spacing apart)
+# angle is the direction of the lines in degrees, 90 runs them along y
+# the lines are joined into zig zag paths by scanline_infill, paths are
+# printed nearest first with travel moves between them
+# returns the paths, lists of (x, y, z) points
+def zig_zag_bottom(t,curve,angle=90,spacing=None):
+	if (spacing is None):
+		spacing = t.get_extrude_width()
+	polygon = su.curve_polygon(curve)
+	paths = si.zig_zag_paths([polygon], spacing, angle=angle, inset=spacing/2.0)
+	paths = si.order_paths(paths, start=(t.getX(), t.getY()))
+	points = []
+	pen_mask = []
+	for path in paths:
+		for i in range(len(path)):
+			points.append(path[i])
+			pen_mask.append(i>0)
+	t.follow_path(points, pen_mask=pen_mask)
+	return paths
 
 # generates points from a curve
 # number of points determined by resolution
@@ -807,7 +671,7 @@ def go_to_point_on_curve(t,curve,point):
 	t.penup()
 	points = curve_to_points(curve,resolution)
 	for i in range (len(points)):
-		d = rs.Distance(points[i],point)
+		d = gb.Distance(points[i],point)
 		t.set_position_point(points[i])
 		if (d <resolution*2):
 			t.pendown()
@@ -825,8 +689,8 @@ def distance_on_curve(t,curve,point,index):
 	distance = 0
 	# goes forward along curve
 	for i in range (index,len(points)-1):
-		d = rs.Distance(points[i],point)
-		distance = distance + abs(rs.Distance(points[i],points[i+1]))
+		d = gb.Distance(points[i],point)
+		distance = distance + abs(gb.Distance(points[i],points[i+1]))
 		if (abs(d) <= resolution):
 			#print("Found the point on curve in distance function at:")
 			#print(distance)
@@ -836,8 +700,8 @@ def distance_on_curve(t,curve,point,index):
 	# goes backward along curve
 	i = index
 	while (i>0):
-		d=rs.Distance(points[i],point)
-		distance = distance + abs(rs.Distance(points[i],points[i+1]))
+		d=gb.Distance(points[i],point)
+		distance = distance + abs(gb.Distance(points[i],points[i+1]))
 		if (abs(d) <= resolution):
 			# print("Found the point on curve in distance function at:")
 			# print(distance)
@@ -850,8 +714,8 @@ def distance_on_curve(t,curve,point,index):
 def line_length(points):
 	length = 0
 	for i in range (1, len(points)):
-		length = length + rs.Distance(points[i-1],points[i])
-	length = length + rs.Distance(points[len(points)-1],points[0])
+		length = length + gb.Distance(points[i-1],points[i])
+	length = length + gb.Distance(points[len(points)-1],points[0])
 	return length
 
 
@@ -861,9 +725,8 @@ def bump_square(t,bump_length,c_bump,dtheta,z_inc=0,bump_width=0):
 	t.forward(bump_length)
 	t.right(90)
 	if (bump_width!=0):
-		for j in range(int(bump_width)):
-			t.forward_lift(c_bump,z_inc)
-			t.right(dtheta)
+		# forward_lift(c_bump,z_inc) then right(dtheta), bump_width times
+		t.turn_sequence([-dtheta]*int(bump_width), c_bump, heights=z_inc, turn_first=False)
 	t.right(90)
 	t.forward(bump_length)
 	t.left(90)
@@ -876,7 +739,7 @@ def bump_triangle(t,bump_length, bump_width, c_inc, d_theta,z_inc=0):
 	y0 = t.getY()
 	z0 = t.getZ()
 	yaw0 = t.get_yaw()
-	t2 = e.ExtruderTurtle()
+	t2 = ft.FrameTurtle()
 	t2.set_position(x0,y0,z0)
 	t2.set_heading(yaw0)
 	if (bump_width==0):
@@ -967,7 +830,7 @@ def follow_closed_line_chase (t,points=False,curve=False,z_inc=0,angle=50,moveme
 	# print("number of points in slice: " +str(num_points))
 
 	# t2 follows the basic curve, t will chase t2
-	t2 = e.ExtruderTurtle()
+	t2 = ft.FrameTurtle()
 
 	r = 0
 
@@ -1043,7 +906,7 @@ def follow_closed_line_chase (t,points=False,curve=False,z_inc=0,angle=50,moveme
 					n = random.randint(0,len(points)/5)
 					t.set_position(points[n].X, points[n].Y)
 					break
-				distance_sq = distance_squaredXY(rs.CreatePoint(t2.getX(),t2.getY(),0), rs.CreatePoint(t.getX(), t.getY(),0))
+				distance_sq = distance_squaredXY(gb.CreatePoint(t2.getX(),t2.getY(),0), gb.CreatePoint(t.getX(), t.getY(),0))
 				if (distance_sq > previous_distance_sq):
 					t.right(angle)
 					t.forward (movement)
@@ -1072,7 +935,7 @@ def follow_closed_line_weave(t,points=False, curve=False, num_oscillations=25.0,
 		points = rs.DivideCurve (curve, num_points)
 
 	num_points = len(points)
-	t2 = e.ExtruderTurtle()
+	t2 = ft.FrameTurtle()
 	if (z_inc==0):
 		t2.set_position(points[0].X,points[0].Y,points[0].Z)
 	else:
@@ -1288,7 +1151,7 @@ def pattern_cylinder(t, b_diameter, height, t_diameter=False, array=False, patte
 				# generate a cube at turtle's location
 				# print("vis at: " +str(xp)+", "+str(yp))
 				# print("")
-				t2 = ExtruderTurtle()
+				t2 = ft.FrameTurtle()
 				t2.set_position_point(t.get_position())
 				t2.set_heading(dtheta*s)
 				t2.pitch(90)
@@ -1301,7 +1164,7 @@ def pattern_cylinder(t, b_diameter, height, t_diameter=False, array=False, patte
 					t2.forward(distance_per_oscillation/1.15)
 					t2.right(90)
 					points.append(t2.get_position())
-				square = rs.AddPolyline(points)
+				square = gb.AddPolyline(points)
 				square=rs.AddPlanarSrf(square)[0]
 				vis_lines.append(square)
 
@@ -1361,7 +1224,7 @@ def secondWallAddPointXYR(t,t2,points):
 	z1 = t2.getZ()
 	t2.backward(t.get_extrude_width()*.75)
 	t2.left(90)
-	return rs.CreatePoint(x1,y1,z1)
+	return gb.CreatePoint(x1,y1,z1)
 
 
 def non_centered_poly_holes(t, diameter, steps=100, spiral_up=True):
@@ -1403,7 +1266,7 @@ def non_centered_poly(t, diameter, steps=100, walls = 1, spiral_up=False):
 	dtheta = 360.0/steps
 
 	if (walls>1):
-		t2 = e.ExtruderTurtle()
+		t2 = ft.FrameTurtle()
 		points = []
 
 	t.right(dtheta/2)
@@ -1640,16 +1503,14 @@ def square_oscillating_circle(t,inner_diameter, outer_diameter, nOscillations):
 	inner_c_step = inner_circumference/steps
 	outer_c_step = outer_circumference/steps
 	theta_step = 360.0/steps
+	arc_steps = int(steps/(nOscillations*2))
 	for i in range(0,nOscillations):
-		for j in range (0,int(steps/(nOscillations*2))):
-			t.forward(inner_c_step)
-			t.left(theta_step)
+		# forward then left(theta_step), arc_steps times
+		t.turn_sequence([theta_step]*arc_steps, inner_c_step, turn_first=False)
 		t.right(90)
 		t.forward(r_dif)
 		t.left(90)
-		for j in range (0,int(steps/(nOscillations*2))):
-			t.forward(outer_c_step)
-			t.left(theta_step)
+		t.turn_sequence([theta_step]*arc_steps, outer_c_step, turn_first=False)
 		t.left(90)
 		t.forward(r_dif)
 		t.right(90)
@@ -16,16 +16,15 @@ def circle(t, diameter, steps=100, start=0, overlap=1):
 	if (dcirc<1.0):
 		steps = int(circumference) # sets step size to 1mm
 	dtheta = 360.0/steps
+	points = []
 	for i in range (start, steps+start+1+overlap):
 		x = r*math.cos(math.radians(i*dtheta))
 		y = r*math.sin(math.radians(i*dtheta))
-		if (i==start):	
-			t.penup()
-			t.set_position(x,y)
-			t.pendown()
-			# print("in circle x: " +str(x))
-			# print("in circle y: " +str(y))
-		t.set_position(x,y)
+		points.append((x,y,0))
+	t.penup()
+	t.set_position(points[0][0],points[0][1])
+	t.pendown()
+	t.follow_path(points, follow_z=False)
 
 
 def circular_surface_in_out (t,diameter):
@@ -282,17 +281,10 @@ def pattern_along_curve(t, curve, array=False, pattern_amplitude = False, patter
 	# MAIN LOOP: STRUCTURE
 	# change to nozzle 0 and build structure
 	################################################
-	i=0
-	for point in points:
-		if (i==0):
-			t.penup()	
-			t.set_position(point.X,point.Y)
-		if (array[i]==1 and windows==True and support==False):
-			t.penup()
-		else:
-			t.pendown()
-		t.set_position(point.X,point.Y)
-		i+=1
+	t.penup()
+	t.set_position(points[0].X,points[0].Y)
+	pen_mask = [not(array[i]==1 and windows==True and support==False) for i in range(len(points))]
+	t.follow_path(points, pen_mask, follow_z=False)
 
 	t.set_position(points[0].X,points[0].Y) # close curve
 	position0=t.get_position()
@@ -301,14 +293,8 @@ def pattern_along_curve(t, curve, array=False, pattern_amplitude = False, patter
 	inner_points = rs.DivideCurve (inner_curve, steps)
 
 	if (double_wall):
-		i=0
-		for point in inner_points:
-			if (array[i]==1 and windows==True and support==False):
-				t.penup()
-			else:
-				t.pendown()
-			t.set_position(point.X,point.Y)
-			i+=1
+		pen_mask = [not(array[i]==1 and windows==True and support==False) for i in range(len(inner_points))]
+		t.follow_path(inner_points, pen_mask, follow_z=False)
 
 		t.set_position(inner_points[0].X,inner_points[0].Y) # close curve
 
@@ -1,18 +1,28 @@
-import Rhino.Geometry as geom
-import rhinoscriptsyntax as rs
 import ExtruderTurtle as e
+import slice_cache as sc
+import geometry_backend as gb
+import layer_pipeline as lp
+import branch_graph as bg
+import path_ordering as pa
+import result_cache as rcache
+import frame_turtle as ft
 import operator as op
 import math
 import random
 import extruder_turtle
 import slicer_utilities as su
+import pattern_slicing as ps
 from extruder_turtle import *
 
+# skins are offset by this fraction of the extrude width
+SKIN_OFFSET_FACTOR = .6
+
 # takes a shape as input and slices with WeaveSlicer, using wall width and wavelength
 # input: shape to slice, file to write gcode to, and slicing parameters 
 # calls weave_slice_turtle
 # output: generated path for visualization in Rhino
-def weave_slice (shape, file=False, layer_height=1.0, wall_width=3.0, wavelength=3.0, mode=1, bottom_layers=0, skin=False):
+# cached=True reuses the slices, plans and G-code of earlier runs that are unchanged (see weave_slice_turtle_cached)
+def weave_slice (shape, file=False, layer_height=1.0, wall_width=3.0, wavelength=3.0, mode=1, bottom_layers=0, skin=False, cached=False):
 	t = ExtruderTurtle()
 	if (file):
 		t.setup(filename=file, printer = "eazao")
@@ -22,7 +32,10 @@ def weave_slice (shape, file=False, layer_height=1.0, wall_width=3.0, wavelength
 	t.write_gcode_comment("You can replace everything above this line with the correct header for your 3D printer.")
 	t.set_layer_height(layer_height)
 	t.penup()
-	weave_slice_turtle(t,shape,wall_width=wall_width,wavelength=wavelength, mode=mode, bottom_layers=bottom_layers, skin=skin)
+	if (cached):
+		weave_slice_turtle_cached(t,shape,wall_width=wall_width,wavelength=wavelength, mode=mode, bottom_layers=bottom_layers, skin=skin)
+	else:
+		weave_slice_turtle(t,shape,wall_width=wall_width,wavelength=wavelength, mode=mode, bottom_layers=bottom_layers, skin=skin)
 	t.finish()
 	return t.get_lines()
 
@@ -38,27 +51,221 @@ def weave_slice_turtle (t,shape,wall_width=3.0,wavelength=3.0, mode=1, bottom_la
 	t.write_gcode_comment("************** 2023 - present ********************")
 	t.write_gcode_comment("**************************************************")
 	layer_height = t.get_layer_height()
-	shape_slices = su.slice_shape(shape,layer_height=layer_height)
+	sc.cache.clear() # start from fresh slice properties
+	shape_slices = sc.cache.slices(shape, layer_height, su.slice_shape)
 	layers = []
+	savings = pa.TravelSavings()
 
 	# for all slices in shape
 	for i in range(0,len(shape_slices)):
-		x,points = weave_one_slice_turtle(t=t,layer=i,shape=shape,wall_width=wall_width,wavelength=wavelength, mode=mode, bottom_layers=bottom_layers, skin=skin, shape_slices=shape_slices)
+		x,points = weave_one_slice_turtle(t=t,layer=i,shape=shape,wall_width=wall_width,wavelength=wavelength, mode=mode, bottom_layers=bottom_layers, skin=skin, shape_slices=shape_slices, savings=savings)
 		layers.append(x)
+	savings.report(t.get_speed())
 
 	return layers,points
 
 
+# same as weave_slice_turtle, but the points and angles of all layers are planned in parallel
+# phase 0, in Rhino: the slices, skins, branch graph and point numbers weave_one_slice_turtle uses,
+# with the curves as polylines (polylines as they are, other curves sampled sample_spacing apart)
+# phase 1, no Rhino calls: layer_pipeline plans every layer on workers processes
+# phase 2, in order: the layers are woven from their plans
+# on polyline slices (meshes) the output is the same as weave_slice_turtle's,
+# and it is the same for any number of workers (workers=None plans in this process)
+# input: turtle (.gcode file associted with turtle), shape to slice, and slicing parameters 
+# output: list of layers
+def weave_slice_turtle_parallel (t,shape,wall_width=3.0,wavelength=3.0, mode=1, bottom_layers=0, skin=False, workers=None, sample_spacing=0.25):
+	t.write_gcode_comment("**************************************************")
+	t.write_gcode_comment("******* file generated by WeaveSlicer ************")
+	t.write_gcode_comment("******* conception: Camila Friedman-Gerlicz ******")
+	t.write_gcode_comment("****** python implementation: Leah Buechley ******")
+	t.write_gcode_comment("************** 2023 - present ********************")
+	t.write_gcode_comment("**************************************************")
+	layer_height = t.get_layer_height()
+	sc.cache.clear() # start from fresh slice properties
+	shape_slices = sc.cache.slices(shape, layer_height, su.slice_shape)
+
+	# phase 0, in Rhino
+	curves = skin_curves(t, shape_slices, skin)
+	graph = sc.cache.branch_graph(shape, layer_height, shape_slices, bg.BranchGraph)
+	jobs = weave_layer_jobs(shape_slices, curves, graph, range(0,len(shape_slices)), wavelength, wall_width=wall_width, mode=mode, sample_spacing=sample_spacing)
+
+	# phase 1, no Rhino calls
+	plans = lp.plan_weave_layers(jobs, workers)
+
+	# phase 2, in order
+	return weave_plans(t, plans, lambda: shape_slices, lambda: curves, wall_width=wall_width, mode=mode, bottom_layers=bottom_layers, skin=skin)
+
+# same as weave_slice_turtle_parallel, but each stage's result is kept in the result cache
+# (result_cache.cache if cache is None) and reused while its inputs are unchanged:
+# slices (shape, layer height), each layer's plan (+ wall_width, wavelength, mode, which of its slices have a skin)
+# and the G-code of each layer (+ its plan, whether it has a bottom or skin, the printer
+# and the turtle's state when the layer starts)
+# so changing bottom_layers or skin_layers only weaves the layers they change again,
+# the other layers are replayed from the cache into the output
+# skin_layers (optional) puts the skin on the top skin_layers layers only
+# the shape is only sliced in Rhino when a layer has to be planned or woven
+# output: list of layers (None for the layers replayed, use t.get_lines() for the path)
+def weave_slice_turtle_cached (t,shape,wall_width=3.0,wavelength=3.0, mode=1, bottom_layers=0, skin=False, skin_layers=False, workers=None, sample_spacing=0.25, cache=None):
+	if (cache is None):
+		cache = rcache.cache
+	t.write_gcode_comment("**************************************************")
+	t.write_gcode_comment("******* file generated by WeaveSlicer ************")
+	t.write_gcode_comment("******* conception: Camila Friedman-Gerlicz ******")
+	t.write_gcode_comment("****** python implementation: Leah Buechley ******")
+	t.write_gcode_comment("************** 2023 - present ********************")
+	t.write_gcode_comment("**************************************************")
+	layer_height = t.get_layer_height()
+	sc.cache.clear() # start from fresh slice properties
+	slice_key, polylines = su.cached_slice_polylines(shape, layer_height, sample_spacing, cache)
+	curves = [] # only made in Rhino when a stage has to be computed
+
+	skin_width = 0
+	skin_from = 0 # first layer with a skin
+	if (skin==True):
+		skin_width = t.get_extrude_width()*SKIN_OFFSET_FACTOR
+		if (skin_layers is not False):
+			skin_from = max(len(polylines)-skin_layers, 0)
+	def get_slices():
+		return sc.cache.slices(shape, layer_height, su.slice_shape)
+	def get_curves():
+		if not(curves):
+			curves.extend(skin_curves(t, get_slices(), skin, skin_from))
+		return curves
+
+	# each layer's plan is kept under the slices it is planned from and whether they have a skin,
+	# so changing skin_layers only plans the layers next to the first skinned layer again
+	plan_keys = []
+	for i in range(0,len(polylines)):
+		below, above = lp.planned_from(i, len(polylines))
+		plan_keys.append(rcache.stable_hash("weave plan", slice_key, i, wall_width, wavelength, mode, skin_width, below>=skin_from, above>=skin_from))
+	plans = [cache.get(key, "plans") for key in plan_keys]
+	missing = [i for i in range(0,len(plans)) if plans[i] is None]
+	if (missing):
+		graph = sc.cache.branch_graph(shape, layer_height, get_slices(), bg.BranchGraph)
+		jobs = weave_layer_jobs(get_slices(), get_curves(), graph, missing, wavelength, wall_width=wall_width, mode=mode, sample_spacing=sample_spacing)
+		for i, plan in zip(missing, lp.plan_weave_layers(jobs, workers)):
+			cache.put(plan_keys[i], plan)
+			plans[i] = plan
+
+	layer_key = rcache.stable_hash("weave layers", slice_key, t.get_printer())
+	return weave_plans(t, plans, get_slices, get_curves, wall_width=wall_width, mode=mode, bottom_layers=bottom_layers, skin=skin, skin_from=skin_from, cache=cache, key=layer_key)
+
+# the slices, each branch offset inward for the skin if skin is True (from layer skin_from up)
+def skin_curves(t, shape_slices, skin=False, skin_from=0):
+	if (skin!=True):
+		return shape_slices
+	curves = []
+	for i in range(0,len(shape_slices)):
+		if (i<skin_from):
+			curves.append(shape_slices[i])
+			continue
+		layer_curves = []
+		for curve in shape_slices[i]:
+			point = sc.cache.centroid(curve)
+			layer_curves.append(gb.OffsetCurve(curve,point,t.get_extrude_width()*SKIN_OFFSET_FACTOR)[0])
+		curves.append(layer_curves)
+	return curves
+
+# phase 0 of weave_slice_turtle_parallel, the layer_pipeline.plan_weave_layer jobs for the given layers
+# shape_slices are the slices, curves the same with their skins (from skin_curves) and graph their branch graph
+# each branch is planned from what weave_one_slice_turtle plans it from: its skin curve against
+# the closest branch above with its skin, then the next closest ones as they are sliced,
+# the top layer from the first branch of the layer below against the first branch of the top layer
+def weave_layer_jobs(shape_slices, curves, graph, layers, wavelength, wall_width=3.0, mode=1, sample_spacing=0.25):
+	polylines = {} # curve -> (points, closed), each curve is sampled once
+	def branch(curve, point_number):
+		if (curve not in polylines):
+			polylines[curve] = su.sample_curve(curve, sample_spacing)
+		points, closed = polylines[curve]
+		divided = False
+		if (point_number is not False):
+			divided = [(p[0], p[1], p[2]) for p in sc.cache.divide(curve, point_number)]
+		return (points, closed, divided)
+	def planned(k, lower, uppers):
+		point_number = weave_point_number(lower, wavelength, mode=mode, wall_width=wall_width)
+		return (k, branch(lower, point_number), [(j, branch(upper, point_number)) for j, upper in uppers])
+	jobs = []
+	for i in layers:
+		below, above = lp.planned_from(i, len(shape_slices))
+		if (i==len(shape_slices)-1):
+			jobs.append((i, [planned(0, curves[below][0], [(0, curves[above][0])])]))
+			continue
+		branches = []
+		for k in range(0,len(shape_slices[i])):
+			candidates = graph.candidates(i,k)[:lp.RETRIES+1]
+			uppers = [(candidates[0], curves[above][candidates[0]])]+[(j, shape_slices[above][j]) for j in candidates[1:]]
+			branches.append(planned(k, curves[i][k], uppers))
+		jobs.append((i, branches))
+	return jobs
+
+# weaves the layers planned by layer_pipeline in order
+# get_slices() returns the slices and get_curves() the (skin) slices they were planned from,
+# layers from skin_from up get a skin
+# with a cache, each layer is kept in it under its own key (from key and the layer's plan)
+# and replayed instead of woven while the layer and the turtle's state at its start are unchanged
+# output: list of layers, and the points of the top layer
+def weave_plans(t, plans, get_slices, get_curves, wall_width=3.0, mode=1, bottom_layers=0, skin=False, skin_from=0, cache=None, key=None):
+	layers = []
+	savings = pa.TravelSavings()
+	last = len(plans)-1
+	for i in range(0,len(plans)):
+		layer_skin = skin==True and i>=skin_from
+		make = lambda: weave_plan_layer(t,i,plans[i],get_slices()[i],get_curves()[i],top=(i==last),wall_width=wall_width,mode=mode,bottom_layers=bottom_layers,skin=layer_skin,savings=savings)
+		if (cache is None):
+			x = make()
+		else:
+			layer_key = rcache.stable_hash(key, i, len(plans), plans[i], wall_width, mode, i<bottom_layers, layer_skin)
+			x = cache.layer(t, layer_key, make)
+		layers.append(x)
+	savings.report(t.get_speed())
+
+	points = False
+	if (plans):
+		points = rhino_points(plans[-1][0][3])
+	return layers,points
+
+# weaves layer i from its plan (from layer_pipeline.plan_weave_layer), slices are the layer's
+# slices and curves the same with their skins, the top layer is woven against itself
+# branches are woven in the order that keeps travel short, as in weave_one_slice_turtle
+# returns the layer path
+def weave_plan_layer(t, i, plan, slices, curves, top=False, wall_width=3.0, mode=1, bottom_layers=0, skin=False, savings=None):
+	if (i%2==0):
+		offset=True
+	else:
+		offset=False
+	if (top):
+		k, j, points0, points1, angles = plan[0]
+		return weave_top_branch(t,rhino_points(points0),rhino_points(points1),angles,curves[k],wall_width=wall_width,mode=mode,offset=offset,skin=skin)
+	x = -1
+	for k, start_point, reverse in su.branch_order(t, slices, savings):
+		k, j, points0, points1, angles = plan[k]
+		if (len(plan)>1):
+			t.penup()
+		# the slice above is only woven against in the top layer
+		x = weave_branch(t,i,rhino_points(points0),rhino_points(points1),angles,curves[k],None,wall_width=wall_width,mode=mode,offset=offset,bottom_layers=bottom_layers,skin=skin)
+		if (x==-1):
+			print("error at index: " +str(i))
+	t.penup()
+	return x
+
+# (x, y, z) tuples from layer_pipeline as rhinoscript points, False stays False
+def rhino_points(points):
+	if (points is False):
+		return False
+	return [gb.CreatePoint(p[0],p[1],p[2]) for p in points]
+
 # takes a turtle, shape, and layer number as input and slices that layer with WeaveSlicer, using wall width and wavelength
 # input: turtle (.gcode file associted with turtle), layer number, shape to slice, and slicing parameters 
 # output: sliced layer
-def weave_one_slice_turtle (t,layer,shape,wall_width=3.0,wavelength=3.0, mode=1, bottom_layers=0, skin=False, shape_slices=False):
+def weave_one_slice_turtle (t,layer,shape,wall_width=3.0,wavelength=3.0, mode=1, bottom_layers=0, skin=False, shape_slices=False, savings=None):
 	# print("layer: " +str(layer))
 	layer_height = t.get_layer_height()
 	original_speed = t.get_speed()
 	original_extrude = t.get_extrude_rate()
 	if (shape_slices==False):
-		shape_slices = su.slice_shape(shape,layer_height=layer_height)
+		shape_slices = sc.cache.slices(shape, layer_height, su.slice_shape)
+	graph = sc.cache.branch_graph(shape, layer_height, shape_slices, bg.BranchGraph)
 	if (layer%2==0):
 		offset=True
 	else:
@@ -66,101 +273,51 @@ def weave_one_slice_turtle (t,layer,shape,wall_width=3.0,wavelength=3.0, mode=1,
 	k=0
 	i = layer
 	layers = []
-	skin_offset_factor = .6
+	skin_offset_factor = SKIN_OFFSET_FACTOR
 
 	# if top layer:
 	if (layer==len(shape_slices)-1): 
 		slice0 = shape_slices[i-1][k] # previous slice
 		slice1 = shape_slices[i][k] # current slice
 		if (skin==True):
-			point = rs.CurveAreaCentroid(slice0)[0]
-			slice0 = rs.OffsetCurve(slice0,point,t.get_extrude_width()*skin_offset_factor)[0]
-			point = rs.CurveAreaCentroid(slice1)[0]
-			slice1 = rs.OffsetCurve(slice1,point,t.get_extrude_width()*skin_offset_factor)[0]
+			point = sc.cache.centroid(slice0)
+			slice0 = gb.OffsetCurve(slice0,point,t.get_extrude_width()*skin_offset_factor)[0]
+			point = sc.cache.centroid(slice1)
+			slice1 = gb.OffsetCurve(slice1,point,t.get_extrude_width()*skin_offset_factor)[0]
 		points,points1,angles = find_points_and_angles(slice0,slice1,wavelength,wall_width=wall_width,mode=mode,layer=i)
-		if (points and points1 and angles):
-			interior_points, exterior_points, x=weave_points_and_angles(t,points1,points1,angles,slice1,slice1,wall_width=wall_width,mode=mode,offset=offset, top=True,skin=skin)
-			if (skin==True):
-				generate_skin(t,points=exterior_points, skin_offset_factor=skin_offset_factor,offset=offset)
-		else:
-			x = -1
+		x = weave_top_branch(t,points,points1,angles,slice1,wall_width=wall_width,mode=mode,offset=offset,skin=skin)
 
 		return x,points1
 
 	# all other layers
-	while (k<len(shape_slices[i])):
-	# for all branches in current slice
+	# for all branches in current slice, in the order that keeps travel short
+	for k, start_point, reverse in su.branch_order(t, shape_slices[i], savings):
 		slice0 = shape_slices[i][k] # current slice
 		original_slice = slice0
 
-		if (len(shape_slices[i])==1):
-			# if there is just one branch, use slice above to compute angles
-			slice1 = shape_slices[i+1][k] # slice above
-		else:
-			# if there is more than one branch, lift pen and find the slice above
+		if (len(shape_slices[i])>1):
+			# if there is more than one branch, lift pen
 			t.penup()
-			# if a branch is closing there may not be a matching branch above
-			if (len(shape_slices[i+1])>k):
-			# if there is a matching branch above:
-				# try easy guess first
-				slice1 = shape_slices[i+1][k] # slice above
-			else:
-			# if there is no matching branch above
-				# find closest slice because you have to
-				index = su.find_closest_slice(slice0,shape_slices[i+1]) 
-				slice1 = shape_slices[i+1][index] # next slice
+		# the branches above, the one that continues this branch first
+		candidates = graph.candidates(i,k)
+		slice1 = shape_slices[i+1][candidates[0]] # slice above
 		
 		if (skin==True):
-			point = rs.CurveAreaCentroid(slice0)[0]
-			slice0 = rs.OffsetCurve(slice0,point,t.get_extrude_width()*skin_offset_factor)[0]
-			point = rs.CurveAreaCentroid(slice1)[0]
-			slice1 = rs.OffsetCurve(slice1,point,t.get_extrude_width()*skin_offset_factor)[0]
+			point = sc.cache.centroid(slice0)
+			slice0 = gb.OffsetCurve(slice0,point,t.get_extrude_width()*skin_offset_factor)[0]
+			point = sc.cache.centroid(slice1)
+			slice1 = gb.OffsetCurve(slice1,point,t.get_extrude_width()*skin_offset_factor)[0]
 
 		points,points1,angles = find_points_and_angles(slice0,slice1,wavelength,wall_width=wall_width,mode=mode,layer=i)
 		count=0
-		while (angles is not False and angles[0]>85 and angles[0]<95 and count<5):
+		while (angles is not False and angles[0]>85 and angles[0]<95 and count<min(len(candidates)-1,5)):
 			# if the angle is close to 90
 			# a co-planar slice was found
-			# this is probably the wrong one, try to find a better one
-			index = su.find_closest_slice(slice0,shape_slices[i+1]) 
-			slice1 = shape_slices[i+1][index] # next slice
-			points,points1,angles = find_points_and_angles(slice0,slice1,wavelength,wall_width=wall_width,mode=mode,layer=i)
+			# this is probably the wrong one, try the next closest
 			count+=1
-		if (points is not False and angles is not False):
-			interior_points, exterior_points, x=weave_points_and_angles(t,points,points1,angles,slice0,slice1,wall_width=wall_width,mode=mode,offset=offset,skin=skin)
-		else:
-			x=-1
-		# add skin on as an additional layer to exterior of form
-		if (skin==True):
-			generate_skin(t,points=exterior_points, skin_offset_factor=skin_offset_factor,offset=offset)
-
-
-		if (i<bottom_layers and rs.IsCurveClosed(slice0)):
-			print("bottom layer: " +str(i))
-			if (skin==True):
-				t.penup()
-			if (interior_points):
-				bottom_curve = rs.AddCurve(interior_points)
-				bottom_curve = rs.CloseCurve(bottom_curve)
-			else:
-				bottom_curve = slice0
-			point = rs.CurveAreaCentroid(slice0)[0]
-			if (mode==1):
-				bottom_curve = rs.OffsetCurve(bottom_curve,point,t.get_extrude_width()/2)[0]
-			elif(mode==3):
-				try:
-					if (t.get_printer() is not ("lutum")):
-						bottom_curve = bottom_curve
-					else:
-						bottom_curve = rs.OffsetCurve(bottom_curve,point,t.get_extrude_width()/2)[0]
-				except:
-					print("offset failed")
-					bottom_curve = slice0
-			t.set_speed(original_speed*.8)
-			su.bottom_layer(t,bottom_curve) 
-			t.set_speed(original_speed)
-			t.penup()
-			t.set_position_point(points[0])
+			slice1 = shape_slices[i+1][candidates[count]] # next slice
+			points,points1,angles = find_points_and_angles(slice0,slice1,wavelength,wall_width=wall_width,mode=mode,layer=i)
+		x = weave_branch(t,i,points,points1,angles,slice0,slice1,wall_width=wall_width,mode=mode,offset=offset,bottom_layers=bottom_layers,skin=skin)
 
 		if (x==-1):
 			print("error at index: " +str(i))
@@ -168,14 +325,63 @@ def weave_one_slice_turtle (t,layer,shape,wall_width=3.0,wavelength=3.0, mode=1,
 			layers.append(x)
 		# t.pendown()
 
-		k+=1
-
 	t.penup()
-	if (rs.IsCurveClosed(slice1)==False or rs.IsCurveClosed(slice0)==False): # if current or next curve is not closed, lift pen
+	if (sc.cache.is_closed(slice1)==False or sc.cache.is_closed(slice0)==False): # if current or next curve is not closed, lift pen
 		t.penup()
 
 	return x,points
 
+# weaves the top layer from its points and angles (the top slice is woven against itself)
+# returns the layer path, or -1 if the layer is too small to weave
+def weave_top_branch(t,points,points1,angles,slice1,wall_width=3.0,mode=1,offset=False,skin=False):
+	if (points and points1 and angles):
+		interior_points, exterior_points, x=weave_points_and_angles(t,points1,points1,angles,slice1,slice1,wall_width=wall_width,mode=mode,offset=offset, top=True,skin=skin)
+		if (skin==True):
+			generate_skin(t,points=exterior_points, skin_offset_factor=SKIN_OFFSET_FACTOR,offset=offset)
+	else:
+		x = -1
+	return x
+
+# weaves one branch of a layer from its points and angles
+# adds the skin, and a bottom for the first bottom_layers layers
+# returns the layer path, or -1 if the branch is too small to weave
+def weave_branch(t,layer,points,points1,angles,slice0,slice1,wall_width=3.0,mode=1,offset=False,bottom_layers=0,skin=False):
+	original_speed = t.get_speed()
+	if (points is False or angles is False):
+		return -1
+	interior_points, exterior_points, x=weave_points_and_angles(t,points,points1,angles,slice0,slice1,wall_width=wall_width,mode=mode,offset=offset,skin=skin)
+	# add skin on as an additional layer to exterior of form
+	if (skin==True):
+		generate_skin(t,points=exterior_points, skin_offset_factor=SKIN_OFFSET_FACTOR,offset=offset)
+
+	if (layer<bottom_layers and sc.cache.is_closed(slice0)):
+		print("bottom layer: " +str(layer))
+		if (skin==True):
+			t.penup()
+		if (interior_points):
+			bottom_curve = gb.AddCurve(interior_points)
+			bottom_curve = gb.CloseCurve(bottom_curve)
+		else:
+			bottom_curve = slice0
+		point = sc.cache.centroid(slice0)
+		if (mode==1):
+			bottom_curve = gb.OffsetCurve(bottom_curve,point,t.get_extrude_width()/2)[0]
+		elif(mode==3):
+			try:
+				if (t.get_printer() != ("lutum")):
+					bottom_curve = bottom_curve
+				else:
+					bottom_curve = gb.OffsetCurve(bottom_curve,point,t.get_extrude_width()/2)[0]
+			except:
+				print("offset failed")
+				bottom_curve = slice0
+		t.set_speed(original_speed*.8)
+		su.bottom_layer(t,bottom_curve) 
+		t.set_speed(original_speed)
+		t.penup()
+		t.set_position_point(points[0])
+	return x
+
 # generates a skin curve based on a curve or list of points
 def generate_skin(t,curve =False, points=False, skin_offset_factor=1,offset=False):
 	original_speed = t.get_speed()
@@ -183,9 +389,9 @@ def generate_skin(t,curve =False, points=False, skin_offset_factor=1,offset=Fals
 		print("Skin error")
 		return -1
 	if (points):
-		skin_curve = rs.AddCurve(points)
-	point = rs.CurveAreaCentroid(skin_curve)[0]
-	skin_curve = rs.OffsetCurve(skin_curve,point,-t.get_extrude_width()*skin_offset_factor)[0]
+		skin_curve = gb.AddCurve(points)
+	point = sc.cache.centroid(skin_curve)
+	skin_curve = gb.OffsetCurve(skin_curve,point,-t.get_extrude_width()*skin_offset_factor)[0]
 	t.set_speed(original_speed/2)
 	t.penup()
 	if (offset):
@@ -194,33 +400,29 @@ def generate_skin(t,curve =False, points=False, skin_offset_factor=1,offset=Fals
 		su.follow_curve(t,skin_curve,reverse=True)
 	t.set_speed(original_speed)
 
-# finds points that will be woven. based on wavelength
-# finds overhang angle at each point, based on angle between slice0 and slice1
-# returns lists of points and angles 
-def find_points_and_angles(slice0, slice1, wavelength, mode=1, wall_width=3.0, layer=False, skin=False, num_oscillations=False):
+# the number of points find_points_and_angles divides slice0 and slice1 into, 4 per oscillation
+# (weave_layer_jobs divides the slices for layer_pipeline with it too)
+# False for a layer too small to weave
+def weave_point_number(slice0, wavelength, mode=1, wall_width=3.0):
 	resolution = wavelength/4.5 # start with a slightly smaller resolution than you want
-	# if slice0 is closed and slice1 is open, slice1 is begining of hole and can't find all angles
-	# if slice0 is significantly longer than slice1, also can't find all angles
-	# in these cases, swap slice0 and slice1 to calculate angles
-	swapped_layers = False
 
 	if (mode==3):
 		# use a curve offset by wallwidth to calculate number of points for mode 3
 		# decreases number of points
 		offset_slice = su.get_offset_curve (slice0, wall_width/2)
 		try:
-			points = rs.DivideCurveEquidistant(offset_slice, resolution) # create points resolution apart to find correct #
+			points = sc.cache.divide_equidistant(offset_slice, resolution) # create points resolution apart to find correct #
 		except Exception as e:
 			print(e)
-			points = rs.DivideCurveEquidistant(slice0, resolution)
+			points = sc.cache.divide_equidistant(slice0, resolution)
 	else:
-		points = rs.DivideCurveEquidistant(slice0, resolution) # create points resolution apart to find correct #
+		points = sc.cache.divide_equidistant(slice0, resolution) # create points resolution apart to find correct #
 	point_number = len(points)
 	if (point_number/4<3):
 		print("skipping very small layer")
 		print("points: " +str(point_number))
 		print("oscillations: " +str(round(point_number/4,1)))
-		return False, False, False
+		return False
 
 	# if (layer!=0):
 	# 	if (num_oscillations is not False):
@@ -240,19 +442,33 @@ def find_points_and_angles(slice0, slice1, wavelength, mode=1, wall_width=3.0, l
 	# if (point_number0==point_number):
 	# 	print("Changing number of oscillations after a " +str(oscillation_change) + " oscillation shift. In mm: " +str(oscillation_change*wavelength))
 	# 	# print("old wavelength: " +str(wavelength) + " new wavelength: " +str(round(rs.CurveLength(slice0)*4/point_number,1)))
-	points0 = rs.DivideCurve(slice0, point_number)
-	points1 = rs.DivideCurve(slice1, point_number) 
+	return point_number
+
+# finds points that will be woven. based on wavelength
+# finds overhang angle at each point, based on angle between slice0 and slice1
+# returns lists of points and angles 
+def find_points_and_angles(slice0, slice1, wavelength, mode=1, wall_width=3.0, layer=False, skin=False, num_oscillations=False):
+	# if slice0 is closed and slice1 is open, slice1 is begining of hole and can't find all angles
+	# if slice0 is significantly longer than slice1, also can't find all angles
+	# in these cases, swap slice0 and slice1 to calculate angles
+	swapped_layers = False
+
+	point_number = weave_point_number(slice0, wavelength, mode=mode, wall_width=wall_width)
+	if (point_number is False):
+		return False, False, False
+	points0 = sc.cache.divide(slice0, point_number)
+	points1 = sc.cache.divide(slice1, point_number) 
 
 	if (point_number<=0):
 		return False, False, False;
 	print("oscillations in layer " +str(layer) +": " +str(round(point_number/4,1)))
 	# print("given wavelength: " +str(wavelength) + " new wavelength: " +str(round(rs.CurveLength(slice0)*4/point_number,1)))
-	print("new wavelength: " +str(round(rs.CurveLength(slice0)*4/point_number,1)))
+	print("new wavelength: " +str(round(sc.cache.length(slice0)*4/point_number,1)))
 	
 	# check for discontinuity between two curves
-	slice0_closed = rs.IsCurveClosed(slice0)
-	slice1_closed = rs.IsCurveClosed(slice1)
-	length_difference = rs.CurveLength(slice1)-rs.CurveLength(slice0)
+	slice0_closed = sc.cache.is_closed(slice0)
+	slice1_closed = sc.cache.is_closed(slice1)
+	length_difference = sc.cache.length(slice1)-sc.cache.length(slice0)
 	if (slice0_closed and not(slice1_closed)): 
 		# if slice0 is closed and slice1 is open, slice1 is begining of hole and can't find all angles
 		# if slice0 is significantly longer than slice1, also can't find all angles
@@ -260,23 +476,23 @@ def find_points_and_angles(slice0, slice1, wavelength, mode=1, wall_width=3.0, l
 		slice_placeholder = slice0
 		slice0 = slice1
 		slice1 = slice_placeholder
-		points0 = rs.DivideCurve(slice0, point_number)
-		points1 = rs.DivideCurve(slice1, point_number) 
+		points0 = sc.cache.divide(slice0, point_number)
+		points1 = sc.cache.divide(slice1, point_number) 
 		swapped_layers = True
 	
 	angles=[]
 	for j in range(0,len(points0)):
 		# compare against closest point on next layer
 		# assumption: this is the point directly above the current point
-		closest=rs.CurveClosestPoint(slice1, points0[j])
-		point1 = rs.EvaluateCurve(slice1, closest)
-		vector = rs.VectorSubtract(point1,points0[j])
+		closest=gb.CurveClosestPoint(slice1, points0[j])
+		point1 = gb.EvaluateCurve(slice1, closest)
+		vector = gb.VectorSubtract(point1,points0[j])
 		if (swapped_layers):
 			# calculating angles based on layer below
-			angle = rs.VectorAngle([0,0,-1.0],vector)
+			angle = gb.VectorAngle([0,0,-1.0],vector)
 		else:
 			# calculating angles based on layer above
-			angle = rs.VectorAngle([0,0,1.0],vector)
+			angle = gb.VectorAngle([0,0,1.0],vector)
 		angles.append(angle)
 
 	if (swapped_layers): 
@@ -285,8 +501,8 @@ def find_points_and_angles(slice0, slice1, wavelength, mode=1, wall_width=3.0, l
 		slice_placeholder = slice0
 		slice0 = slice1
 		slice1 = slice_placeholder
-		points0 = rs.DivideCurve(slice0, point_number)
-		points1 = rs.DivideCurve(slice1, point_number)
+		points0 = sc.cache.divide(slice0, point_number)
+		points1 = sc.cache.divide(slice1, point_number)
 
 	# check for extreme angles that need correction
 	new_points0=[]
@@ -296,8 +512,8 @@ def find_points_and_angles(slice0, slice1, wavelength, mode=1, wall_width=3.0, l
 	for j in range (0,len(points0)):
 		if (angles[j]>65):
 			# in case of extreme angle
-			area0 = rs.CurveArea(slice0)[0]
-			area1 = rs.CurveArea(slice1)[0]
+			area0 = sc.cache.area(slice0)[0]
+			area1 = sc.cache.area(slice1)[0]
 			percentage_change = abs((area1-area0)/area0)
 			# print("percentage change: " +str(percentage_change))
 			# big change in area means extreme angle across entire shape
@@ -328,8 +544,8 @@ def find_points_and_angles(slice0, slice1, wavelength, mode=1, wall_width=3.0, l
 		# get back to correct number of points
 		while (point_number%4!=0): #want %4 number of points to complete circle
 			point_number-=1
-		points0 = rs.DivideCurve(slice0, point_number)
-		points1 = rs.DivideCurve(slice1, point_number) 
+		points0 = sc.cache.divide(slice0, point_number)
+		points1 = sc.cache.divide(slice1, point_number) 
 
 	return points0,points1,angles
 
@@ -347,7 +563,7 @@ def weave_points_and_angles(t,points,points1,angles,slice0,slice1,wall_width=3.0
 		slice0=slice1
 		points=points1
 
-	t2 = ExtruderTurtle()
+	t2 = ft.FrameTurtle()
 
 	# check direction of curve points and adjust if necessary
 	t2.set_position_point(points[0])
@@ -355,9 +571,9 @@ def weave_points_and_angles(t,points,points1,angles,slice0,slice1,wall_width=3.0
 	t2.left(90)
 	t2.forward(1)
 	point = t2.get_position()
-	slice0_closed = rs.IsCurveClosed(slice0)
+	slice0_closed = sc.cache.is_closed(slice0)
 	if (slice0_closed):
-		test = rs.PointInPlanarClosedCurve(point, slice0)
+		test = gb.PointInPlanarClosedCurve(point, slice0)
 		if (test==False):
 			# point is outside
 			# should be inside, swap modes
@@ -419,7 +635,7 @@ def weave_points_and_angles(t,points,points1,angles,slice0,slice1,wall_width=3.0
 				p0 = t.get_position()
 				t2.forward(amplitude)
 				p1 = t2.get_position()
-				if (check_intersection(t3,rs.AddLine(p0,p1))==False):	
+				if (check_intersection(t3,gb.AddLine(p0,p1))==False):	
 					t.set_position_point(t2.get_position())
 					t3.set_position_point(t2.get_position())
 				if (j==0):
@@ -438,7 +654,7 @@ def weave_points_and_angles(t,points,points1,angles,slice0,slice1,wall_width=3.0
 				p0 = t.get_position()
 				t2.forward(amplitude*2)
 				p1 = t2.get_position()
-				if (check_intersection(t3,rs.AddLine(p0,p1))==False):	
+				if (check_intersection(t3,gb.AddLine(p0,p1))==False):	
 				# if (True):
 					t.set_position_point(t2.get_position())
 					t3.set_position_point(t2.get_position())
@@ -503,7 +719,7 @@ def weave_points_and_angles(t,points,points1,angles,slice0,slice1,wall_width=3.0
 				return
 			exterior_points.append(t.get_position())
 
-		if (j<1 and rs.IsCurveClosed(slice0)==False):
+		if (j<1 and sc.cache.is_closed(slice0)==False):
 			t.penup()
 			t3.penup()
 		else:
@@ -526,7 +742,7 @@ def check_intersection(t,curve):
 	turtle_path = t.get_points()
 	if (len(turtle_path)<2):
 		return False
-	t_curve = rs.AddCurve(turtle_path)
+	t_curve = gb.AddCurve(turtle_path)
 	try:
 		# intersection_events = rs.CurveCurveIntersection(t_curve, curve)
 		intersection_events = 0
@@ -542,7 +758,7 @@ def check_intersection(t,curve):
 
 def small_curve_check(slice, amplitude, mode):
 
-	area = rs.CurveArea(slice)
+	area = sc.cache.area(slice)
 
 	if (not(area)):
 		#if curve is open
@@ -578,7 +794,7 @@ def weave_points_and_angles_pattern(t,pattern_row,points,points1,angles,slice0,s
 		slice0=slice1
 		points=points1
 
-	t2 = ExtruderTurtle()
+	t2 = ft.FrameTurtle()
 
 	# check direction of points and mode
 	t2.set_position_point(points[0])
@@ -586,9 +802,9 @@ def weave_points_and_angles_pattern(t,pattern_row,points,points1,angles,slice0,s
 	t2.left(90)
 	t2.forward(1)
 	point = t2.get_position()
-	slice0_closed = rs.IsCurveClosed(slice0)
+	slice0_closed = sc.cache.is_closed(slice0)
 	if (slice0_closed):
-		test = rs.PointInPlanarClosedCurve(point, slice0)
+		test = gb.PointInPlanarClosedCurve(point, slice0)
 		if (test==False):
 			# point is outside
 			# should be inside, swap modes
@@ -681,7 +897,7 @@ def weave_points_and_angles_pattern(t,pattern_row,points,points1,angles,slice0,s
 				t.set_position_point(t2.get_position())
 
 	# skin part of clay layer
-	new_pattern_row = rotate_pattern(pattern_row,0,step_shift=-1)
+	new_pattern_row = ps.rotate_pattern(pattern_row,0,step_shift=-1)
 	if (skin==True):
 		for j in range (0,len(skin_points)):
 			if (new_pattern_row[j]>.9):
@@ -815,9 +1031,9 @@ def weave_points_and_angles_pattern(t,pattern_row,points,points1,angles,slice0,s
 	# t.set_extruder(0)
 
 	# don't weave pattern
-	curve=rs.AddCurve(points)
-	new_points = rs.DivideCurve(curve,len(pattern_row)-1)
-	follow_curve_pattern_only(t, points=new_points, number_walls=1, pattern_row=pattern_row, reverse=reverse)
+	curve=gb.AddCurve(points)
+	new_points = sc.cache.divide(curve, len(pattern_row)-1)
+	ps.follow_curve_pattern_only(t, points=new_points, number_walls=1, pattern_row=pattern_row, reverse=reverse)
 
 	
 
@@ -829,7 +1045,8 @@ def weave_slice_pattern (t,pattern_array,shape,wall_width=3.0,wavelength=3.0, mo
 	t.write_gcode_comment("************** 2023 - present ********************")
 	t.write_gcode_comment("**************************************************")
 	layer_height = t.get_layer_height()
-	shape_slices = slice_shape(shape,layer_height=layer_height)
+	shape_slices = su.slice_shape(shape,layer_height=layer_height)
+	graph = bg.BranchGraph(shape_slices)
 	
 	offset=True 
 	layers = []
@@ -856,29 +1073,31 @@ def weave_slice_pattern (t,pattern_array,shape,wall_width=3.0,wavelength=3.0, mo
 		while (k<len(shape_slices[i])):
 			slice0 = shape_slices[i][k] # current slice
 			if (skin==True):
-				skin_points = rs.DivideCurve(slice0,len(pattern_row))
+				skin_points = sc.cache.divide(slice0, len(pattern_row))
 				t.penup()
-				slice0 = get_offset_curve(slice0,t.get_extrude_width()/2+.1)
+				slice0 = su.get_offset_curve(slice0,t.get_extrude_width()/2+.1)
 
-			if (i<bottom_layers and rs.IsCurveClosed(slice0)):
+			if (i<bottom_layers and sc.cache.is_closed(slice0)):
 				bottom_layer=[]
-				point = rs.CurveAreaCentroid(slice0)[0]
+				point = sc.cache.centroid(slice0)
 				bottom_curve = slice0
 				if (mode==1):
-					bottom_curve = rs.OffsetCurve(slice0,point,wall_width)[0]
+					bottom_curve = gb.OffsetCurve(slice0,point,wall_width)[0]
 				elif(mode==3):
-					bottom_curve = rs.OffsetCurve(slice0,point,wall_width*1.5)[0]
+					bottom_curve = gb.OffsetCurve(slice0,point,wall_width*1.5)[0]
 				else:
 					bottom_curve = slice0
-				bottom_curves=get_offset_curves(bottom_curve,t.get_extrude_width())
-				bottom_layer = bottom_layer + [follow_curve(t,bottom_curve)]
+				bottom_curves=su.get_offset_curves(bottom_curve,t.get_extrude_width())
+				bottom_layer = bottom_layer + [su.follow_curve(t,bottom_curve)]
 				for c in range (0,len(bottom_curves)):
-					bottom_layer = bottom_layer + [follow_curve(t,bottom_curves[c])]
+					bottom_layer = bottom_layer + [su.follow_curve(t,bottom_curves[c])]
 					t.penup()
 
+			# the branches above, the one that continues this branch first
+			candidates = graph.candidates(i,k)
 			if (len(shape_slices[i])==1):
 				# if there is just one branch, use slice above to compute angles
-				slice1 = shape_slices[i+1][k] # slice above
+				slice1 = shape_slices[i+1][candidates[0]] # slice above
 			else:
 				# fail on more complex shape
 				print("Can't apply pattern to complex shape!")
@@ -886,14 +1105,13 @@ def weave_slice_pattern (t,pattern_array,shape,wall_width=3.0,wavelength=3.0, mo
 
 			points,points1,angles = find_points_and_angles(slice0,slice1,wavelength,wall_width=wall_width,mode=mode,layer=i)
 			count=0
-			while (angles[0]>85 and angles[0]<95 and count<5):
+			while (angles[0]>85 and angles[0]<95 and count<min(len(candidates)-1,5)):
 				# if the angle is close to 90
 				# a co-planar slice was found
-				# this is probably the wrong one, try to find a better one
-				index = su.find_closest_slice(slice0,shape_slices[i+1]) 
-				slice1 = shape_slices[i+1][index] # next slice
-				points,points1,angles = find_points_and_angles(slice0,slice1,wavelength,wall_width=wall_width,mode=mode,layer=i)
+				# this is probably the wrong one, try the next closest
 				count+=1
+				slice1 = shape_slices[i+1][candidates[count]] # next slice
+				points,points1,angles = find_points_and_angles(slice0,slice1,wavelength,wall_width=wall_width,mode=mode,layer=i)
 
 			if (i>8 and i<len(shape_slices)-13):
 				reverse=False
@@ -915,7 +1133,7 @@ def weave_slice_pattern (t,pattern_array,shape,wall_width=3.0,wavelength=3.0, mo
 			
 		offset=not(offset)
 
-		if (rs.IsCurveClosed(slice1)==False or rs.IsCurveClosed(slice0)==False ): # if current or next curve is not closed, lift pen
+		if (sc.cache.is_closed(slice1)==False or sc.cache.is_closed(slice0)==False ): # if current or next curve is not closed, lift pen
 			t.penup()
 
 	# top slice
@@ -935,9 +1153,9 @@ def even_wall_from_angles(t,angles,slice0,slice1,wall_width=3.0,top=False,steps=
 	if (top):
 		slice0=slice1
 
-	points = rs.DivideCurve(slice0, steps)
+	points = sc.cache.divide(slice0, steps)
 
-	t2 = ExtruderTurtle()
+	t2 = ft.FrameTurtle()
 	t2.set_position_point(points[0])
 	t2.set_position_point(points[1])
 	t2.left(90)
@@ -945,7 +1163,7 @@ def even_wall_from_angles(t,angles,slice0,slice1,wall_width=3.0,top=False,steps=
 	point = t2.get_position()
 	t2.set_position_point(points[len(points)-1])
 
-	slice0_closed = rs.IsCurveClosed(slice0)
+	slice0_closed = sc.cache.is_closed(slice0)
 
 	if (not(slice0_closed)):
 		# open curve
@@ -980,17 +1198,11 @@ def even_wall_from_angles(t,angles,slice0,slice1,wall_width=3.0,top=False,steps=
 	# actually generate path
 	curve = slice0
 	for w in range(1,max_walls+1):
-		points = rs.DivideCurve(curve, steps)
-		for j in range(0,len(points)):
-			current_wall = walls[j]
-			if (w<=current_wall):
-				t.pendown()
-			else:
-				t.penup()
-			t.set_position_point(points[j])
+		points = sc.cache.divide(curve, steps)
+		t.follow_path(points, [w<=walls[j] for j in range(0,len(points))])
 
 		# if the curve is closed, close the curve
-		if (rs.IsCurveClosed(curve)==True):
+		if (sc.cache.is_closed(curve)==True):
 			t.set_position_point(points[0])
 		else:
 			t.penup()
@@ -998,14 +1210,14 @@ def even_wall_from_angles(t,angles,slice0,slice1,wall_width=3.0,top=False,steps=
 			t.pendown()
 
 		# find next offset curve
-		if (rs.IsCurveClosed(curve)==True):
-			point = rs.CurveAreaCentroid(curve)[0]
+		if (sc.cache.is_closed(curve)==True):
+			point = sc.cache.centroid(curve)
 		else:
 			point = [0,0,0]
-		next_curve = rs.OffsetCurve(curve,point,t.get_extrude_width())[0]
+		next_curve = gb.OffsetCurve(curve,point,t.get_extrude_width())[0]
 		curve = next_curve
 
-def slice_even_walls (t,shape,wall_width=3.0,wavelength=3.0, bottom_layers=0):
+def slice_even_walls (t,shape,wall_width=3.0,wavelength=3.0, bottom_layers=0, mode=1):
 	t.write_gcode_comment("**************************************************")
 	t.write_gcode_comment("******* file generated by WeaveSlicer ************")
 	t.write_gcode_comment("******* conception: Camila Friedman-Gerlicz ******")
@@ -1013,62 +1225,52 @@ def slice_even_walls (t,shape,wall_width=3.0,wavelength=3.0, bottom_layers=0):
 	t.write_gcode_comment("************** 2023 - present ********************")
 	t.write_gcode_comment("**************************************************")
 	layer_height = t.get_layer_height()
-	shape_slices = slice_shape(shape,layer_height=layer_height)
+	shape_slices = su.slice_shape(shape,layer_height=layer_height)
+	graph = bg.BranchGraph(shape_slices)
 	# for all slices in shape
 	offset=True 
 	layers = []
 	points=False
 	x=-1
 	bottom_layer=False
+	savings = pa.TravelSavings()
 	for i in range (0,len(shape_slices)-1):
-		k=0
-		while (k<len(shape_slices[i])):
-		# for all branches in current slice
+		# for all branches in current slice, in the order that keeps travel short
+		for k, start_point, reverse in su.branch_order(t, shape_slices[i], savings):
 			slice0 = shape_slices[i][k] # current slice
 
-			if (i<bottom_layers and rs.IsCurveClosed(slice0)):
+			if (i<bottom_layers and sc.cache.is_closed(slice0)):
 				bottom_layer=[]
-				point = rs.CurveAreaCentroid(slice0)[0]
+				point = sc.cache.centroid(slice0)
 				bottom_curve = slice0
 				if (mode==1):
-					bottom_curve = rs.OffsetCurve(slice0,point,wall_width)[0]
+					bottom_curve = gb.OffsetCurve(slice0,point,wall_width)[0]
 				elif(mode==3):
-					bottom_curve = rs.OffsetCurve(slice0,point,wall_width*1.5)[0]
+					bottom_curve = gb.OffsetCurve(slice0,point,wall_width*1.5)[0]
 				else:
 					bottom_curve = slice0
-				bottom_curves=get_offset_curves(bottom_curve,t.get_extrude_width())
-				bottom_layer = bottom_layer + [follow_curve(t,bottom_curve)]
+				bottom_curves=su.get_offset_curves(bottom_curve,t.get_extrude_width())
+				bottom_layer = bottom_layer + [su.follow_curve(t,bottom_curve)]
 				for c in range (0,len(bottom_curves)):
-					bottom_layer = bottom_layer + [follow_curve(t,bottom_curves[c])]
+					bottom_layer = bottom_layer + [su.follow_curve(t,bottom_curves[c])]
 					t.penup()
 
-			if (len(shape_slices[i])==1):
-				# if there is just one branch, use slice above to compute angles
-				slice1 = shape_slices[i+1][k] # slice above
-			else:
-				# if there is more than one branch, lift pen and find the slice above
+			if (len(shape_slices[i])>1):
+				# if there is more than one branch, lift pen
 				t.penup()
-				# if a branch is closing there may not be a matching branch above
-				if (len(shape_slices[i+1])>k):
-				# if there is a matching branch above:
-					# try easy guess first
-					slice1 = shape_slices[i+1][k] # slice above
-				else:
-				# if there is no matching branch above
-					# find closest slice because you have to
-					index = su.find_closest_slice(slice0,shape_slices[i+1]) 
-					slice1 = shape_slices[i+1][index] # next slice
+			# the branches above, the one that continues this branch first
+			candidates = graph.candidates(i,k)
+			slice1 = shape_slices[i+1][candidates[0]] # slice above
 			
 			points,points1,angles = find_points_and_angles(slice0,slice1,wavelength,wall_width=wall_width,mode=mode)
 			count=0
-			while (angles[0]>85 and angles[0]<95 and count<5):
+			while (angles[0]>85 and angles[0]<95 and count<min(len(candidates)-1,5)):
 				# if the angle is close to 90
 				# a co-planar slice was found
-				# this is probably the wrong one, try to find a better one
-				index = su.find_closest_slice(slice0,shape_slices[i+1]) 
-				slice1 = shape_slices[i+1][index] # next slice
-				points,points1,angles = find_points_and_angles(slice0,slice1,wavelength,wall_width=wall_width,mode=mode)
+				# this is probably the wrong one, try the next closest
 				count+=1
+				slice1 = shape_slices[i+1][candidates[count]] # next slice
+				points,points1,angles = find_points_and_angles(slice0,slice1,wavelength,wall_width=wall_width,mode=mode)
 
 			x=even_wall_from_angles(t,angles,slice0,slice1,wall_width=wall_width)
 			if (x==-1):
@@ -1079,11 +1281,10 @@ def slice_even_walls (t,shape,wall_width=3.0,wavelength=3.0, bottom_layers=0):
 				else:
 					layers.append(x)
 			t.pendown()
-			k+=1
 			
 		offset=not(offset)
 
-		if (rs.IsCurveClosed(slice1)==False or rs.IsCurveClosed(slice0)==False ): # if current or next curve is not closed, lift pen
+		if (sc.cache.is_closed(slice1)==False or sc.cache.is_closed(slice0)==False ): # if current or next curve is not closed, lift pen
 			t.penup()
 
 	# top slice
@@ -1091,6 +1292,7 @@ def slice_even_walls (t,shape,wall_width=3.0,wavelength=3.0, bottom_layers=0):
 		x=even_wall_from_angles(t,angles,slice0,slice1,wall_width=wall_width)
 	if (x!=-1):
 		layers.append(x)
+	savings.report(t.get_speed())
 
 	return layers
 
@@ -1102,7 +1304,7 @@ def even_wall_from_angles_pattern(t,pattern_row,angles,slice0,slice1,wall_width=
 		slice0=slice1
 
 	steps = len(pattern_row)
-	points = rs.DivideCurve(slice0, steps)
+	points = sc.cache.divide(slice0, steps)
 		
 	# calculate number of walls for each point
 	max_walls = 1
@@ -1132,10 +1334,10 @@ def even_wall_from_angles_pattern(t,pattern_row,angles,slice0,slice1,wall_width=
 	# don't generate more points than necessary (1 per mm)
 	if (pattern_check==False):
 		resolution = 1.0
-		points = rs.DivideCurveEquidistant(slice0, resolution)
+		points = sc.cache.divide_equidistant(slice0, resolution)
 		steps = len(points)
 	else:
-		curve_length = rs.CurveLength(slice0)
+		curve_length = sc.cache.length(slice0)
 		if (curve_length/steps < .25):
 			print("Warning!! Your pattern is very high resolution and could crash the print. Decrease the size of your array!")
 			print("mm per pattern: " +str(round(curve_length/steps, 2)))
@@ -1145,11 +1347,11 @@ def even_wall_from_angles_pattern(t,pattern_row,angles,slice0,slice1,wall_width=
 	offset_curves = []
 	for w in range (0,max_walls):
 		offset_curves.append(curve)
-		if (rs.IsCurveClosed(curve)==True):
-			point = rs.CurveAreaCentroid(curve)[0]
+		if (sc.cache.is_closed(curve)==True):
+			point = sc.cache.centroid(curve)
 		else:
 			point = [0,0,0]
-		next_curve = rs.OffsetCurve(curve,point,t.get_extrude_width()*(1-w*.1))[0]		
+		next_curve = gb.OffsetCurve(curve,point,t.get_extrude_width()*(1-w*.1))[0]		
 		curve = next_curve
 	offset_curves.reverse()
 
@@ -1169,7 +1371,7 @@ def even_wall_from_angles_pattern(t,pattern_row,angles,slice0,slice1,wall_width=
 	for w in range(0,len(offset_curves)):
 		t.penup()
 		curve = offset_curves[w]
-		points = rs.DivideCurve(curve, steps)
+		points = sc.cache.divide(curve, steps)
 		first_pattern_pixel = True
 		for j in range(0,len(points)):
 			current_wall = walls[j]
@@ -1187,7 +1389,7 @@ def even_wall_from_angles_pattern(t,pattern_row,angles,slice0,slice1,wall_width=
 				first_pattern_pixel=True
 
 		# if the curve is closed, close the curve
-		if (rs.IsCurveClosed(curve)==True and pattern_row[j]>.5):
+		if (sc.cache.is_closed(curve)==True and pattern_row[j]>.5):
 			t.set_position_point(points[0])
 		else:
 			t.penup()
@@ -1203,7 +1405,7 @@ def even_wall_from_angles_pattern(t,pattern_row,angles,slice0,slice1,wall_width=
 	for w in range(0,len(offset_curves)):
 		t.penup()
 		curve = offset_curves[w]
-		points = rs.DivideCurve(curve, steps)
+		points = sc.cache.divide(curve, steps)
 		first_pattern_pixel = True
 		for j in range(1,len(points)-1):
 			current_wall = walls[j]
@@ -1224,7 +1426,7 @@ def even_wall_from_angles_pattern(t,pattern_row,angles,slice0,slice1,wall_width=
 				first_pattern_pixel=True
 				t.set_position(points[j].X, points[j].Y, points[j].Z+3)
 		# if the curve is closed, close the curve
-		if (rs.IsCurveClosed(curve)==True and pattern_row[0]<.5):
+		if (sc.cache.is_closed(curve)==True and pattern_row[0]<.5):
 			t.set_position_point(points[0])
 		else:
 			t.penup()
@@ -1233,7 +1435,7 @@ def even_wall_from_angles_pattern(t,pattern_row,angles,slice0,slice1,wall_width=
 	t.lift(t.get_layer_height())
 	t.swap_extruder()
 
-def slice_even_walls_pattern (t,pattern,shape,wall_width=3.0,bottom_layers=0):
+def slice_even_walls_pattern (t,pattern,shape,wall_width=3.0,bottom_layers=0, mode=1):
 	t.write_gcode_comment("**************************************************")
 	t.write_gcode_comment("******* file generated by WeaveSlicer ************")
 	t.write_gcode_comment("******* conception: Camila Friedman-Gerlicz ******")
@@ -1241,7 +1443,8 @@ def slice_even_walls_pattern (t,pattern,shape,wall_width=3.0,bottom_layers=0):
 	t.write_gcode_comment("************** 2023 - present ********************")
 	t.write_gcode_comment("**************************************************")
 	layer_height = t.get_layer_height()
-	shape_slices = slice_shape(shape,layer_height=layer_height)
+	shape_slices = su.slice_shape(shape,layer_height=layer_height)
+	graph = bg.BranchGraph(shape_slices)
 	# for all slices in shape
 	offset=True 
 	layers = []
@@ -1256,43 +1459,32 @@ def slice_even_walls_pattern (t,pattern,shape,wall_width=3.0,bottom_layers=0):
 		# for all branches in current slice
 			slice0 = shape_slices[i][k] # current slice
 
-			if (i<bottom_layers and rs.IsCurveClosed(slice0)):
+			if (i<bottom_layers and sc.cache.is_closed(slice0)):
 				bottom_layer=[]
-				point = rs.CurveAreaCentroid(slice0)[0]
+				point = sc.cache.centroid(slice0)
 				bottom_curve = slice0
-				bottom_curves=get_offset_curves(bottom_curve,t.get_extrude_width())
-				bottom_layer = bottom_layer + [follow_curve(t,bottom_curve)]
+				bottom_curves=su.get_offset_curves(bottom_curve,t.get_extrude_width())
+				bottom_layer = bottom_layer + [su.follow_curve(t,bottom_curve)]
 				for c in range (0,len(bottom_curves)):
-					bottom_layer = bottom_layer + [follow_curve(t,bottom_curves[c])]
+					bottom_layer = bottom_layer + [su.follow_curve(t,bottom_curves[c])]
 					t.penup()
 
-			if (len(shape_slices[i])==1):
-				# if there is just one branch, use slice above to compute angles
-				slice1 = shape_slices[i+1][k] # slice above
-			else:
-				# if there is more than one branch, lift pen and find the slice above
+			if (len(shape_slices[i])>1):
+				# if there is more than one branch, lift pen
 				t.penup()
-				# if a branch is closing there may not be a matching branch above
-				if (len(shape_slices[i+1])>k):
-				# if there is a matching branch above:
-					# try easy guess first
-					slice1 = shape_slices[i+1][k] # slice above
-				else:
-				# if there is no matching branch above
-					# find closest slice because you have to
-					index = su.find_closest_slice(slice0,shape_slices[i+1]) 
-					slice1 = shape_slices[i+1][index] # next slice
+			# the branches above, the one that continues this branch first
+			candidates = graph.candidates(i,k)
+			slice1 = shape_slices[i+1][candidates[0]] # slice above
 			
 			points,points1,angles = find_points_and_angles(slice0,slice1,wavelength=2,wall_width=wall_width,mode=mode)
 			count=0
-			while (angles[0]>85 and angles[0]<95 and count<5):
+			while (angles[0]>85 and angles[0]<95 and count<min(len(candidates)-1,5)):
 				# if the angle is close to 90
 				# a co-planar slice was found
-				# this is probably the wrong one, try to find a better one
-				index = su.find_closest_slice(slice0,shape_slices[i+1]) 
-				slice1 = shape_slices[i+1][index] # next slice
-				points,points1,angles = find_points_and_angles(slice0,slice1,wavelength=2,wall_width=wall_width,mode=mode)
+				# this is probably the wrong one, try the next closest
 				count+=1
+				slice1 = shape_slices[i+1][candidates[count]] # next slice
+				points,points1,angles = find_points_and_angles(slice0,slice1,wavelength=2,wall_width=wall_width,mode=mode)
 			pattern_row = pattern[pattern_index]
 			if (i>=bottom_layers):
 				t.pendown()
@@ -1305,7 +1497,7 @@ def slice_even_walls_pattern (t,pattern,shape,wall_width=3.0,bottom_layers=0):
 					else:
 						layers.append(x)
 			k+=1
-		if (rs.IsCurveClosed(slice1)==False or rs.IsCurveClosed(slice0)==False ): # if current or next curve is not closed, lift pen
+		if (sc.cache.is_closed(slice1)==False or sc.cache.is_closed(slice0)==False ): # if current or next curve is not closed, lift pen
 			t.penup()
 
 		t.penup()
@@ -0,0 +1,27 @@
+import os
+import sys
+
+# the checks run outside Rhino, on the polyline geometry backend
+# the library modules import each other by name, so their folder goes on the path,
+# and the slicers import the extruder_turtle package, so its parent folder does too
+os.environ.setdefault("EXTRUDER_TURTLE_GEOMETRY", "polyline")
+ROOT = os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir))
+for folder in (ROOT, os.path.join(ROOT, "extruder_turtle")):
+	if (folder not in sys.path):
+		sys.path.insert(0, folder)
+
+import pytest
+
+
+# make_turtle() makes a turtle set up for the super printer that writes into memory,
+# t.get_sink().getvalue() is the G-code it wrote
+@pytest.fixture
+def make_turtle():
+	import gcode_writer as gw
+	import ExtruderTurtle as e
+	def make():
+		t = e.ExtruderTurtle()
+		t.setup(printer="super")
+		t.set_sink(gw.MemoryGcodeSink())
+		return t
+	return make
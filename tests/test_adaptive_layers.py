@@ -0,0 +1,20 @@
+import mesh_slicer as ms
+import slicer_utilities as su
+from benchmarks import shapes
+
+# adaptive layers where the walls don't lean are the even layers
+
+
+def test_vertical_walls_get_the_even_planes():
+	mesh = shapes.cylinder(radius=20, height=10)
+	heights = su.adaptive_heights(mesh, 1.0)
+	assert len(heights)==len(ms.plane_heights(0.0, 10.0, 1.0))==11
+	even = ms.slice_mesh(mesh, 1.0)
+	adaptive = ms.slice_mesh(mesh, 1.0, heights=heights)
+	assert [layer[0][0][0][2] for layer in adaptive]==[layer[0][0][0][2] for layer in even]
+
+def test_leaning_walls_reach_the_top():
+	mesh = shapes.flared_vase()
+	heights = su.adaptive_heights(mesh, 1.0)
+	assert heights[-1]==120.0
+	assert len(heights)>121
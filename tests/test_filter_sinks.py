@@ -0,0 +1,59 @@
+# filter stages between the turtle and its sink keep where the moves end and how much they extrude
+
+
+# (x, y, z, e) after all the (relative) moves of the G-code
+def totals(gcode):
+	total = {"X": 0.0, "Y": 0.0, "Z": 0.0, "E": 0.0}
+	moves = 0
+	for line in gcode.splitlines():
+		words = line.split()
+		if not(words) or words[0] not in ("G0", "G1", "G2", "G3"):
+			continue
+		moves += 1
+		for word in words[1:]:
+			if (word[0] in total):
+				total[word[0]] += float(word[1:])
+	return (total["X"], total["Y"], total["Z"], total["E"]), moves
+
+# circles, straight walls with many short moves, travel and a layer change
+def draw(t):
+	t.pendown()
+	for layer in range(2):
+		for k in range(144):
+			t.forward(0.5)
+			t.right(2.5)
+		for k in range(40):
+			t.forward(0.5)
+		t.right(90)
+		for k in range(40):
+			t.forward(0.5)
+		t.penup()
+		t.forward(5)
+		t.pendown()
+		t.lift(t.get_layer_height())
+
+def filtered_output(make_turtle, filters):
+	t = make_turtle()
+	memory = t.get_sink()
+	for f in filters:
+		getattr(t, f)()
+	draw(t)
+	t.get_sink().flush()
+	return memory.getvalue()
+
+def assert_same_totals(make_turtle, filters):
+	(plain, moves) = totals(filtered_output(make_turtle, []))
+	(filtered, filtered_moves) = totals(filtered_output(make_turtle, filters))
+	assert filtered_moves<moves
+	for a, b in zip(plain, filtered):
+		assert abs(a-b)<1e-6
+
+def test_arc_fitting_keeps_end_and_extrusion(make_turtle):
+	assert_same_totals(make_turtle, ["set_arc_fitting"])
+	assert "\nG2 " in filtered_output(make_turtle, ["set_arc_fitting"])
+
+def test_decimation_keeps_end_and_extrusion(make_turtle):
+	assert_same_totals(make_turtle, ["set_decimation"])
+
+def test_decimation_and_arc_fitting_keep_end_and_extrusion(make_turtle):
+	assert_same_totals(make_turtle, ["set_decimation", "set_arc_fitting"])
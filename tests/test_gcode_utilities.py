@@ -0,0 +1,58 @@
+import gcode_utilities as gu
+
+# read_gcode follows the positioning and extrusion modes, stats and parse_gcode count the travels
+
+
+# a header in absolute mode, then relative moves like ExtruderTurtle writes
+TURTLE_GCODE = """; header
+G90
+G1 X100 Y100 E5 ; skipped until G91
+G91
+G1 X10 Y0 E1
+G0 X0 Y20
+G0 X0 Y0
+G0 X-1 Y0 Z0.5
+G1 X0 Y-5 E0.5
+""".splitlines()
+
+def test_relative_moves_after_g91():
+	moves = gu.read_gcode(TURTLE_GCODE, wait_for_relative=True)
+	assert len(moves)==5
+	assert moves.point(len(moves))==(9.0, 15.0, 0.5)
+	assert [moves.e[row] for row in moves.rows()]==[1.0, 0.0, 0.0, 0.0, 0.5]
+
+def test_absolute_moves_and_extrusion_modes():
+	moves = gu.read_gcode("""G90
+G1 X10 Y0 E2
+G1 X10 Y10 E5
+M83
+G1 X0 Y10 E1
+M82
+G92 E0
+G1 X0 Y0 E0.5
+G92 X100
+G1 X110 E1
+G91
+G1 X-10 E0.25
+""".splitlines())
+	assert [moves.point(row) for row in moves.rows()]==[(10.0, 0.0, 0.0), (10.0, 10.0, 0.0), (0.0, 10.0, 0.0), (0.0, 0.0, 0.0), (110.0, 0.0, 0.0), (100.0, 0.0, 0.0)]
+	assert [moves.e[row] for row in moves.rows()]==[2.0, 3.0, 1.0, 0.5, 0.5, 0.25]
+
+def test_stats_count_travels():
+	stats = gu.read_gcode(TURTLE_GCODE, wait_for_relative=True).stats(travel_length=15)
+	assert stats['moves']==5
+	assert stats['number_true_travels']==1
+	assert stats['true_travel_length']==20.0
+	assert stats['number_short_travels']==1 # the zero length travel isn't counted
+	assert abs(stats['travel_distance']-(20.0+1.25**0.5))<1e-9
+	assert stats['print_distance']==15.0
+	assert stats['extrusion']==1.5
+
+def test_parse_gcode_reuses_the_travel_lines(tmp_path):
+	gcode = tmp_path/"part.gcode"
+	gcode.write_text("\n".join(TURTLE_GCODE)+"\n")
+	print_lines, travel_lines, true_travel_lines, number_true_travels, true_travel_length = gu.parse_gcode(str(gcode))
+	assert len(print_lines)==2
+	assert len(travel_lines)==2
+	assert number_true_travels==1 and true_travel_length==20.0
+	assert len(true_travel_lines)==1 and true_travel_lines[0] is travel_lines[0]
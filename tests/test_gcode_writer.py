@@ -0,0 +1,80 @@
+import math
+import pytest
+import gcode_writer as gw
+
+# binary and gzip G-code come back as the same text
+
+
+# the same moves and text to every sink: a header before the first move (metadata),
+# comments between moves, -0.0, and values binary moves can't hold (kept as text)
+def write_sample(sink):
+	sink.write(";header\n")
+	sink.write("G21\nG91\n")
+	sink.move(gw.G1XYZE, (20.0, 0.0, 0.0002, 60.0))
+	for k in range(50):
+		angle = math.radians(k*7.2)
+		sink.move(gw.G1XYE, (round(math.cos(angle), 4), round(math.sin(angle), 4), 0.0327))
+	sink.write(";layer 2\n")
+	sink.move(gw.G0XY, (-0.0, 1.5))
+	sink.move(gw.G1XYE, (-0.0, -0.0, 0.0))
+	sink.move(gw.G0XYZ, (0.1, -0.0, 2.2))
+	sink.move(gw.G1Z, (-2.2,))
+	sink.move(gw.G1XYE, (1.23456789, 2.0, 0.1)) # finer than 1/VALUE_SCALE
+	sink.move(gw.G1XYE, (1e-5, -1e-5, 0.0))
+	sink.move(gw.G3XYIJE, (2.0, 0.0, 1.0, 0.0, 0.25))
+	sink.move(gw.G2XYIJE, (-2.0, 0.0, -1.0, -0.0, 0.25))
+	sink.move(gw.G1XYE, (3, 0, 1)) # ints are written as "3", not "3.0"
+	sink.write(";end é\n")
+
+def text_and_binary(tmp_path, **binary_options):
+	text_file = str(tmp_path/"out.gcode")
+	binary_file = str(tmp_path/"out.bgcode")
+	for sink in (gw.FileGcodeSink(text_file), gw.BinaryGcodeSink(binary_file, **binary_options)):
+		write_sample(sink)
+		sink.close()
+	converted = str(tmp_path/"converted.gcode")
+	gw.convert_to_text(binary_file, converted)
+	return open(text_file, "rb").read(), open(converted, "rb").read()
+
+def test_binary_round_trip_is_byte_identical(tmp_path):
+	text, converted = text_and_binary(tmp_path)
+	assert b"X-0.0 Y1.5" in text
+	assert text==converted
+
+def test_binary_round_trip_across_blocks(tmp_path):
+	text, converted = text_and_binary(tmp_path, block_moves=7)
+	assert text==converted
+
+def test_binary_file_with_only_metadata(tmp_path):
+	binary_file = str(tmp_path/"out.bgcode")
+	sink = gw.BinaryGcodeSink(binary_file)
+	sink.write(";only a header\n")
+	sink.close()
+	converted = str(tmp_path/"converted.gcode")
+	gw.convert_to_text(binary_file, converted)
+	assert open(converted, "rb").read()==b";only a header\n"
+
+# cut after the magic (no metadata length), in the first block's length, and in its data
+def test_truncated_binary_file_raises(tmp_path):
+	binary_file = str(tmp_path/"out.bgcode")
+	sink = gw.BinaryGcodeSink(binary_file, block_moves=7)
+	write_sample(sink)
+	sink.close()
+	data = open(binary_file, "rb").read()
+	length, first_block = gw.read_varint(bytearray(data), len(gw.BINARY_MAGIC))
+	first_block += length
+	cut_file = str(tmp_path/"cut.bgcode")
+	for cut in (len(gw.BINARY_MAGIC), first_block+2, first_block+6):
+		open(cut_file, "wb").write(data[:cut])
+		with pytest.raises(ValueError):
+			gw.convert_to_text(cut_file, str(tmp_path/"converted.gcode"))
+
+def test_gzip_round_trip(tmp_path):
+	text_file = str(tmp_path/"out.gcode")
+	gzip_file = str(tmp_path/"out.gcode.gz")
+	for sink in (gw.FileGcodeSink(text_file), gw.GzipGcodeSink(gzip_file)):
+		write_sample(sink)
+		sink.close()
+	converted = str(tmp_path/"converted.gcode")
+	gw.convert_to_text(gzip_file, converted)
+	assert open(text_file, "rb").read()==open(converted, "rb").read()
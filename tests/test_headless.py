@@ -0,0 +1,37 @@
+import slicer_utilities as su
+import weave_slicer as ws
+from benchmarks import shapes
+
+# the turtle and slicers run without Rhino on meshes, with the polyline geometry backend
+
+
+def test_slice_turtle_on_a_mesh(make_turtle):
+	t = make_turtle()
+	su.slice_turtle(t, shapes.cylinder(radius=20, height=5), bottom_layers=1)
+	assert len(t.get_history())>100
+	assert "G1" in t.get_sink().getvalue()
+
+def test_weave_slice_turtle_on_a_mesh(make_turtle):
+	t = make_turtle()
+	ws.weave_slice_turtle(t, shapes.cylinder(radius=20, height=5))
+	assert len(t.get_history())>100
+	assert len(t.get_lines())>0
+
+def test_weave_layers_planned_on_workers_match(make_turtle):
+	shape = shapes.towers(count=2, radius=10, spread=30, height=6)
+	serial = make_turtle()
+	ws.weave_slice_turtle(serial, shape, bottom_layers=1)
+	parallel = make_turtle()
+	ws.weave_slice_turtle_parallel(parallel, shape, bottom_layers=1, workers=3)
+	assert serial.get_sink().getvalue()==parallel.get_sink().getvalue()
+	assert serial.get_history().rows()==parallel.get_history().rows()
+
+def test_weave_one_layer_matches_the_whole_shape(make_turtle):
+	shape = shapes.cylinder(radius=20, height=5)
+	whole = make_turtle()
+	ws.weave_slice_turtle(whole, shape)
+	one = make_turtle()
+	shape_slices = su.slice_shape(shape, one.get_layer_height())
+	for layer in range(len(shape_slices)):
+		ws.weave_one_slice_turtle(one, layer, shape, shape_slices=shape_slices)
+	assert one.get_history().rows()==whole.get_history().rows()
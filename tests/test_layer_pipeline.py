@@ -0,0 +1,62 @@
+import pytest
+import geometry_backend as gb
+import layer_pipeline as lp
+import slice_cache as sc
+import slicer_utilities as su
+import weave_slicer as ws
+import branch_graph as bg
+from benchmarks import shapes
+
+# the pipeline plans every layer from the same curves, and gets the same points and angles,
+# as the serial weave slicer
+
+
+# plans every layer of shape_slices in the pipeline, and checks each branch's plan against
+# find_points_and_angles on the curves weave_one_slice_turtle would plan it from
+def assert_plans_match(shape_slices, wavelength=3.0, mode=1):
+	sc.cache.clear()
+	graph = bg.BranchGraph(shape_slices)
+	jobs = ws.weave_layer_jobs(shape_slices, shape_slices, graph, range(len(shape_slices)), wavelength, mode=mode)
+	plans = lp.plan_weave_layers(jobs)
+	last = len(shape_slices)-1
+	for i in range(len(plans)):
+		for k, j, points0, points1, angles in plans[i]:
+			if (i==last):
+				slice0 = shape_slices[i-1][0]
+				slice1 = shape_slices[i][0]
+			else:
+				assert j in graph.candidates(i,k)
+				slice0 = shape_slices[i][k]
+				slice1 = shape_slices[i+1][j]
+			expected = ws.find_points_and_angles(slice0, slice1, wavelength, mode=mode, layer=i)
+			assert (points0, points1, angles)==expected
+	return plans
+
+@pytest.mark.parametrize("mode", [1, 3])
+def test_plans_match_find_points_and_angles(mode):
+	shape = shapes.towers(count=2, radius=10, spread=30, height=6)
+	plans = assert_plans_match(su.slice_shape(shape, 1.0), mode=mode)
+	assert all([len(plan)==2 for plan in plans[:-1]])
+
+def test_plans_match_find_points_and_angles_from_a_closed_slice_to_an_open_one():
+	# the angles are measured from the open slice above down to the closed one
+	square = [(0.0, 0.0, 0.0), (20.0, 0.0, 0.0), (20.0, 20.0, 0.0), (0.0, 20.0, 0.0), (0.0, 0.0, 0.0)]
+	arc = [(1.0, 0.0, 1.0), (21.0, 1.0, 1.0), (20.5, 19.0, 1.0), (2.0, 20.5, 1.0)]
+	smaller = [(x+0.5, y+0.5, 2.0) for x, y, z in arc]
+	plans = assert_plans_match([[gb.AddPolyline(square)], [gb.AddPolyline(arc)], [gb.AddPolyline(smaller)]])
+	assert len(plans[0][0][4])==len(plans[0][0][3])
+
+def test_too_small_layers_are_not_planned():
+	square = [(0.0, 0.0, 0.0), (1.5, 0.0, 0.0), (1.5, 1.5, 0.0), (0.0, 1.5, 0.0), (0.0, 0.0, 0.0)]
+	plans = assert_plans_match([[gb.AddPolyline(square)], [gb.AddPolyline([(x, y, 1.0) for x, y, z in square])]])
+	assert plans[0][0][2:]==(False, False, False)
+
+# (test_headless checks mode 1 with a bottom)
+def test_weave_slice_turtle_parallel_matches_the_serial_slicer_with_skins(make_turtle):
+	shape = shapes.towers(count=2, radius=10, spread=30, height=6)
+	serial = make_turtle()
+	ws.weave_slice_turtle(serial, shape, mode=3, skin=True)
+	parallel = make_turtle()
+	ws.weave_slice_turtle_parallel(parallel, shape, mode=3, skin=True, workers=3)
+	assert serial.get_sink().getvalue()==parallel.get_sink().getvalue()
+	assert serial.get_history().rows()==parallel.get_history().rows()
@@ -0,0 +1,40 @@
+import math
+import mesh_slicer as ms
+from benchmarks import shapes
+
+# meshes sliced in one sweep, checked against shapes whose slices are known
+
+
+# area of a closed loop of (x, y, z) points
+def area(loop):
+	return abs(sum([loop[i-1][0]*loop[i][1]-loop[i][0]*loop[i-1][1] for i in range(len(loop))]))/2
+
+def cube(size):
+	vertices = [(x, y, z) for z in (0.0, size) for y in (0.0, size) for x in (0.0, size)]
+	faces = [(0, 2, 3, 1), (4, 5, 7, 6), (0, 1, 5, 4), (2, 6, 7, 3), (0, 4, 6, 2), (1, 3, 7, 5)]
+	return ms.TriangleMesh(vertices, faces)
+
+def test_slice_mesh_of_a_cube():
+	layers = ms.slice_mesh(cube(10.0), 1.0)
+	assert len(layers)==11
+	for k in range(len(layers)):
+		assert len(layers[k])==1
+		points, closed = layers[k][0]
+		assert closed
+		assert abs(area(points)-100.0)<1e-9
+		assert abs(points[0][2]-min(max(k, 1e-4), 10.0-1e-4))<1e-9
+
+def test_slice_mesh_at_heights():
+	layers = ms.slice_mesh(cube(10.0), 1.0, heights=[0.5, 2.0, 2.25, 9.0])
+	assert [round(layer[0][0][0][2], 6) for layer in layers]==[0.5, 2.0, 2.25, 9.0]
+
+def test_slice_mesh_of_towers():
+	layers = ms.slice_mesh(shapes.towers(count=4, radius=10, spread=40, height=5), 1.0)
+	assert len(layers)==6
+	for layer in layers:
+		# one loop per tower, each the 48 sided polygon of the tower, which narrows to 0.8 of its radius
+		assert len(layer)==4
+		for points, closed in layer:
+			assert closed
+			radius = 10*(1-0.2*points[0][2]/5)
+			assert abs(area(points)-0.5*48*radius*radius*math.sin(2*math.pi/48))<1e-6
@@ -0,0 +1,44 @@
+import random
+import geometry_backend as gb
+import path_ordering as pa
+import slicer_utilities as su
+
+# branches are printed nearest first, closed loops start near the turtle and open paths at their nearer end
+
+
+# a closed square loop, side 4, corner at (x, y), points along its sides
+def square_loop(x, y):
+	points = [(x+k, y, 0.0) for k in range(4)]+[(x+4, y+k, 0.0) for k in range(4)]
+	points += [(x+4-k, y+4, 0.0) for k in range(4)]+[(x, y+4-k, 0.0) for k in range(4)]
+	return (points, True)
+
+def test_order_loops_nearest_first():
+	loops = [square_loop(0, 0), square_loop(30, 0), square_loop(10, 0), square_loop(20, 0)]
+	order = pa.order_loops(loops, (-5.0, 2.0))
+	assert [index for index, j, reverse in order]==[0, 2, 3, 1]
+	# each square is entered at its point nearest where the last one started (and ended)
+	assert [loops[index][0][j] for index, j, reverse in order]==[(0, 2, 0.0), (10, 2, 0.0), (20, 2, 0.0), (30, 2, 0.0)]
+	assert pa.travel_length(loops, order, (-5.0, 2.0))<pa.travel_length(loops, pa.given_order(loops), (-5.0, 2.0))
+
+def test_order_loops_reverses_open_paths():
+	line = ([(20.0, 0.0, 0.0), (10.0, 0.0, 0.0)], False)
+	order = pa.order_loops([square_loop(30, 0), line], (0.0, 0.0))
+	assert order==[(1, 1, True), (0, 0, False)]
+
+def test_order_loops_is_a_permutation():
+	rng = random.Random(3)
+	loops = [square_loop(rng.uniform(0, 100), rng.uniform(0, 100)) for k in range(25)]
+	order = pa.order_loops(loops, (0.0, 0.0))
+	assert sorted([index for index, j, reverse in order])==list(range(25))
+
+def test_branch_order_never_adds_travel(make_turtle):
+	rng = random.Random(5)
+	curves = []
+	for k in range(12):
+		points, closed = square_loop(rng.uniform(0, 80), rng.uniform(0, 80))
+		curves.append(gb.AddPolyline(points+[points[0]]))
+	t = make_turtle()
+	savings = pa.TravelSavings()
+	order = su.branch_order(t, curves, savings)
+	assert sorted([k for k, start_point, reverse in order])==list(range(12))
+	assert savings.after<=savings.before
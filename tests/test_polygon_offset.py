@@ -0,0 +1,115 @@
+import math
+import geometry_backend as gb
+import polygon_offset as po
+import slicer_utilities as su
+
+# inward offsets checked against shapes whose rings are known
+
+
+def area(loop):
+	return abs(po.signed_area(loop))
+
+# a closed polygon through the corners, points every spacing mm along its sides
+def sampled(corners, spacing=0.5, z=0.0):
+	points = []
+	for i in range(len(corners)):
+		a = corners[i]
+		b = corners[(i+1)%len(corners)]
+		steps = max(int(round(math.hypot(b[0]-a[0], b[1]-a[1])/spacing)), 1)
+		for k in range(steps):
+			points.append((a[0]+(b[0]-a[0])*k/float(steps), a[1]+(b[1]-a[1])*k/float(steps), z))
+	return points
+
+def circle(radius, spacing=0.5, z=0.0):
+	n = int(2*math.pi*radius/spacing)
+	return [(radius*math.cos(2*math.pi*k/n), radius*math.sin(2*math.pi*k/n), z) for k in range(n)]
+
+def square(size):
+	return [(0.0, 0.0), (size, 0.0), (size, size), (0.0, size)]
+
+def test_inset_rings_of_a_square():
+	rings = po.inset_rings(sampled(square(20.0)), 1.0)
+	assert len(rings)==9
+	for k in range(len(rings)):
+		assert len(rings[k])==1
+		side = 20.0-2*(k+1)
+		assert abs(area(rings[k][0])-side*side)<0.01
+		assert abs(min([p[0] for p in rings[k][0]])-(k+1))<0.001
+
+def test_inset_rings_of_a_circle():
+	rings = po.inset_rings(circle(50.5), 1.0)
+	assert len(rings)==50
+	for k in range(len(rings)):
+		radius = 50.5-(k+1)
+		for p in rings[k][0]:
+			assert abs(math.hypot(p[0], p[1])-radius)<0.05
+	assert rings[-1][0][0][2]==0.0
+
+def test_inset_rings_split_at_a_neck():
+	# two 20 mm squares joined by a neck 4 mm wide, the neck is gone after two rings
+	corners = [(0.0, 0.0), (20.0, 0.0), (20.0, 8.0), (30.0, 8.0), (30.0, 0.0), (50.0, 0.0),
+		(50.0, 20.0), (30.0, 20.0), (30.0, 12.0), (20.0, 12.0), (20.0, 20.0), (0.0, 20.0)]
+	rings = po.inset_rings(sampled(corners), 1.0)
+	assert [len(ring) for ring in rings]==[1, 2, 2, 2, 2, 2, 2, 2, 2]
+	assert len(po.inset_rings(sampled(corners), 1.0, count=3))==3
+	assert len(po.order_rings(rings))==sum([len(ring) for ring in rings])
+
+# distance from p to the closed polygon through corners
+def outline_distance(p, corners):
+	best = None
+	for i in range(len(corners)):
+		a = corners[i-1]
+		b = corners[i]
+		abx = b[0]-a[0]
+		aby = b[1]-a[1]
+		u = min(max(((p[0]-a[0])*abx+(p[1]-a[1])*aby)/(abx*abx+aby*aby), 0.0), 1.0)
+		d = math.hypot(a[0]+u*abx-p[0], a[1]+u*aby-p[1])
+		if (best is None or d<best):
+			best = d
+	return best
+
+# every point of ring k (and every edge midpoint) is k*distance from the outline
+# (with round joins at the reflex corners, a miter join reaches further out)
+def assert_ring_spacing(corners, rings, distance, tolerance):
+	for k in range(len(rings)):
+		for loop in rings[k]:
+			for i in range(len(loop)):
+				a = loop[i-1]
+				b = loop[i]
+				for p in (b, ((a[0]+b[0])/2, (a[1]+b[1])/2)):
+					assert abs(outline_distance(p, corners)-(k+1)*distance)<tolerance
+
+def test_inset_ring_spacing_of_a_star(monkeypatch):
+	monkeypatch.setattr(po, "MITER_LIMIT", 1.0)
+	# ten sharp tips and ten reflex corners
+	corners = []
+	for k in range(20):
+		radius = (30.0, 12.0)[k%2]
+		corners.append((radius*math.cos(math.pi*k/10), radius*math.sin(math.pi*k/10)))
+	for points in ([(x, y, 0.0) for x, y in corners], sampled(corners, 0.37)):
+		rings = po.inset_rings(points, 0.8)
+		assert len(rings)>=14
+		assert_ring_spacing(corners, rings, 0.8, 0.02)
+
+def test_inset_ring_spacing_of_a_comb(monkeypatch):
+	monkeypatch.setattr(po, "MITER_LIMIT", 1.0)
+	# five 3 mm teeth on a bar, the teeth are used up after the first ring
+	corners = [(0.0, 0.0), (40.0, 0.0), (40.0, 9.0)]
+	for k in range(5):
+		x = 36.0-8*k
+		corners += [(x, 9.0), (x, 25.0), (x-3.0, 25.0), (x-3.0, 9.0)]
+	corners += [(0.0, 9.0)]
+	rings = po.inset_rings(sampled(corners), 1.0)
+	assert [len(ring) for ring in rings]==[1, 1, 1, 1]
+	assert_ring_spacing(corners, rings, 1.0, 0.02)
+
+def test_offset_curves_keep_the_corners_of_a_polyline():
+	corners = []
+	for k in range(20):
+		radius = (30.0, 12.0)[k%2]
+		corners.append((radius*math.cos(math.pi*k/10), radius*math.sin(math.pi*k/10), 0.0))
+	curve = gb.AddPolyline(corners+[corners[0]])
+	assert su.curve_polygon(curve)==corners
+	curves = su.get_offset_curves(curve, 0.8)
+	assert len(curves)>=14
+	assert_ring_spacing(corners, [[gb.PolylineVertices(c)[:-1]] for c in curves[:7]], 0.8, 0.02)
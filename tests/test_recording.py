@@ -0,0 +1,57 @@
+# recording a block of turtle output and replaying it into another turtle
+# gives the same G-code, history and state as writing it there
+
+
+def first_part(t):
+	t.set_speed(1200)
+	for i in range(36):
+		t.forward(2.0)
+		t.right(10)
+	t.set_color(300, 20, 0)
+	t.penup()
+	t.forward(5)
+	t.pendown()
+	t.lift(0.5)
+
+def second_part(t):
+	for i in range(20):
+		t.forward(1.5)
+		t.left(7)
+
+def test_replay_matches_writing_directly(make_turtle):
+	direct = make_turtle()
+	first_part(direct)
+	second_part(direct)
+
+	recorded = make_turtle()
+	recording = recorded.start_recording()
+	first_part(recorded)
+	block = recorded.stop_recording(recording)
+
+	replayed = make_turtle()
+	replayed.replay(block)
+	assert replayed.save_state()==block["end"]
+	second_part(replayed)
+
+	assert replayed.get_sink().getvalue()==direct.get_sink().getvalue()
+	assert replayed.get_history().rows()==direct.get_history().rows()
+	assert replayed.save_state()==direct.save_state()
+	stats = replayed.get_path_stats()
+	assert stats.by_color==direct.get_path_stats().by_color
+	assert abs(stats.total_distance()-direct.get_path_stats().total_distance())<1e-9
+
+def test_stop_recording_restores_the_sink(make_turtle):
+	t = make_turtle()
+	sink = t.get_sink()
+	recording = t.start_recording()
+	t.forward(1)
+	t.stop_recording(recording)
+	assert t.get_sink() is sink
+
+def test_old_set_state_still_copies_a_turtle(make_turtle):
+	t = make_turtle()
+	other = make_turtle()
+	other.forward(10)
+	other.left(90)
+	t.set_state(other)
+	assert (t.getX(), t.getY()) == (other.getX(), other.getY())
@@ -0,0 +1,61 @@
+import pytest
+import result_cache as rcache
+import slicer_utilities as su
+import weave_slicer as ws
+from benchmarks import shapes
+
+# cached slicers: untouched layers are replayed, and the output is the same as without the cache
+
+SHAPE = shapes.cylinder(radius=20, height=8)
+
+
+# run(slicer, **parameters) slices SHAPE into a new turtle
+@pytest.fixture
+def run(make_turtle):
+	def slice_shape(slicer, **parameters):
+		t = make_turtle()
+		slicer(t, SHAPE, **parameters)
+		return t
+	return slice_shape
+
+def same_output(t1, t2):
+	return t1.get_sink().getvalue()==t2.get_sink().getvalue() and t1.get_history().rows()==t2.get_history().rows()
+
+def test_rounded_state_ignores_the_last_bits():
+	assert rcache.stable_hash(rcache.rounded({"v": [0.04906767432741814, -1e-17]}))==rcache.stable_hash(rcache.rounded({"v": [0.04906767432741811, 0.0]}))
+
+def test_slice_turtle_cached_replays_unchanged_layers(run, tmp_path):
+	cache = rcache.ResultCache(str(tmp_path))
+	first = run(su.slice_turtle_cached, bottom_layers=1, cache=cache)
+	assert same_output(first, run(su.slice_turtle, bottom_layers=1))
+	cache.hits = {}
+	cache.misses = {}
+	second = run(su.slice_turtle_cached, bottom_layers=2, cache=cache)
+	# layer 0 is unchanged, layer 1 gets a bottom and layer 2 starts where it ends
+	assert cache.hits["layers"]==2
+	assert cache.misses["layers"]==2
+	assert same_output(second, run(su.slice_turtle, bottom_layers=2))
+
+def test_weave_slice_turtle_cached_replays_unchanged_layers(run, tmp_path):
+	cache = rcache.ResultCache(str(tmp_path))
+	first = run(ws.weave_slice_turtle_cached, bottom_layers=1, cache=cache)
+	assert same_output(first, run(ws.weave_slice_turtle, bottom_layers=1))
+	cache.hits = {}
+	cache.misses = {}
+	second = run(ws.weave_slice_turtle_cached, bottom_layers=2, cache=cache)
+	assert cache.hits["plans"]==4
+	assert cache.hits["layers"]==2
+	assert same_output(second, run(ws.weave_slice_turtle, bottom_layers=2))
+
+def test_weave_slice_turtle_cached_skin_layers(run, tmp_path):
+	assert same_output(run(ws.weave_slice_turtle_cached, skin=True, cache=rcache.ResultCache(str(tmp_path/"all"))), run(ws.weave_slice_turtle, skin=True))
+	cache = rcache.ResultCache(str(tmp_path))
+	run(ws.weave_slice_turtle_cached, skin=True, skin_layers=2, cache=cache)
+	cache.hits = {}
+	cache.misses = {}
+	third = run(ws.weave_slice_turtle_cached, skin=True, skin_layers=3, cache=cache)
+	# only the two layers planned against the newly skinned layer 1 are planned again
+	assert cache.hits["plans"]==2
+	assert cache.misses["plans"]==2
+	assert cache.hits["layers"]>=1
+	assert same_output(third, run(ws.weave_slice_turtle_cached, skin=True, skin_layers=3, cache=rcache.ResultCache(str(tmp_path/"fresh"))))
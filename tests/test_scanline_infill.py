@@ -0,0 +1,39 @@
+import math
+import scanline_infill as si
+
+# zig zag bottoms from the scanline sweep, checked against squares whose coverage is known
+
+
+def square(size):
+	return [(0.0, 0.0), (size, 0.0), (size, size), (0.0, size)]
+
+def path_length(paths):
+	return sum([math.hypot(path[i][0]-path[i-1][0], path[i][1]-path[i-1][1]) for path in paths for i in range(1, len(path), 2)])
+
+def test_scanline_infill_of_a_square():
+	paths = si.zig_zag_paths([[(x, y, 0.2) for x, y in square(10.0)]], 1.0)
+	assert len(paths)==1
+	assert [round(p[1], 6) for p in paths[0][::2]]==[k+0.5 for k in range(10)]
+	# the scan lines cover the square from side to side, back and forth
+	assert abs(path_length(paths)-100.0)<1e-9
+	assert paths[0][0][0]==0.0 and paths[0][1][0]==10.0 and paths[0][2][0]==10.0
+	assert paths[0][0][2]==0.2
+
+def test_scanline_infill_around_a_hole():
+	hole = [(3.0, 3.0), (7.0, 3.0), (7.0, 7.0), (3.0, 7.0)]
+	loops = [[(x, y, 0.0) for x, y in square(10.0)], [(x, y, 0.0) for x, y in hole]]
+	paths = si.zig_zag_paths(loops, 1.0)
+	# below, on either side of and above the hole
+	assert len(paths)==4
+	assert abs(path_length(paths)-(100.0-16.0))<1e-9
+
+def test_scanline_infill_at_an_angle():
+	loops = [[(x, y, 0.0) for x, y in square(10.0)]]
+	paths = si.zig_zag_paths(loops, 0.5, angle=45.0)
+	# the scan lines of a region cover its area/spacing
+	assert abs(path_length(paths)*0.5-100.0)<1.0
+	for path in paths:
+		for p in path:
+			assert -1e-9<=p[0]<=10.0+1e-9 and -1e-9<=p[1]<=10.0+1e-9
+	inset = si.zig_zag_paths(loops, 1.0, inset=0.5)
+	assert min([p[0] for path in inset for p in path])==0.5
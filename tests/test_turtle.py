@@ -0,0 +1,72 @@
+import math
+
+# the batched turtle calls write the same G-code and history as the calls they stand for
+
+
+def same_output(t1, t2):
+	return t1.get_sink().getvalue()==t2.get_sink().getvalue() and t1.get_history().rows()==t2.get_history().rows()
+
+def test_turn_sequence_matches_left_and_forward(make_turtle):
+	angles = [5.0+k%7 for k in range(300)]
+	distances = [0.5+0.01*(k%13) for k in range(300)]
+	looped = make_turtle()
+	looped.pendown()
+	for a, d in zip(angles, distances):
+		looped.left(a)
+		looped.forward(d)
+	batched = make_turtle()
+	batched.pendown()
+	batched.turn_sequence(angles, distances)
+	assert same_output(looped, batched)
+	assert batched.save_state()==looped.save_state()
+
+def test_turn_sequence_lifting_and_turning_last(make_turtle):
+	angles = [-3.0]*120
+	looped = make_turtle()
+	looped.pendown()
+	for a in angles:
+		looped.forward_lift(0.75, 0.01)
+		looped.left(a)
+	batched = make_turtle()
+	batched.pendown()
+	batched.turn_sequence(angles, 0.75, heights=0.01, turn_first=False)
+	assert same_output(looped, batched)
+	assert batched.save_state()==looped.save_state()
+
+def test_follow_path_matches_set_position(make_turtle):
+	points = []
+	for k in range(200):
+		angle = math.radians(k*3.6)
+		points.append((20*math.cos(angle), 20*math.sin(angle), 0.2*(k//100)))
+	points.insert(50, points[49]) # a move that goes nowhere is not written
+	pen_mask = [k%37!=0 for k in range(len(points))]
+	speeds = [1000+500*(k//60) for k in range(len(points))]
+	looped = make_turtle()
+	for point, pen, speed in zip(points, pen_mask, speeds):
+		if (pen):
+			looped.pendown()
+		else:
+			looped.penup()
+		if (speed!=looped.get_speed()):
+			looped.set_speed(speed)
+		looped.set_position(point[0], point[1], point[2])
+	followed = make_turtle()
+	followed.follow_path(points, pen_mask=pen_mask, speeds=speeds)
+	assert same_output(looped, followed)
+	assert followed.get_position()==looped.get_position()
+	# set_position turns the turtle a little every move, follow_path once at the end
+	for a, b in zip(followed.get_frame(), looped.get_frame()):
+		assert max([abs(u-v) for u, v in zip(a, b)])<1e-12
+
+def test_follow_path_at_the_current_height(make_turtle):
+	points = [(k*0.5, (k%2)*0.5, 5.0) for k in range(40)]
+	looped = make_turtle()
+	looped.pendown()
+	looped.lift(1.0)
+	for x, y, z in points:
+		looped.set_position(x, y)
+	followed = make_turtle()
+	followed.pendown()
+	followed.lift(1.0)
+	followed.follow_path(points, follow_z=False)
+	assert same_output(looped, followed)